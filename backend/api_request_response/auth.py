@@ -3,7 +3,7 @@ Authentication API Schemas
 Request/Response models for authentication endpoints
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -70,6 +70,11 @@ class RoleCreate(BaseModel):
     description: Optional[str] = None
 
 
+class RoleAssignUsers(BaseModel):
+    """Users to receive a role in one request"""
+    user_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
 class RoleResponse(BaseModel):
     id: int
     name: str
@@ -3,8 +3,8 @@ Receipts API Schemas
 Request/Response models for receipt endpoints
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, BeforeValidator, ValidationInfo, model_validator
+from typing import Optional, List, Annotated
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -65,11 +65,24 @@ class ReceiptUpdate(BaseModel):
 
 
 # Receipt Response Models
+
+# Missing donation amounts are reported as 0
+Amount = Annotated[float, BeforeValidator(lambda value: value or 0)]
+
+
 class ReceiptResponse(BaseModel):
-    """Response model for receipt data"""
+    """
+    Response model for receipt data
+
+    Validated straight from ORM objects or column rows (from_attributes).
+    Pass {"creators": {user_id: username}} as validation context to fill
+    created_by_username; unknown creators are shown as User<id>.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     receipt_no: str
-    receipt_date: date
+    receipt_date: datetime
     donor_name: str
     village: Optional[str] = None
     residence: Optional[str] = None
@@ -78,17 +91,22 @@ class ReceiptResponse(BaseModel):
     payment_mode: str
     payment_details: Optional[str] = None
     donation1_purpose: Optional[str] = None
-    donation1_amount: float
-    donation2_amount: float
+    donation1_amount: Amount = 0.0
+    donation2_amount: Amount = 0.0
     total_amount: float
     total_amount_words: Optional[str] = None
-    status: str
+    status: Optional[str] = None
     created_by: int
-    created_at: datetime
-    updated_at: datetime
+    created_by_username: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True  # For Pydantic V2 compatibility
+    @model_validator(mode="after")
+    def fill_created_by_username(self, info: ValidationInfo):
+        creators = (info.context or {}).get("creators")
+        if self.created_by_username is None and creators is not None:
+            self.created_by_username = creators.get(self.created_by, f"User{self.created_by}")
+        return self
 
 
 class ReceiptListResponse(BaseModel):
@@ -101,6 +119,22 @@ class ReceiptListResponse(BaseModel):
     data: List[ReceiptResponse]
 
 
+class ReceiptKeysetListResponse(BaseModel):
+    """Response model for a cursor paginated receipt list"""
+    status: str = "success"
+    message: str
+    page_size: int
+    next_cursor: Optional[str] = None
+    data: List[ReceiptResponse]
+
+
+class ReceiptGetResponse(BaseModel):
+    """Response model for a single receipt"""
+    status: str = "success"
+    message: str
+    data: ReceiptResponse
+
+
 class ReceiptCreateResponse(BaseModel):
     """Response model for receipt creation"""
     status: str = "success"
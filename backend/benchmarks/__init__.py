@@ -0,0 +1 @@
+# Benchmark scripts - run from the backend folder, e.g. python -m benchmarks.receipt_numbers
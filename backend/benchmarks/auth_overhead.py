@@ -0,0 +1,115 @@
+"""
+Auth Overhead Benchmark
+Per-request cost of authenticating an access token, with and without the
+verified-token cache of login.security.
+
+Replays an SPA polling load: --users signed-in users, each polling
+--requests-per-poll endpoints every cycle for --polls cycles (120 cycles of
+4 requests is one 30 minute token polled every 15 seconds). Every request
+runs what get_current_user does before the handler:
+  without  python-jose decode of the token, then resolve_principal
+  with     verify_token through the cache, then resolve_principal
+Principals are cached beforehand, as they are for a user polling more often
+than PRINCIPAL_CACHE_TTL_SECONDS, so no database is needed:
+    python -m benchmarks.auth_overhead --users 200 --threads 1 8
+
+--cache-size below --users shows the cache under eviction pressure.
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from login import security
+from login.security import create_access_token, decode_jwt, decode_access_token_claims, clear_verified_tokens
+from login.principal import Principal, principal_claims, resolve_principal, cache_principal, cache_generation
+
+
+ROLES = (["admin"], ["receipt_creator"], ["user_data_viewer"], ["receipt_report_viewer"])
+
+
+def without_cache(token: str):
+    """get_current_user before the cache: decode every time"""
+    payload = decode_jwt(token)
+    if payload is None or payload.get("sub") is None:
+        raise ValueError("token rejected")
+    return resolve_principal(None, payload)
+
+
+def with_cache(token: str):
+    """get_current_user now"""
+    payload = decode_access_token_claims(token)
+    if payload is None:
+        raise ValueError("token rejected")
+    return resolve_principal(None, payload)
+
+
+def polling_load(users: int, requests_per_poll: int, polls: int, seed: int = 7) -> list:
+    """Tokens in request order: every user once per poll, users interleaved at random"""
+    rng = random.Random(seed)
+    tokens = [
+        create_access_token(principal_claims(user_id, f"bench_user{user_id}", ROLES[user_id % len(ROLES)],
+                                             True, user_id % len(ROLES) == 0, 0))
+        for user_id in range(1, users + 1)
+    ]
+    requests = []
+    for _ in range(polls):
+        cycle = tokens * requests_per_poll
+        rng.shuffle(cycle)
+        requests.extend(cycle)
+    return requests
+
+
+def cache_principals(requests: list):
+    """Put the principal of every token in the principal cache"""
+    for token in set(requests):
+        claims = decode_jwt(token)
+        cache_principal(Principal.build(claims["user_id"], claims["sub"], claims["roles"], claims["is_active"],
+                                        claims["is_superuser"], claims["perms"]), cache_generation())
+
+
+def replay(authenticate, requests: list, threads: int) -> float:
+    """Mean microseconds per request of authenticate over requests, on threads workers"""
+    clear_verified_tokens()
+    cache_principals(requests)
+    started = time.perf_counter()
+    if threads == 1:
+        for token in requests:
+            authenticate(token)
+    else:
+        chunk = -(-len(requests) // threads)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda part: [authenticate(token) for token in part],
+                              [requests[start:start + chunk] for start in range(0, len(requests), chunk)]))
+    return (time.perf_counter() - started) / len(requests) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests-per-poll", type=int, default=4)
+    parser.add_argument("--polls", type=int, default=120)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--cache-size", type=int, default=security.VERIFIED_TOKEN_CACHE_MAX_ENTRIES)
+    args = parser.parse_args()
+
+    security.VERIFIED_TOKEN_CACHE_MAX_ENTRIES = args.cache_size
+    requests = polling_load(args.users, args.requests_per_poll, args.polls)
+
+    # Same principal either way
+    cache_principals(requests)
+    assert without_cache(requests[0]) == with_cache(requests[0]) == with_cache(requests[0])
+
+    print("=" * 64)
+    print(f"{len(requests)} requests from {args.users} users, cache size {args.cache_size}")
+    print(f"{'threads':>7}  {'without us/req':>14}  {'with us/req':>12}  {'speedup':>8}")
+    for threads in args.threads:
+        without_us = replay(without_cache, requests, threads)
+        with_us = replay(with_cache, requests, threads)
+        print(f"{threads:>7}  {without_us:>14.1f}  {with_us:>12.1f}  {without_us / with_us:>7.1f}x")
+    print("=" * 64)
+
+
+if __name__ == "__main__":
+    main()
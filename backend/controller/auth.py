@@ -3,14 +3,15 @@ Authentication Controller
 Business logic orchestration for authentication operations
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import timedelta
 
-from api_request_response.auth import UserLogin, UserCreate, UserRegister, UserUpdate
+from api_request_response.auth import UserLogin, UserCreate, UserRegister, UserUpdate, RoleAssignUsers
 from manager import auth as auth_manager
 from login.security import create_access_token
+from login.principal import principal_claims
 from login.config import settings
 
 
@@ -37,7 +38,7 @@ def login_controller(user_data: UserLogin, db_session: Session) -> Dict[str, Any
         # Create access token
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
-            data={"sub": user.username, "user_id": user.id, "roles": roles},
+            data=principal_claims(user.id, user.username, roles, user.is_active, user.is_superuser, user.token_version),
             expires_delta=access_token_expires
         )
         
@@ -140,11 +141,20 @@ def refresh_token_controller(refresh_token: str, db_session: Session) -> Dict[st
         
         # Get user roles
         roles = auth_manager.get_user_roles(db_session, user.id)
+        claims = principal_claims(user.id, user.username, roles, user.is_active, user.is_superuser, user.token_version)
+        
+        # Refresh tokens are single use: the presented one is replaced
+        new_refresh_token = auth_manager.rotate_refresh_token(db_session, refresh_token, user.id)
+        if not new_refresh_token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
         
         # Create new access token
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = create_access_token(
-            data={"sub": user.username, "user_id": user.id, "roles": roles},
+            data=claims,
             expires_delta=access_token_expires
         )
         
@@ -153,6 +163,7 @@ def refresh_token_controller(refresh_token: str, db_session: Session) -> Dict[st
             "message": "Token refreshed successfully",
             "data": {
                 "access_token": access_token,
+                "refresh_token": new_refresh_token,
                 "token_type": "bearer",
                 "expires_in": settings.access_token_expire_minutes * 60
             }
@@ -215,27 +226,34 @@ def get_current_user_controller(username: str, db_session: Session) -> Dict[str,
         raise e
 
 
-def get_all_users_controller(db_session: Session) -> Dict[str, Any]:
-    """Get all users (admin only)"""
+def get_all_users_controller(
+    db_session: Session,
+    page_num: int = 1,
+    page_size: int = 50,
+    username: Optional[str] = None,
+    role: Optional[str] = None
+) -> Dict[str, Any]:
+    """Get a page of users with their roles (admin only), optionally searched by username or filtered by role"""
     try:
-        # This would typically have admin-only access
-        users = db_session.query(auth_manager.User).all()
+        get_response = auth_manager.get_users_paginated(db_session, page_num, page_size, username, role)
         
         user_list = []
-        for user in users:
-            roles = auth_manager.get_user_roles(db_session, user.id)
+        for user in get_response["data"]:
             user_list.append({
                 "id": user.id,
                 "username": user.username,
                 "is_active": user.is_active,
                 "is_superuser": user.is_superuser,
-                "roles": roles,
+                "roles": get_response["roles"][user.id],
                 "created_at": user.created_at.isoformat() if user.created_at else None
             })
         
         response = {
             "status": "success",
             "message": "Users retrieved successfully",
+            "total_count": get_response["total_count"],
+            "page_num": page_num,
+            "page_size": page_size,
             "data": user_list
         }
         
@@ -278,3 +296,26 @@ def update_user_controller(user_id: int, user_data: UserUpdate, db_session: Sess
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating user: {str(e)}"
         )
+
+
+def assign_role_to_users_controller(role_name: str, assign_data: RoleAssignUsers, db_session: Session) -> Dict[str, Any]:
+    """Handle assigning one role to many users (admin only)"""
+    try:
+        result = auth_manager.assign_role_to_users(db_session, role_name, assign_data.user_ids)
+        
+        response = {
+            "status": "success",
+            "message": f"Role '{result['role']}' assigned to {len(result['assigned'])} users",
+            "data": result
+        }
+        
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        db_session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error assigning role: {str(e)}"
+        )
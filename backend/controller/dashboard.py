@@ -0,0 +1,47 @@
+"""
+Dashboard Controller
+Handles business logic orchestration for the home view dashboard
+"""
+
+from sqlalchemy.orm import Session
+
+from login.principal import Principal
+from manager import dashboard as dashboard_manager
+
+
+def get_dashboard_controller(db_session: Session, current_user: Principal):
+    """
+    Controller to get the caller's details and every dashboard widget they may see
+
+    Args:
+        db_session: Database session
+        current_user: Current user
+
+    Returns:
+        Response dictionary with me and the widgets; widgets the caller's roles
+        do not allow are left out
+    """
+    try:
+        widgets, cached = dashboard_manager.get_dashboard_widgets(db_session, current_user)
+
+        response = {
+            "status": "success",
+            "message": "Dashboard retrieved successfully",
+            "cached": cached,
+            "data": {
+                "me": {
+                    "id": current_user.id,
+                    "username": current_user.username,
+                    "is_active": current_user.is_active,
+                    "is_superuser": current_user.is_superuser,
+                    "roles": sorted(current_user.roles)
+                },
+                **widgets
+            }
+        }
+
+        return response
+
+    except Exception as e:
+        db_session.rollback()
+        raise e
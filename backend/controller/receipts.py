@@ -4,16 +4,69 @@ Handles business logic orchestration for receipt operations
 """
 
 import logging
-from typing import Optional, List
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
+from fastapi.responses import Response
 
 from manager import receipts as receipts_manager
-from api_request_response.receipts import ReceiptCreate, ReceiptUpdate, ReceiptFilter
+from manager import receipt_search as receipt_search_manager
+from manager import receipt_analytics as receipt_analytics_manager
+from manager.role_catalog import resolve_role_names
+from login.permissions import Permission
+from login.principal import Principal
+from api_request_response.receipts import (
+    ReceiptCreate, ReceiptUpdate, ReceiptFilter,
+    ReceiptGetResponse, ReceiptCreateResponse, ReceiptUpdateResponse,
+    ReceiptListResponse, ReceiptKeysetListResponse
+)
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# Roles whose users are listed in the receipt reports dropdown
+RECEIPT_REPORTS_DROPDOWN_ROLES = ("admin", "receipt_creator")
+
+
+def receipt_json_response(model, content: dict, creators_map: dict, status_code: int = 200) -> Response:
+    """
+    Render a receipts response in one pass
+    
+    Receipts in content (ORM objects or column rows) are validated into the
+    response model and dumped to JSON by pydantic-core, so the payload is not
+    walked again by jsonable_encoder.
+    
+    Args:
+        model: Response model (ReceiptGetResponse, ReceiptListResponse, ...)
+        content: Response fields; data holds the receipt(s)
+        creators_map: User ID to username, for created_by_username
+        status_code: HTTP status of the response
+    """
+    payload = model.model_validate(content, from_attributes=True, context={"creators": creators_map})
+    return Response(content=payload.model_dump_json(), status_code=status_code, media_type="application/json")
+
+
+def receipt_list_response(result: dict, creators_map: dict, keyset: bool) -> Response:
+    """Listing response for a page from get_receipts_paginated or get_receipts_keyset"""
+    if keyset:
+        return receipt_json_response(ReceiptKeysetListResponse, {
+            "status": "success",
+            "message": "Receipts retrieved successfully",
+            "page_size": result["page_size"],
+            "next_cursor": result["next_cursor"],
+            "data": result["data"]
+        }, creators_map)
+    
+    return receipt_json_response(ReceiptListResponse, {
+        "status": "success",
+        "message": "Receipts retrieved successfully",
+        "total_count": result["total_count"],
+        "page_num": result["page_num"],
+        "page_size": result["page_size"],
+        "data": result["data"]
+    }, creators_map)
+
 
 def create_receipt_controller(receipt_data: ReceiptCreate, db_session: Session, user_id: int):
     """
@@ -34,52 +87,25 @@ def create_receipt_controller(receipt_data: ReceiptCreate, db_session: Session,
         # Get creator username
         creators_map = receipts_manager.get_creators_usernames(db_session, [created_receipt.created_by])
         
-        # Convert receipt to dictionary with creator username
-        receipt_dict = {
-            "id": created_receipt.id,
-            "receipt_no": created_receipt.receipt_no,
-            "receipt_date": created_receipt.receipt_date,
-            "donor_name": created_receipt.donor_name,
-            "village": created_receipt.village,
-            "residence": created_receipt.residence,
-            "mobile": created_receipt.mobile,
-            "relation_address": created_receipt.relation_address,
-            "payment_mode": created_receipt.payment_mode,
-            "payment_details": created_receipt.payment_details,
-            "donation1_purpose": created_receipt.donation1_purpose,
-            "donation1_amount": float(created_receipt.donation1_amount) if created_receipt.donation1_amount else 0.0,
-            "donation2_amount": float(created_receipt.donation2_amount) if created_receipt.donation2_amount else 0.0,
-            "total_amount": float(created_receipt.total_amount),
-            "total_amount_words": created_receipt.total_amount_words,
-            "status": created_receipt.status,
-            "created_by": created_receipt.created_by,
-            "created_by_username": creators_map.get(created_receipt.created_by, f"User{created_receipt.created_by}"),
-            "created_at": created_receipt.created_at,
-            "updated_at": created_receipt.updated_at
-        }
-        
-        response = {
+        return receipt_json_response(ReceiptCreateResponse, {
             "status": "success", 
             "message": "Receipt created successfully",
-            "data": receipt_dict
-        }
-        
-        return response
+            "data": created_receipt
+        }, creators_map, status_code=201)
         
     except Exception as e:
         db_session.rollback()
         raise e
 
 
-def get_receipt_controller(receipt_id: int, db_session: Session, user_id: int, user_roles: List[str]):
+def get_receipt_controller(receipt_id: int, db_session: Session, principal: Principal):
     """
     Controller to get single receipt by ID
     
     Args:
         receipt_id: Receipt ID
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Response dictionary with receipt data
@@ -92,47 +118,17 @@ def get_receipt_controller(receipt_id: int, db_session: Session, user_id: int, u
             raise HTTPException(status_code=404, detail="Receipt not found")
         
         # Check permissions for receipt_creator
-        # Ensure both values are integers for proper comparison
-        current_user_id = int(user_id)
-        receipt_creator_id = int(receipt.created_by)
-        
-        if "receipt_creator" in user_roles and receipt_creator_id != current_user_id:
+        if receipts_manager.sees_own_receipts_only(principal) and int(receipt.created_by) != int(principal.id):
             raise HTTPException(status_code=403, detail="You can only view your own receipts")
         
         # Get creator username
         creators_map = receipts_manager.get_creators_usernames(db_session, [receipt.created_by])
         
-        # Convert receipt to dictionary with creator username
-        receipt_dict = {
-            "id": receipt.id,
-            "receipt_no": receipt.receipt_no,
-            "receipt_date": receipt.receipt_date,
-            "donor_name": receipt.donor_name,
-            "village": receipt.village,
-            "residence": receipt.residence,
-            "mobile": receipt.mobile,
-            "relation_address": receipt.relation_address,
-            "payment_mode": receipt.payment_mode,
-            "payment_details": receipt.payment_details,
-            "donation1_purpose": receipt.donation1_purpose,
-            "donation1_amount": float(receipt.donation1_amount) if receipt.donation1_amount else 0.0,
-            "donation2_amount": float(receipt.donation2_amount) if receipt.donation2_amount else 0.0,
-            "total_amount": float(receipt.total_amount),
-            "total_amount_words": receipt.total_amount_words,
-            "status": receipt.status,
-            "created_by": receipt.created_by,
-            "created_by_username": creators_map.get(receipt.created_by, f"User{receipt.created_by}"),
-            "created_at": receipt.created_at,
-            "updated_at": receipt.updated_at
-        }
-        
-        response = {
+        return receipt_json_response(ReceiptGetResponse, {
             "status": "success",
             "message": "Receipt retrieved successfully",
-            "data": receipt_dict
-        }
-        
-        return response
+            "data": receipt
+        }, creators_map)
         
     except Exception as e:
         if not isinstance(e, HTTPException):
@@ -145,10 +141,11 @@ def get_receipts_controller(
     filters: Optional[ReceiptFilter] = None,
     page_num: int = 1,
     page_size: int = 10,
-    user_id: Optional[int] = None,
-    user_roles: Optional[List[str]] = None,
+    principal: Optional[Principal] = None,
     pdf: bool = False,
-    csv: bool = False
+    csv: bool = False,
+    keyset: bool = False,
+    cursor: Optional[str] = None
 ):
     """
     Controller to get receipts with pagination and filtering, or export as PDF/CSV
@@ -158,10 +155,11 @@ def get_receipts_controller(
         filters: Optional filters to apply
         page_num: Page number
         page_size: Items per page
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         pdf: Export as PDF
         csv: Export as CSV
+        keyset: Use cursor pagination instead of page_num
+        cursor: next_cursor from the previous page (implies keyset)
         
     Returns:
         Response dictionary with paginated receipts or StreamingResponse for exports
@@ -170,63 +168,168 @@ def get_receipts_controller(
         # Handle PDF/CSV export
         if pdf or csv:
             export_data = receipts_manager.get_receipts_for_export(
-                db_session, filters, user_id, user_roles, pdf, csv
+                db_session, filters, principal, pdf, csv
             )
             return export_data
 
         # Get receipts from manager
-        result = receipts_manager.get_receipts_paginated(
-            db_session, filters, page_num, page_size, user_id, user_roles
-        )
+        keyset = keyset or bool(cursor)
+        if keyset:
+            result = receipts_manager.get_receipts_keyset(
+                db_session, filters, cursor, page_size, principal
+            )
+        else:
+            result = receipts_manager.get_receipts_paginated(
+                db_session, filters, page_num, page_size, principal
+            )
         
         # Get creator usernames for the receipts
         creator_ids = list(set([receipt.created_by for receipt in result["data"]]))
         creators_map = receipts_manager.get_creators_usernames(db_session, creator_ids)
         
-        # Convert receipt objects to dictionaries with creator usernames
+        return receipt_list_response(result, creators_map, keyset)
+        
+    except Exception as e:
+        db_session.rollback()
+        raise e
+
+
+async def get_receipt_controller_async(receipt_id: int, db_session: AsyncSession, principal: Principal):
+    """Controller to get single receipt by ID (async, see get_receipt_controller)"""
+    receipt = await receipts_manager.get_receipt_by_id_async(db_session, receipt_id)
+    
+    if not receipt:
+        raise HTTPException(status_code=404, detail="Receipt not found")
+    
+    if receipts_manager.sees_own_receipts_only(principal) and int(receipt.created_by) != int(principal.id):
+        raise HTTPException(status_code=403, detail="You can only view your own receipts")
+    
+    creators_map = await receipts_manager.get_creators_usernames_async(db_session, [receipt.created_by])
+    
+    return receipt_json_response(ReceiptGetResponse, {
+        "status": "success",
+        "message": "Receipt retrieved successfully",
+        "data": receipt
+    }, creators_map)
+
+
+async def get_receipts_controller_async(
+    db_session: AsyncSession,
+    filters: Optional[ReceiptFilter] = None,
+    page_num: int = 1,
+    page_size: int = 10,
+    principal: Optional[Principal] = None,
+    keyset: bool = False,
+    cursor: Optional[str] = None
+):
+    """
+    Controller to get a page of receipts (async, see get_receipts_controller)
+    
+    Exports are not served here; the router runs them through the sync controller.
+    """
+    keyset = keyset or bool(cursor)
+    if keyset:
+        result = await receipts_manager.get_receipts_keyset_async(
+            db_session, filters, cursor, page_size, principal
+        )
+    else:
+        result = await receipts_manager.get_receipts_paginated_async(
+            db_session, filters, page_num, page_size, principal
+        )
+    
+    creator_ids = list(set([receipt.created_by for receipt in result["data"]]))
+    creators_map = await receipts_manager.get_creators_usernames_async(db_session, creator_ids)
+    
+    return receipt_list_response(result, creators_map, keyset)
+
+
+def search_receipts_controller(
+    db_session: Session,
+    term: str,
+    limit: int = 20,
+    filters: Optional[ReceiptFilter] = None,
+    principal: Optional[Principal] = None
+):
+    """
+    Controller to search receipts ranked by similarity
+    
+    Args:
+        db_session: Database session
+        term: Search text
+        limit: Maximum number of results
+        filters: Optional filters to apply
+        principal: Current user
+        
+    Returns:
+        Response dictionary with matching receipts, best match first
+    """
+    try:
+        hits = receipt_search_manager.search_receipts(
+            db_session, term, limit, filters, principal
+        )
+        
+        creator_ids = list(set([receipt.created_by for receipt, _ in hits]))
+        creators_map = receipts_manager.get_creators_usernames(db_session, creator_ids)
+        
         receipts_data = []
-        for receipt in result["data"]:
-            receipt_dict = {
-                "id": receipt.id,
-                "receipt_no": receipt.receipt_no,
-                "receipt_date": receipt.receipt_date,
-                "donor_name": receipt.donor_name,
-                "village": receipt.village,
-                "residence": receipt.residence,
-                "mobile": receipt.mobile,
-                "relation_address": receipt.relation_address,
-                "payment_mode": receipt.payment_mode,
-                "payment_details": receipt.payment_details,
-                "donation1_purpose": receipt.donation1_purpose,
-                "donation1_amount": float(receipt.donation1_amount) if receipt.donation1_amount else 0.0,
-                "donation2_amount": float(receipt.donation2_amount) if receipt.donation2_amount else 0.0,
-                "total_amount": float(receipt.total_amount),
-                "total_amount_words": receipt.total_amount_words,
-                "status": receipt.status,
-                "created_by": receipt.created_by,
-                "created_by_username": creators_map.get(receipt.created_by, f"User{receipt.created_by}"),
-                "created_at": receipt.created_at,
-                "updated_at": receipt.updated_at
-            }
+        for receipt, score in hits:
+            receipt_dict = receipt.to_dict()
+            receipt_dict["created_by_username"] = creators_map.get(receipt.created_by, f"User{receipt.created_by}")
+            receipt_dict["score"] = round(score, 4)
             receipts_data.append(receipt_dict)
         
         response = {
             "status": "success",
-            "message": "Receipts retrieved successfully",
-            "total_count": result["total_count"],
-            "page_num": result["page_num"],
-            "page_size": result["page_size"],
+            "message": f"Found {len(receipts_data)} matching receipts",
             "data": receipts_data
         }
         
         return response
         
     except Exception as e:
-        db_session.rollback()
+        if not isinstance(e, HTTPException):
+            db_session.rollback()
         raise e
 
 
-def update_receipt_controller(receipt_id: int, updated_data: ReceiptUpdate, db_session: Session, user_id: int, user_roles: List[str]):
+def get_receipt_timeseries_controller(
+    db_session: Session,
+    bucket: str = "month",
+    filters: Optional[ReceiptFilter] = None,
+    principal: Optional[Principal] = None
+):
+    """
+    Controller to get receipt totals per day, week, month or financial year
+    
+    Args:
+        db_session: Database session
+        bucket: Bucket size (day, week, month or fy)
+        filters: Optional filters to apply
+        principal: Current user
+        
+    Returns:
+        Response dictionary with columnar series data
+    """
+    try:
+        series = receipt_analytics_manager.get_receipt_timeseries(
+            db_session, bucket, filters, principal
+        )
+        
+        response = {
+            "status": "success",
+            "message": f"Receipt timeseries retrieved ({len(series['bucket_start'])} buckets)",
+            "data": series
+        }
+        
+        return response
+        
+    except Exception as e:
+        if not isinstance(e, HTTPException):
+            db_session.rollback()
+        raise e
+
+
+def update_receipt_controller(receipt_id: int, updated_data: ReceiptUpdate, db_session: Session, principal: Principal):
     """
     Controller to update receipt
     
@@ -234,50 +337,23 @@ def update_receipt_controller(receipt_id: int, updated_data: ReceiptUpdate, db_s
         receipt_id: Receipt ID to update
         updated_data: Updated receipt data
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Response dictionary with updated receipt data
     """
     try:
         # Update receipt through manager
-        updated_receipt = receipts_manager.update_receipt(db_session, receipt_id, updated_data, user_id, user_roles)
+        updated_receipt = receipts_manager.update_receipt(db_session, receipt_id, updated_data, principal)
         
         # Get creator username
         creators_map = receipts_manager.get_creators_usernames(db_session, [updated_receipt.created_by])
         
-        # Convert receipt to dictionary with creator username
-        receipt_dict = {
-            "id": updated_receipt.id,
-            "receipt_no": updated_receipt.receipt_no,
-            "receipt_date": updated_receipt.receipt_date,
-            "donor_name": updated_receipt.donor_name,
-            "village": updated_receipt.village,
-            "residence": updated_receipt.residence,
-            "mobile": updated_receipt.mobile,
-            "relation_address": updated_receipt.relation_address,
-            "payment_mode": updated_receipt.payment_mode,
-            "payment_details": updated_receipt.payment_details,
-            "donation1_purpose": updated_receipt.donation1_purpose,
-            "donation1_amount": float(updated_receipt.donation1_amount) if updated_receipt.donation1_amount else 0.0,
-            "donation2_amount": float(updated_receipt.donation2_amount) if updated_receipt.donation2_amount else 0.0,
-            "total_amount": float(updated_receipt.total_amount),
-            "total_amount_words": updated_receipt.total_amount_words,
-            "status": updated_receipt.status,
-            "created_by": updated_receipt.created_by,
-            "created_by_username": creators_map.get(updated_receipt.created_by, f"User{updated_receipt.created_by}"),
-            "created_at": updated_receipt.created_at,
-            "updated_at": updated_receipt.updated_at
-        }
-        
-        response = {
+        return receipt_json_response(ReceiptUpdateResponse, {
             "status": "success",
             "message": "Receipt updated successfully", 
-            "data": receipt_dict
-        }
-        
-        return response
+            "data": updated_receipt
+        }, creators_map)
         
     except Exception as e:
         if not isinstance(e, HTTPException):
@@ -285,22 +361,21 @@ def update_receipt_controller(receipt_id: int, updated_data: ReceiptUpdate, db_s
         raise e
 
 
-def delete_receipt_controller(receipt_id: int, db_session: Session, user_id: int, user_roles: List[str]):
+def delete_receipt_controller(receipt_id: int, db_session: Session, principal: Principal):
     """
     Controller to delete receipt (sets status to cancelled)
     
     Args:
         receipt_id: Receipt ID to delete
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Response dictionary
     """
     try:
         # Delete receipt through manager
-        deleted = receipts_manager.delete_receipt(db_session, receipt_id, user_id, user_roles)
+        deleted = receipts_manager.delete_receipt(db_session, receipt_id, principal)
         
         if not deleted:
             raise HTTPException(status_code=500, detail="Failed to delete receipt")
@@ -318,21 +393,20 @@ def delete_receipt_controller(receipt_id: int, db_session: Session, user_id: int
         raise e
 
 
-def get_receipt_stats_controller(db_session: Session, user_id: int, user_roles: List[str]):
+def get_receipt_stats_controller(db_session: Session, principal: Principal):
     """
     Controller to get receipt statistics
     
     Args:
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Response dictionary with statistics
     """
     try:
         # Get stats from manager
-        stats = receipts_manager.get_receipt_stats(db_session, user_id, user_roles)
+        stats = receipts_manager.get_receipt_stats(db_session, principal)
         
         response = {
             "status": "success",
@@ -347,22 +421,21 @@ def get_receipt_stats_controller(db_session: Session, user_id: int, user_roles:
         raise e
 
 
-def get_receipt_creators_controller(db_session: Session, user_id: int, user_roles: List[str]):
+def get_receipt_creators_controller(db_session: Session, principal: Principal):
     """
     Controller to get list of users who have created receipts
     
     Args:
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         List of receipt creators with their basic info
     """
     try:
-        print(f"DEBUG: Controller - Getting receipt creators for user {user_id} with roles {user_roles}")
+        print(f"DEBUG: Controller - Getting receipt creators for user {principal.id} with roles {sorted(principal.roles)}")
         
-        creators = receipts_manager.get_receipt_creators(db_session, user_id, user_roles)
+        creators = receipts_manager.get_receipt_creators(db_session, principal)
         
         print(f"DEBUG: Controller - Manager returned {len(creators) if creators else 0} creators")
         
@@ -400,28 +473,21 @@ def get_receipt_creators_controller(db_session: Session, user_id: int, user_role
         }
 
 
-def get_receipt_reports_dropdown_controller(db_session: Session, user_id: int, user_roles: List[str]):
+def get_receipt_reports_dropdown_controller(db_session: Session, principal: Principal):
     """
-    Controller to get users with role IDs 1 and 5 for receipt reports dropdown
+    Controller to get users who can issue receipts for the receipt reports dropdown
     
     Args:
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
-        List of users with role IDs 1 and 5
+        List of users holding one of RECEIPT_REPORTS_DROPDOWN_ROLES
     """
     try:
-        # Check if user has permission to access reports
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
-        is_admin = "admin" in user_roles
-        
         # Only admin and receipt_report_viewer should access this dropdown
         # receipt_creator doesn't need this since they only see their own receipts
-        if not (has_read_receipts or is_admin):
+        if not principal.can(Permission.READ_RECEIPTS):
             return {
                 "status": "error",
                 "message": "You don't have permission to access receipt reports dropdown.",
@@ -429,8 +495,9 @@ def get_receipt_reports_dropdown_controller(db_session: Session, user_id: int, u
                 "data": []
             }
         
-        # Get users with role IDs 1 and 5
-        users = receipts_manager.get_users_by_role_ids(db_session, [1, 5])
+        # Role ids come from the role catalog, no lookup query
+        role_ids = resolve_role_names(db_session, RECEIPT_REPORTS_DROPDOWN_ROLES)
+        users = receipts_manager.get_users_by_role_ids(db_session, list(role_ids.values()))
         
         response = {
             "status": "success",
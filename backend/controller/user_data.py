@@ -5,11 +5,33 @@ Handles business logic orchestration for user data operations
 
 from typing import Optional, List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 
 from models.user_data import User_data
 from api_request_response.user_data import User_dataCreate, User_dataUpdate
 from manager import user_data as user_data_manager
+from manager import member_search as member_search_manager
+
+
+def user_data_to_dict(u: User_data) -> dict:
+    """Listing representation of a member"""
+    return {
+        "user_id": u.user_id,
+        "name": u.name,
+        "surname": u.surname,
+        "father_or_husband_name": u.father_or_husband_name,
+        "mobile_no1": u.mobile_no1,
+        "mobile_no2": u.mobile_no2,
+        "address": u.address,
+        "state": u.state,
+        "pincode": u.pincode,
+        "email_id": u.email_id,
+        "area": u.area.area if u.area else None,
+        "village": u.village.village if u.village else None,
+        "type": u.type,
+        "status": u.status,
+    }
 
 
 def create_user_data_controller(user_data: User_dataCreate, db_session: Session):
@@ -55,10 +77,13 @@ def get_user_data_controller(
     village_ids: Optional[List[int]] = None,
     user_ids: Optional[List[int]] = None,
     pdf: bool = False,
-    csv: bool = False
+    csv: bool = False,
+    keyset: bool = False,
+    cursor: Optional[str] = None
 ):
     """
     Controller to get user data with filtering and pagination
+    (cursor pagination when keyset is set or a cursor is passed)
     """
     try:
         # Handle PDF/CSV export
@@ -68,36 +93,92 @@ def get_user_data_controller(
             )
             return export_data
 
-        # Get paginated user data through manager
-        get_response = user_data_manager.get_user_data_paginated(
-            db_session, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids
-        )
+        if keyset or cursor:
+            get_response = user_data_manager.get_user_data_keyset(
+                db_session, cursor, page_size, name, type_filter, area_ids, village_ids, user_ids
+            )
+            pagination = {"page_size": page_size, "next_cursor": get_response.get('next_cursor')}
+        else:
+            # Get paginated user data through manager
+            get_response = user_data_manager.get_user_data_paginated(
+                db_session, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids
+            )
+            pagination = {"page_num": page_num, "total_count": get_response.get('total_count')}
         
         data = get_response.get('data', [])
-        total_count = get_response.get('total_count')
         
         # Structure the response
         response = {
             "status": "success",
             "message": "User data retrieved successfully",
-            "page_num": page_num,
-            "total_count": total_count,
-            "data": [{
-                "user_id": u.user_id,
-                "name": u.name,
-                "surname": u.surname,
-                "father_or_husband_name": u.father_or_husband_name,
-                "mobile_no1": u.mobile_no1,
-                "mobile_no2": u.mobile_no2,
-                "address": u.address,
-                "state": u.state,
-                "pincode": u.pincode,
-                "email_id": u.email_id,
-                "area": u.area.area if u.area else None,
-                "village": u.village.village if u.village else None,
-                "type": u.type,
-                "status": u.status,
-            } for u in data]
+            **pagination,
+            "data": [user_data_to_dict(u) for u in data]
+        }
+        
+        return response
+        
+    except Exception as e:
+        db_session.rollback()
+        raise e
+
+
+async def get_user_data_controller_async(
+    db_session: AsyncSession,
+    page_num: int = 1,
+    page_size: int = 10,
+    name: Optional[str] = None,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None,
+    user_ids: Optional[List[int]] = None,
+    keyset: bool = False,
+    cursor: Optional[str] = None
+):
+    """
+    Controller to get a page of user data (async, see get_user_data_controller)
+    Exports are not served here; the router runs them through the sync controller.
+    """
+    if keyset or cursor:
+        get_response = await user_data_manager.get_user_data_keyset_async(
+            db_session, cursor, page_size, name, type_filter, area_ids, village_ids, user_ids
+        )
+        pagination = {"page_size": page_size, "next_cursor": get_response.get('next_cursor')}
+    else:
+        get_response = await user_data_manager.get_user_data_paginated_async(
+            db_session, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids
+        )
+        pagination = {"page_num": page_num, "total_count": get_response.get('total_count')}
+
+    return {
+        "status": "success",
+        "message": "User data retrieved successfully",
+        **pagination,
+        "data": [user_data_to_dict(u) for u in get_response.get('data', [])]
+    }
+
+
+def search_user_data_controller(
+    db_session: Session,
+    term: str,
+    limit: int = 20,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None
+):
+    """
+    Controller to search members by name, surname, village or mobile prefix
+    """
+    try:
+        hits = member_search_manager.search_members(
+            db_session, term, limit, type_filter, area_ids, village_ids
+        )
+        
+        # Structure the response
+        response = {
+            "status": "success",
+            "message": "Members searched successfully",
+            "count": len(hits),
+            "data": [{**user_data_to_dict(u), "score": round(score, 4)} for u, score in hits]
         }
         
         return response
@@ -8,6 +8,7 @@ from database import engine, SessionLocal
 from models.auth import User, Role, UserRole
 from models import user_data, village_area, auth
 from manager import auth as auth_manager
+from manager.role_catalog import get_role_catalog, invalidate_role_catalog
 from api_request_response.auth import UserCreate
 
 
@@ -39,11 +40,11 @@ def create_initial_roles(db: Session):
     
     print("🔧 Creating initial roles...")
     
+    # Existing roles in one read
+    existing_roles = get_role_catalog(db).ids_by_name
+    
     for role_data in roles_data:
-        # Check if role already exists
-        existing_role = db.query(Role).filter(Role.name == role_data["name"]).first()
-        
-        if not existing_role:
+        if role_data["name"] not in existing_roles:
             role = Role(name=role_data["name"], description=role_data["description"])
             db.add(role)
             print(f"   ✅ Created role: {role_data['name']}")
@@ -51,6 +52,7 @@ def create_initial_roles(db: Session):
             print(f"   ⚠️  Role already exists: {role_data['name']}")
     
     db.commit()
+    invalidate_role_catalog()
     print("✅ All roles created successfully!")
 
 
@@ -1,4 +1,7 @@
+import os
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
 
@@ -8,12 +11,20 @@ DATABASE_URL = (
     "?sslmode=require&channel_binding=require"
 )
 
+POOL_SIZE = 5                   # Number of connections to maintain
+MAX_OVERFLOW = 10               # Additional connections beyond pool_size
+
+# Route handlers are sync functions run in a worker threadpool; main.py sizes
+# it to the connection pool so requests queue for a thread instead of timing
+# out waiting for a connection
+REQUEST_THREADPOOL_SIZE = POOL_SIZE + MAX_OVERFLOW
+
 # Enhanced connection configuration for Render + Neon stability
 engine = create_engine(
     DATABASE_URL,
     poolclass=QueuePool,
-    pool_size=5,                # Number of connections to maintain
-    max_overflow=10,            # Additional connections beyond pool_size  
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_pre_ping=True,         # Test connections before use
     pool_recycle=300,           # Recycle connections every 5 minutes
     pool_timeout=20,            # Timeout for getting connection from pool
@@ -33,4 +44,66 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Async engine over asyncpg for routes that await their queries instead of
+# holding a worker thread. asyncpg takes SSL and timeouts as connect
+# arguments rather than URL parameters, and its prepared statement cache is
+# disabled because Neon's pooler hands connections between clients.
+ASYNC_DATABASE_URL = DATABASE_URL.split("?")[0].replace("postgresql+psycopg2://", "postgresql+asyncpg://")
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL + "?prepared_statement_cache_size=0",
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    pool_timeout=20,
+    connect_args={
+        "ssl": "require",
+        "timeout": 10,
+        "statement_cache_size": 0,
+        "server_settings": {"application_name": "svmps_backend_async"}
+    },
+    echo=False
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Routes named here (comma separated, or * for all) are served by their async
+# variant, so the async layer can be adopted one endpoint at a time:
+#   ASYNC_DB_ROUTES=list_receipts,get_receipt
+ASYNC_DB_ROUTES = {name.strip() for name in os.environ.get("ASYNC_DB_ROUTES", "").split(",") if name.strip()}
+
+def use_async_db(route_name: str) -> bool:
+    """Whether a route should be served with get_async_db"""
+    return "*" in ASYNC_DB_ROUTES or route_name in ASYNC_DB_ROUTES
+
+def async_db_variant(route_name: str, async_handler):
+    """
+    Decorator choosing between a sync handler and its async variant
+
+    Place it under the router decorator:
+        @router.get("/")
+        @async_db_variant("list_receipts", list_receipts_async)
+        def list_receipts(db: db_dependency, ...): ...
+    """
+    def choose(sync_handler):
+        return async_handler if use_async_db(route_name) else sync_handler
+    return choose
+
+def with_sync_db(function, *args):
+    """
+    Call function(db, *args) on a short-lived sync session
+    
+    For work an async variant hands to the threadpool (exports), so the
+    variant depends on get_async_db only.
+    """
+    with SessionLocal() as db:
+        return function(db, *args)
 Base = declarative_base()
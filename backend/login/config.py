@@ -12,6 +12,22 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     
+    # Expired and revoked refresh tokens are deleted this often, in batches
+    refresh_token_purge_interval_minutes: int = 360
+    refresh_token_purge_batch_size: int = 1000
+    
+    # bcrypt runs in a dedicated pool of this many threads
+    password_hash_workers: int = 2
+    
+    # Login attempts allowed in a burst and refilled per minute (username buckets are per client IP,
+    # account buckets cover one username from every IP)
+    login_username_burst: int = 5
+    login_username_per_minute: float = 5
+    login_ip_burst: int = 20
+    login_ip_per_minute: float = 30
+    login_account_burst: int = 30
+    login_account_per_minute: float = 10
+    
     class Config:
         env_file = ".env"
 
@@ -9,10 +9,9 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from database import get_db
-from login.security import decode_access_token
-from manager import auth as auth_manager
-from models.auth import User
-from login.permissions import Permission, user_has_permission
+from login.security import decode_access_token_claims
+from login.principal import Principal, resolve_principal
+from login.permissions import Permission
 
 # OAuth2 scheme that points to our login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -21,8 +20,13 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+) -> Principal:
+    """
+    Get current authenticated user
+    
+    Resolved from the token claims or the principal cache; the database is
+    only queried when the user changed after the token was issued.
+    """
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,15 +36,15 @@ def get_current_user(
     
     try:
         # Decode token
-        username = decode_access_token(token)
-        if username is None:
+        payload = decode_access_token_claims(token)
+        if payload is None:
             raise credentials_exception
             
     except Exception:
         raise credentials_exception
     
-    # Get user from database
-    user = auth_manager.get_user_by_username(db, username)
+    # Get user from claims, cache or database
+    user = resolve_principal(db, payload)
     if user is None:
         raise credentials_exception
     
@@ -54,8 +58,8 @@ def get_current_user(
 
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -63,8 +67,8 @@ def get_current_active_user(
 
 
 def get_current_superuser(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """Get current superuser"""
     if not current_user.is_superuser:
         raise HTTPException(
@@ -76,18 +80,17 @@ def get_current_superuser(
 
 def require_roles(allowed_roles: List[str]):
     """Dependency factory for role-based access control"""
+    allowed = frozenset(allowed_roles)
+    
     def role_checker(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
-    ) -> User:
-        user_roles = auth_manager.get_user_roles(db, current_user.id)
-        
+        current_user: Principal = Depends(get_current_user)
+    ) -> Principal:
         # Superuser has all permissions
         if current_user.is_superuser:
             return current_user
         
         # Check if user has any of the required roles
-        if not any(role in user_roles for role in allowed_roles):
+        if current_user.roles.isdisjoint(allowed):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required roles: {allowed_roles}"
@@ -101,17 +104,10 @@ def require_roles(allowed_roles: List[str]):
 def require_permission(permission: Permission):
     """Dependency factory for permission-based access control"""
     def permission_checker(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
-    ) -> User:
-        # Superuser has all permissions
-        if current_user.is_superuser:
-            return current_user
-        
-        # Get user roles and check permission
-        user_roles = auth_manager.get_user_roles(db, current_user.id)
-        
-        if not user_has_permission(user_roles, permission):
+        current_user: Principal = Depends(get_current_user)
+    ) -> Principal:
+        # Superusers carry every permission bit
+        if not current_user.can(permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required permission: {permission.value}"
@@ -4,11 +4,12 @@ Permission definitions and role-permission mappings
 """
 
 from enum import Enum
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, FrozenSet, Iterable
 
 
 class Permission(Enum):
-    """System permissions"""
+    """System permissions (bits follow declaration order - add new ones at the end)"""
     # User Data permissions
     READ_USER_DATA = "read_user_data"
     CREATE_USER_DATA = "create_user_data"
@@ -90,14 +91,45 @@ ROLE_PERMISSIONS: Dict[str, List[Permission]] = {
 }
 
 
+# Compiled once at import: one bit per permission and a mask per role
+PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << index for index, permission in enumerate(Permission)
+}
+ALL_PERMISSIONS_MASK = (1 << len(PERMISSION_BITS)) - 1
+
+ROLE_PERMISSION_SETS: Dict[str, FrozenSet[Permission]] = {
+    role: frozenset(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+ROLE_PERMISSION_MASKS: Dict[str, int] = {
+    role: sum(PERMISSION_BITS[permission] for permission in permissions)
+    for role, permissions in ROLE_PERMISSION_SETS.items()
+}
+
+
 def get_role_permissions(role: str) -> List[Permission]:
     """Get permissions for a role"""
     return ROLE_PERMISSIONS.get(role, [])
 
 
-def user_has_permission(user_roles: List[str], required_permission: Permission) -> bool:
-    """Check if user has required permission"""
-    for role in user_roles:
-        if required_permission in get_role_permissions(role):
-            return True
-    return False
\ No newline at end of file
+@lru_cache(maxsize=256)
+def _roles_mask(roles: FrozenSet[str]) -> int:
+    """Permission mask for a set of role names"""
+    mask = 0
+    for role in roles:
+        mask |= ROLE_PERMISSION_MASKS.get(role, 0)
+    return mask
+
+
+def permission_mask(user_roles: Iterable[str], is_superuser: bool = False) -> int:
+    """Permission mask granted by roles (every permission for a superuser)"""
+    if is_superuser:
+        return ALL_PERMISSIONS_MASK
+    if not isinstance(user_roles, frozenset):
+        user_roles = frozenset(user_roles)
+    return _roles_mask(user_roles)
+
+
+def mask_allows(mask: int, permission: Permission) -> bool:
+    """Check a permission against a permission mask"""
+    return bool(mask & PERMISSION_BITS[permission])
+
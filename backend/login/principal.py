@@ -0,0 +1,197 @@
+"""
+Request Principal
+The authenticated caller of a request, resolved from access token claims
+
+Access tokens carry the user id, roles, account flags, permission mask
+(see login.permissions) and the user's token_version when the token was
+issued. Every change to a user's account or roles bumps users.token_version,
+so a token's claims are trusted only while the stored version still matches;
+otherwise the principal is loaded from the database. Either way the
+principal is kept in a short-TTL in-process cache, which update_user and
+assign_user_roles clear through invalidate_principal so changes take effect
+on the next request of this worker (other workers within
+PRINCIPAL_CACHE_TTL_SECONDS).
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple, Dict, Any, FrozenSet, Iterable
+
+from sqlalchemy.orm import Session
+
+from login.permissions import Permission, PERMISSION_BITS, permission_mask
+
+
+# How long a database-loaded principal is reused
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_ENTRIES = 4096
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by route handlers"""
+    id: int
+    username: str
+    roles: FrozenSet[str]
+    is_active: bool = True
+    is_superuser: bool = False
+    permission_mask: int = 0
+
+    @classmethod
+    def build(
+        cls,
+        id: int,
+        username: str,
+        roles: Iterable[str],
+        is_active: bool = True,
+        is_superuser: bool = False,
+        mask: Optional[int] = None
+    ) -> "Principal":
+        """Create a principal, computing the permission mask from roles unless given"""
+        roles = frozenset(roles)
+        if mask is None:
+            mask = permission_mask(roles, is_superuser)
+        return cls(id, username, roles, bool(is_active), bool(is_superuser), mask)
+
+    def can(self, permission: Permission) -> bool:
+        """Check whether the principal holds a permission"""
+        return bool(self.permission_mask & PERMISSION_BITS[permission])
+
+
+_principal_cache: Dict[int, Tuple[Principal, float]] = {}
+# Bumped by every invalidation; a principal resolved across one is not cached
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+
+def principal_claims(
+    user_id: int,
+    username: str,
+    roles,
+    is_active: bool,
+    is_superuser: bool,
+    token_version: Optional[int]
+) -> Dict[str, Any]:
+    """Access token claims describing a principal"""
+    return {
+        "sub": username,
+        "user_id": user_id,
+        "roles": list(roles),
+        "is_active": is_active,
+        "is_superuser": is_superuser,
+        "perms": permission_mask(roles, is_superuser),
+        "ver": token_version or 0,
+    }
+
+
+def get_cached_principal(user_id: int) -> Optional[Principal]:
+    """Return the cached principal for a user if it is still fresh"""
+    with _cache_lock:
+        cached = _principal_cache.get(user_id)
+        if cached is None:
+            return None
+        principal, stored_at = cached
+        if time.monotonic() - stored_at > PRINCIPAL_CACHE_TTL_SECONDS:
+            del _principal_cache[user_id]
+            return None
+        return principal
+
+
+def cache_generation() -> int:
+    """Current invalidation generation, to pass to cache_principal"""
+    with _cache_lock:
+        return _cache_generation
+
+
+def cache_principal(principal: Principal, generation: int):
+    """
+    Remember a principal for PRINCIPAL_CACHE_TTL_SECONDS
+    
+    Skipped if a principal was invalidated since generation was read, as the
+    principal may have been resolved from data that is now stale.
+    """
+    with _cache_lock:
+        if generation != _cache_generation:
+            return
+        if len(_principal_cache) >= PRINCIPAL_CACHE_MAX_ENTRIES:
+            _principal_cache.clear()
+        _principal_cache[principal.id] = (principal, time.monotonic())
+
+
+def invalidate_principal(user_id: Optional[int] = None):
+    """
+    Forget cached principals (the database token_version is bumped by the caller)
+
+    Args:
+        user_id: User whose account or roles changed, or None for everyone
+    """
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if user_id is None:
+            _principal_cache.clear()
+        else:
+            _principal_cache.pop(user_id, None)
+
+
+def _claims_trusted(db_session: Session, payload: Dict[str, Any]) -> bool:
+    """Whether the token carries every principal claim and the user's current token_version"""
+    from models.auth import User
+
+    if not all(key in payload for key in ("user_id", "roles", "is_active", "is_superuser", "perms", "ver")):
+        return False
+    stored_version = db_session.query(User.token_version).filter(User.id == payload["user_id"]).scalar()
+    return (stored_version or 0) == payload["ver"]
+
+
+def load_principal(db_session: Session, username: str) -> Optional[Principal]:
+    """Load a principal from the users and roles tables"""
+    from manager import auth as auth_manager
+
+    user = auth_manager.get_user_by_username(db_session, username)
+    if user is None:
+        return None
+    return Principal.build(
+        user.id,
+        user.username,
+        auth_manager.get_user_roles(db_session, user.id),
+        user.is_active,
+        user.is_superuser,
+    )
+
+
+def resolve_principal(db_session: Session, payload: Dict[str, Any]) -> Optional[Principal]:
+    """
+    Resolve the principal for a verified access token payload
+
+    Args:
+        db_session: Database session (not used for cached principals)
+        payload: Decoded access token claims
+
+    Returns:
+        Principal, or None if the token's user no longer exists
+    """
+    generation = cache_generation()
+    user_id = payload.get("user_id")
+    if user_id is not None:
+        cached = get_cached_principal(user_id)
+        if cached is not None:
+            return cached
+
+        if _claims_trusted(db_session, payload):
+            principal = Principal.build(
+                user_id,
+                payload["sub"],
+                payload["roles"],
+                payload["is_active"],
+                payload["is_superuser"],
+                payload["perms"],
+            )
+            cache_principal(principal, generation)
+            return principal
+
+    principal = load_principal(db_session, payload["sub"])
+    if principal is not None:
+        cache_principal(principal, generation)
+    return principal
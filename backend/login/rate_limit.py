@@ -0,0 +1,123 @@
+"""
+Login Rate Limiting
+Token buckets per username and client IP, per username, and per client IP,
+in front of password checks
+
+Each key gets a bucket holding up to `burst` attempts that refills at
+`per_minute` attempts per minute. A login attempt takes one token from each
+of its buckets; if any is empty the attempt is rejected before any password
+hashing is done. The tight username buckets are kept per client IP, so
+guessing at an account from one address cannot lock its owner out everywhere
+else; the looser account bucket caps guesses at one account across all
+addresses.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from login.config import settings
+
+
+# Buckets idle long enough to be full again are dropped past this many keys
+MAX_TRACKED_KEYS = 10000
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated_at")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = now
+
+    def refill(self, now: float):
+        """Add the tokens earned since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self) -> float:
+        """Seconds until one token is available"""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class LoginRateLimiter:
+    """Per-username, per-account and per-IP token buckets for login attempts"""
+
+    def __init__(
+        self,
+        username_burst: int,
+        username_per_minute: float,
+        ip_burst: int,
+        ip_per_minute: float,
+        account_burst: int,
+        account_per_minute: float
+    ):
+        self.limits = {
+            "user": (username_burst, username_per_minute / 60.0),
+            "account": (account_burst, account_per_minute / 60.0),
+            "ip": (ip_burst, ip_per_minute / 60.0),
+        }
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, kind: str, key: str, now: float) -> TokenBucket:
+        bucket = self.buckets.get((kind, key))
+        if bucket is None:
+            if len(self.buckets) >= MAX_TRACKED_KEYS:
+                self._prune(now)
+            capacity, rate = self.limits[kind]
+            bucket = self.buckets[(kind, key)] = TokenBucket(capacity, rate, now)
+        else:
+            bucket.refill(now)
+        return bucket
+
+    def _prune(self, now: float):
+        """Forget buckets that have refilled completely"""
+        for bucket_key, bucket in list(self.buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self.buckets[bucket_key]
+
+    def acquire(self, username: str, ip: Optional[str]) -> Optional[float]:
+        """
+        Take one attempt for username and ip
+
+        Returns:
+            None if the attempt may proceed, otherwise seconds until it may be retried
+        """
+        now = time.monotonic()
+        with self.lock:
+            account = (username or '').lower()
+            buckets = [
+                self._bucket("user", f"{account}|{ip or ''}", now),
+                self._bucket("account", account, now),
+            ]
+            if ip:
+                buckets.append(self._bucket("ip", ip, now))
+
+            empty = [bucket for bucket in buckets if bucket.tokens < 1]
+            if empty:
+                return max(bucket.retry_after() for bucket in empty)
+
+            for bucket in buckets:
+                bucket.tokens -= 1
+            return None
+
+    def reset(self):
+        """Forget all buckets"""
+        with self.lock:
+            self.buckets.clear()
+
+
+login_rate_limiter = LoginRateLimiter(
+    settings.login_username_burst,
+    settings.login_username_per_minute,
+    settings.login_ip_burst,
+    settings.login_ip_per_minute,
+    settings.login_account_burst,
+    settings.login_account_per_minute,
+)
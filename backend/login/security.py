@@ -3,26 +3,50 @@ Security Utilities
 Password hashing and JWT token management
 """
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import hashlib
 import secrets
+import threading
+import time
 
 from login.config import settings
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately CPU heavy; a small dedicated pool caps how many
+# cores password checks can take, however many logins arrive at once
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+
+# Access tokens that verified, by SHA-256 digest of the token. The SPA sends
+# the same token with every request of its 30 minute life, so most requests
+# skip the HMAC check and claims parsing. Entries are dropped at their exp.
+VERIFIED_TOKEN_CACHE_MAX_ENTRIES = 4096
+
+_verified_tokens: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """
+    Verify a password against its hash
+    
+    Runs in the password pool; call from a worker thread, never the event loop.
+    """
+    return password_executor.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+    """Hash a password (in the password pool, see verify_password)"""
+    return password_executor.submit(pwd_context.hash, password).result()
 
 
 def create_access_token(data: Dict[Any, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -33,7 +57,7 @@ def create_access_token(data: Dict[Any, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
@@ -43,8 +67,18 @@ def create_refresh_token() -> str:
     return secrets.token_urlsafe(32)
 
 
-def verify_token(token: str) -> Optional[Dict[str, Any]]:
-    """Verify and decode JWT token"""
+def hash_refresh_token(token: str) -> str:
+    """
+    SHA-256 hex digest of a refresh token, as stored in refresh_tokens.token_hash
+    
+    Refresh tokens are 256 random bits, so an unsalted fast hash is enough to
+    make a leaked table useless while keeping lookups an exact index match.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def decode_jwt(token: str) -> Optional[Dict[str, Any]]:
+    """Verify and decode JWT token with python-jose (None if invalid or expired)"""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
@@ -52,6 +86,67 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_verified_token(key: bytes) -> Optional[Dict[str, Any]]:
+    """Return the cached claims for a token digest if the token has not expired"""
+    with _verified_tokens_lock:
+        cached = _verified_tokens.get(key)
+        if cached is None:
+            return None
+        payload, expires_at = cached
+        if time.time() > expires_at:
+            del _verified_tokens[key]
+            return None
+        _verified_tokens.move_to_end(key)
+        return dict(payload)
+
+
+def store_verified_token(key: bytes, payload: Dict[str, Any]):
+    """Remember a verified token's claims until its exp (least recently used evicted first)"""
+    expires_at = payload.get("exp")
+    # Only tokens that expire, and that jose would accept on every later request
+    if not isinstance(expires_at, (int, float)) or "nbf" in payload:
+        return
+    with _verified_tokens_lock:
+        _verified_tokens[key] = (dict(payload), expires_at)
+        _verified_tokens.move_to_end(key)
+        while len(_verified_tokens) > VERIFIED_TOKEN_CACHE_MAX_ENTRIES:
+            _verified_tokens.popitem(last=False)
+
+
+def clear_verified_tokens():
+    """Forget every cached token (the next request of each is verified again)"""
+    with _verified_tokens_lock:
+        _verified_tokens.clear()
+
+
+def verify_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify and decode JWT token
+    
+    A token that verified before is answered from the verified-token cache
+    until its exp; invalid tokens are never cached and always rejected by jose.
+    Whether the claims are still current is checked afterwards by
+    login.principal, as for uncached tokens.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = get_verified_token(key)
+    if payload is not None:
+        return payload
+    
+    payload = decode_jwt(token)
+    if payload is not None:
+        store_verified_token(key, payload)
+    return payload
+
+
+def decode_access_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Decode access token and return its claims (None if invalid or without subject)"""
+    payload = verify_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return payload
+
+
 def decode_access_token(token: str) -> Optional[str]:
     """Decode access token and return username"""
     payload = verify_token(token)
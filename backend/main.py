@@ -1,15 +1,28 @@
+import asyncio
+import os
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from utils.json_response import FastJSONResponse
 
 # Import routers
 from router.user_data import router as user_data_router
 from router.village_area import router as village_area_router
 from router.auth import router as auth_router
 from router.receipts import router as receipts_router
+from router.dashboard import router as dashboard_router
 from models import auth  # Import auth models for table creation
 
 # Import database
-from database import engine
+from database import engine, SessionLocal, REQUEST_THREADPOOL_SIZE
+from migrations import run_migrations
+from manager.receipts import sync_receipt_sequences
+from manager.member_search import backfill_member_search_text
+from manager.user_data import backfill_user_data_village_names
+from manager.receipt_rollup import ensure_receipt_daily_rollup
+from manager.auth import purge_refresh_tokens
+from login.config import settings
 import models.user_data  # Import to ensure tables are created
 import models.village_area
 import models.receipts  # Import receipts models for table creation
@@ -17,7 +30,8 @@ import models.receipts  # Import receipts models for table creation
 app = FastAPI(
     title="SVMPS API",
     description="Shree Vishwakarma Mewada Suthar Samaj API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse  # orjson when installed
 )
 
 # Add CORS middleware
@@ -34,12 +48,59 @@ models.user_data.Base.metadata.create_all(bind=engine)
 models.village_area.Base.metadata.create_all(bind=engine)
 models.auth.Base.metadata.create_all(bind=engine)  # Create auth tables
 models.receipts.Base.metadata.create_all(bind=engine)  # Create receipts tables
+run_migrations(engine)  # Indexes and changes on existing tables
+
+# Move receipt number counters past any numbers already issued, fill the
+# member search and village name columns and the receipt rollup for data
+# created before them
+with SessionLocal() as db_session:
+    sync_receipt_sequences(db_session)
+    backfill_member_search_text(db_session)
+    backfill_user_data_village_names(db_session)
+    ensure_receipt_daily_rollup(db_session)
+
+@app.on_event("startup")
+async def configure_request_threadpool():
+    """
+    Size the threadpool that runs sync route handlers
+    
+    Every handler that touches the database is a plain def, so FastAPI runs it
+    in this pool and a slow query only holds one worker thread, never the
+    event loop.
+    """
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = REQUEST_THREADPOOL_SIZE
+
+def purge_stale_refresh_tokens() -> int:
+    """Delete expired and revoked refresh tokens (see manager.auth.purge_refresh_tokens)"""
+    with SessionLocal() as db_session:
+        return purge_refresh_tokens(db_session, settings.refresh_token_purge_batch_size)
+
+async def refresh_token_purge_loop():
+    """Purge refresh tokens now and then every refresh_token_purge_interval_minutes"""
+    while True:
+        try:
+            purged = await run_in_threadpool(purge_stale_refresh_tokens)
+            print(f"Purged {purged} expired/revoked refresh tokens")
+        except Exception as e:
+            print(f"ERROR: refresh token purge failed: {str(e)}")
+        await asyncio.sleep(settings.refresh_token_purge_interval_minutes * 60)
+
+@app.on_event("startup")
+async def schedule_refresh_token_purge():
+    """Keep refresh_tokens to live tokens so lookups and the index stay small"""
+    app.state.refresh_token_purge_task = asyncio.create_task(refresh_token_purge_loop())
+
+@app.on_event("shutdown")
+async def stop_refresh_token_purge():
+    app.state.refresh_token_purge_task.cancel()
 
 # Include routers
 app.include_router(user_data_router, tags=["user_data"])
 app.include_router(village_area_router, tags=["village_area"])
 app.include_router(auth_router)
 app.include_router(receipts_router)  # Add receipts router
+app.include_router(dashboard_router)
 
 @app.get("/")
 async def root():
@@ -55,4 +116,6 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Client addresses from X-Forwarded-For of the proxies in FORWARDED_ALLOW_IPS (see Dockerfile)
+    uvicorn.run(app, host="0.0.0.0", port=8000, proxy_headers=True,
+                forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"))
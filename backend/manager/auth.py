@@ -3,20 +3,23 @@ Authentication Manager
 Database operations for user authentication and authorization
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_, select, func
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 
 from models.auth import User, Role, UserRole, RefreshToken
 from api_request_response.auth import UserCreate, UserUpdate
-from login.security import get_password_hash, verify_password, create_refresh_token
+from login.security import get_password_hash, verify_password, create_refresh_token, hash_refresh_token
+from login.principal import invalidate_principal
 from login.config import settings
+from manager.role_catalog import resolve_role_names, role_names_for, role_names_by_id, invalidate_role_catalog
+from utils.pagination import fetch_page_with_total
 
 
 def create_user(db_session: Session, user_data: UserCreate) -> User:
-    """Create new user in database"""
+    """Create new user in database, together with its roles in one transaction"""
     # Check if username already exists
     existing_user = db_session.query(User).filter(User.username == user_data.username).first()
     
@@ -38,12 +41,14 @@ def create_user(db_session: Session, user_data: UserCreate) -> User:
     )
     
     db_session.add(db_user)
-    db_session.commit()
-    db_session.refresh(db_user)
+    db_session.flush()
     
-    # Assign roles
+    # Assign roles (committed with the user)
     if user_data.roles:
-        assign_user_roles(db_session, db_user.id, user_data.roles)
+        assign_user_roles(db_session, db_user.id, user_data.roles, commit=False)
+    
+    db_session.commit()
+    db_session.refresh(db_user)
     
     return db_user
 
@@ -69,70 +74,284 @@ def get_user_by_id(db_session: Session, user_id: int) -> Optional[User]:
 
 
 def get_user_roles(db_session: Session, user_id: int) -> List[str]:
-    """Get user roles"""
-    roles = db_session.query(Role).join(UserRole).filter(
+    """Get user roles (role ids from user_roles, named through the role catalog)"""
+    role_ids = db_session.query(UserRole.role_id).filter(
         UserRole.user_id == user_id
-    ).all()
-    return [role.name for role in roles]
+    ).order_by(UserRole.role_id).all()
+    return role_names_for(db_session, [role_id for (role_id,) in role_ids])
+
+
+def get_users_paginated(
+    db_session: Session,
+    page_num: int = 1,
+    page_size: int = 50,
+    username: Optional[str] = None,
+    role: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get a page of users with their roles loaded
+    
+    The page and its total come from one statement (fetch_page_with_total)
+    and the role ids of every user on it from a second one, however many
+    users the page holds. Role names and ids are mapped through the role
+    catalog, so the roles table is not joined.
+    
+    Args:
+        db_session: Database session
+        page_num: Page number (1-based)
+        page_size: Users per page
+        username: Case-insensitive substring of the username
+        role: Only users holding this role
+        
+    Returns:
+        Dictionary with total_count, the users and their role names by user ID
+    """
+    query = db_session.query(User)
+    
+    if username:
+        query = query.filter(User.username.ilike(f"%{username}%"))
+    
+    if role:
+        role_id = resolve_role_names(db_session, [role]).get(role)
+        if role_id is None:
+            return {"total_count": 0, "data": [], "roles": {}}
+        query = query.filter(User.id.in_(
+            select(UserRole.user_id).where(UserRole.role_id == role_id)
+        ))
+    
+    offset = (page_num - 1) * page_size
+    users, total_count = fetch_page_with_total(query.order_by(User.id), offset, page_size)
+    
+    role_ids_by_user = {user.id: [] for user in users}
+    if role_ids_by_user:
+        role_rows = db_session.query(UserRole.user_id, UserRole.role_id).filter(
+            UserRole.user_id.in_(role_ids_by_user)
+        ).order_by(UserRole.user_id, UserRole.role_id)
+        for user_id, role_id in role_rows:
+            role_ids_by_user[user_id].append(role_id)
+    
+    roles_by_user = {
+        user_id: role_names_for(db_session, role_ids)
+        for user_id, role_ids in role_ids_by_user.items()
+    }
+    
+    return {
+        "total_count": total_count,
+        "data": users,
+        "roles": roles_by_user
+    }
+
+
+def bump_token_versions(db_session: Session, user_ids: List[int]):
+    """Mark the claims in access tokens already issued to these users as stale (not committed)"""
+    db_session.query(User).filter(User.id.in_(user_ids)).update(
+        {User.token_version: func.coalesce(User.token_version, 0) + 1},
+        synchronize_session=False
+    )
+
+
+def invalidate_user_caches(user_id: int):
+    """Forget receipt creator codes and request principals derived from a user's account and roles"""
+    from manager.receipts import invalidate_receipt_creator_code
+    invalidate_receipt_creator_code(user_id)
+    invalidate_principal(user_id)
 
 
-def assign_user_roles(db_session: Session, user_id: int, role_names: List[str]):
-    """Assign roles to user"""
-    # Remove existing roles
-    db_session.query(UserRole).filter(UserRole.user_id == user_id).delete()
+def assign_user_roles(
+    db_session: Session,
+    user_id: int,
+    role_names: List[str],
+    commit: bool = True
+) -> Dict[str, List[str]]:
+    """
+    Set a user's roles to role_names
     
-    # Add new roles
-    for role_name in role_names:
-        role = db_session.query(Role).filter(Role.name == role_name).first()
-        if role:
-            user_role = UserRole(user_id=user_id, role_id=role.id)
-            db_session.add(user_role)
+    Role names are resolved through the role catalog and compared with the
+    current assignments (one query), so only roles that were added or
+    removed are written. Unknown role names are ignored.
     
+    Args:
+        db_session: Database session
+        user_id: User ID
+        role_names: Every role the user should hold
+        commit: Commit (and invalidate the user's cached principal) here;
+            pass False to leave both to a caller writing more in the same
+            transaction
+        
+    Returns:
+        Dictionary with the added and removed role names
+    """
+    # Current roles first: an id the catalog does not know reloads it before names are resolved
+    current_ids = [role_id for (role_id,) in db_session.query(UserRole.role_id).filter(UserRole.user_id == user_id)]
+    current = {name: role_id for role_id, name in role_names_by_id(db_session, current_ids).items()}
+    wanted = resolve_role_names(db_session, role_names)
+    
+    removed = [name for name in current if name not in wanted]
+    added = [name for name in wanted if name not in current]
+    
+    if removed:
+        db_session.query(UserRole).filter(
+            UserRole.user_id == user_id,
+            UserRole.role_id.in_([current[name] for name in removed])
+        ).delete(synchronize_session=False)
+    
+    if added:
+        db_session.add_all([UserRole(user_id=user_id, role_id=wanted[name]) for name in added])
+    
+    if added or removed:
+        bump_token_versions(db_session, [user_id])
+    
+    if commit:
+        db_session.commit()
+        if added or removed:
+            # Receipt creator codes and request principals are derived from roles
+            invalidate_user_caches(user_id)
+    
+    return {"added": added, "removed": removed}
+
+
+def assign_role_to_users(db_session: Session, role_name: str, user_ids: List[int]) -> Dict[str, Any]:
+    """
+    Give one role to many users in a single transaction
+    
+    Which users exist and which already hold the role is read in one query;
+    the missing assignments are inserted together.
+    
+    Args:
+        db_session: Database session
+        role_name: Role to assign
+        user_ids: Users to receive it
+        
+    Returns:
+        Dictionary with the role and the user IDs assigned, already holding
+        the role, and not found
+    """
+    role_id = resolve_role_names(db_session, [role_name]).get(role_name)
+    if role_id is None:
+        raise HTTPException(status_code=404, detail=f"Role '{role_name}' not found")
+    
+    requested_ids = set(user_ids)
+    rows = db_session.query(User.id, UserRole.id).outerjoin(
+        UserRole, and_(UserRole.user_id == User.id, UserRole.role_id == role_id)
+    ).filter(User.id.in_(requested_ids)).all()
+    
+    found_ids = {user_id for user_id, _ in rows}
+    already_assigned = sorted({user_id for user_id, user_role_id in rows if user_role_id is not None})
+    assigned = sorted(found_ids.difference(already_assigned))
+    
+    if assigned:
+        db_session.add_all([UserRole(user_id=user_id, role_id=role_id) for user_id in assigned])
+        bump_token_versions(db_session, assigned)
     db_session.commit()
+    
+    for user_id in assigned:
+        invalidate_user_caches(user_id)
+    
+    return {
+        "role": role_name,
+        "assigned": assigned,
+        "already_assigned": already_assigned,
+        "not_found": sorted(requested_ids - found_ids)
+    }
 
 
-def create_refresh_token_record(db_session: Session, user_id: int) -> str:
-    """Create and store refresh token"""
+def create_refresh_token_record(db_session: Session, user_id: int, commit: bool = True) -> str:
+    """Create a refresh token for a user; only its hash is stored"""
     token = create_refresh_token()
     expires_at = datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
     
     refresh_token = RefreshToken(
-        token=token,
+        token_hash=hash_refresh_token(token),
         user_id=user_id,
         expires_at=expires_at
     )
     
     db_session.add(refresh_token)
-    db_session.commit()
+    if commit:
+        db_session.commit()
     
     return token
 
 
 def verify_refresh_token(db_session: Session, token: str) -> Optional[User]:
-    """Verify refresh token and return user"""
-    refresh_token = db_session.query(RefreshToken).filter(
+    """Verify refresh token and return its user (one query joining users)"""
+    return db_session.query(User).join(
+        RefreshToken, RefreshToken.user_id == User.id
+    ).filter(
         and_(
-            RefreshToken.token == token,
+            RefreshToken.token_hash == hash_refresh_token(token),
             RefreshToken.expires_at > datetime.utcnow(),
             RefreshToken.is_revoked == False
         )
     ).first()
+
+
+def rotate_refresh_token(db_session: Session, token: str, user_id: int) -> Optional[str]:
+    """
+    Revoke a verified refresh token and issue its replacement in one transaction
+    
+    Each refresh token can be used once. The revoke only matches a token that
+    is still live, so of two concurrent refreshes with the same token only
+    one gets a replacement.
+    
+    Args:
+        db_session: Database session
+        token: Refresh token presented by the client (already verified)
+        user_id: Its user
+        
+    Returns:
+        New refresh token, or None if the token was used in the meantime
+    """
+    revoked = db_session.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token),
+        RefreshToken.is_revoked == False
+    ).update({RefreshToken.is_revoked: True}, synchronize_session=False)
     
-    if not refresh_token:
+    if not revoked:
+        db_session.rollback()
         return None
     
-    return refresh_token.user
+    new_token = create_refresh_token_record(db_session, user_id, commit=False)
+    db_session.commit()
+    return new_token
 
 
 def revoke_refresh_token(db_session: Session, token: str):
     """Revoke refresh token"""
-    refresh_token = db_session.query(RefreshToken).filter(
-        RefreshToken.token == token
-    ).first()
+    db_session.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    ).update({RefreshToken.is_revoked: True}, synchronize_session=False)
+    db_session.commit()
+
+
+def purge_refresh_tokens(db_session: Session, batch_size: int = 1000) -> int:
+    """
+    Delete expired and revoked refresh tokens
+    
+    Rows are deleted batch_size at a time, each batch in its own short
+    transaction, so a large backlog never holds many row locks at once.
     
-    if refresh_token:
-        refresh_token.is_revoked = True
+    Args:
+        db_session: Database session
+        batch_size: Rows deleted per transaction
+        
+    Returns:
+        Number of tokens deleted
+    """
+    now = datetime.utcnow()
+    stale_ids = select(RefreshToken.id).where(
+        or_(RefreshToken.is_revoked == True, RefreshToken.expires_at <= now)
+    ).limit(batch_size)
+    
+    purged = 0
+    while True:
+        deleted = db_session.query(RefreshToken).filter(
+            RefreshToken.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
         db_session.commit()
+        purged += deleted
+        if deleted < batch_size:
+            return purged
 
 
 def update_user(db_session: Session, user_id: int, user_data: UserUpdate) -> User:
@@ -151,13 +370,17 @@ def update_user(db_session: Session, user_id: int, user_data: UserUpdate) -> Use
     if user_data.password:
         user.hashed_password = get_password_hash(user_data.password)
     
-    # Update roles
+    # Update roles (committed with the other changes)
     if user_data.roles is not None:
-        assign_user_roles(db_session, user_id, user_data.roles)
+        assign_user_roles(db_session, user_id, user_data.roles, commit=False)
     
+    bump_token_versions(db_session, [user_id])
     db_session.commit()
     db_session.refresh(user)
     
+    # Receipt creator codes and request principals depend on roles and is_superuser/is_active
+    invalidate_user_caches(user_id)
+    
     return user
 
 
@@ -176,6 +399,9 @@ def create_role(db_session: Session, name: str, description: str = None) -> Role
     db_session.commit()
     db_session.refresh(role)
     
+    # Name/id lookups are served from the role catalog
+    invalidate_role_catalog()
+    
     return role
 
 
@@ -0,0 +1,116 @@
+"""
+Dashboard Manager
+Widgets shown on the home view, computed together and cached per role
+
+Which widgets a caller gets, and what they contain, depends only on their
+roles - except receipt figures for receipt creators, which cover their own
+receipts. The computed widgets are cached under that key for a short TTL,
+so a burst of users opening the app costs one set of queries per role.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from login.permissions import Permission
+from login.principal import Principal
+from utils.fanout import fan_out
+
+
+DASHBOARD_CACHE_TTL_SECONDS = 30
+DASHBOARD_CACHE_MAX_ENTRIES = 256
+
+_dashboard_cache: "OrderedDict[tuple, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_dashboard_cache_lock = threading.Lock()
+
+
+def dashboard_cache_key(principal: Principal) -> tuple:
+    """Key under which a principal's widgets are cached"""
+    from manager.receipts import sees_own_receipts_only
+
+    own_receipts_only = sees_own_receipts_only(principal)
+    return (
+        tuple(sorted(principal.roles)),
+        principal.is_superuser,
+        principal.id if own_receipts_only else None,
+    )
+
+
+def get_cached_dashboard(key: tuple) -> Optional[Dict[str, Any]]:
+    """Return cached widgets for key if they are still fresh"""
+    with _dashboard_cache_lock:
+        cached = _dashboard_cache.get(key)
+        if cached is None:
+            return None
+        widgets, stored_at = cached
+        if time.monotonic() - stored_at > DASHBOARD_CACHE_TTL_SECONDS:
+            del _dashboard_cache[key]
+            return None
+        return widgets
+
+
+def store_dashboard(key: tuple, widgets: Dict[str, Any]):
+    """Remember widgets for key (bounded, least recently stored evicted first)"""
+    with _dashboard_cache_lock:
+        _dashboard_cache[key] = (widgets, time.monotonic())
+        _dashboard_cache.move_to_end(key)
+        while len(_dashboard_cache) > DASHBOARD_CACHE_MAX_ENTRIES:
+            _dashboard_cache.popitem(last=False)
+
+
+def clear_dashboard_cache():
+    """Forget every cached dashboard"""
+    with _dashboard_cache_lock:
+        _dashboard_cache.clear()
+
+
+def dashboard_widget_readers(principal: Principal) -> Dict[str, Any]:
+    """Functions of a session computing each widget the principal may see"""
+    from manager import user_data as user_data_manager
+    from manager import receipts as receipts_manager
+    from controller.receipts import get_receipt_creators_controller
+
+    readers = {}
+
+    if principal.can(Permission.READ_USER_DATA):
+        readers["user_data_stats"] = user_data_manager.get_user_data_stats
+
+    if principal.can(Permission.READ_RECEIPTS) or principal.can(Permission.CREATE_RECEIPTS):
+        readers["receipt_stats"] = lambda session: receipts_manager.get_receipt_stats(session, principal)
+
+    if principal.can(Permission.READ_RECEIPTS):
+        readers["receipt_creators"] = lambda session: get_receipt_creators_controller(
+            session, principal
+        )["data"]
+
+    return readers
+
+
+def get_dashboard_widgets(db_session: Session, principal: Principal) -> Tuple[Dict[str, Any], bool]:
+    """
+    Get every dashboard widget the principal may see
+
+    Widgets are read concurrently (see utils.fanout) and cached for
+    DASHBOARD_CACHE_TTL_SECONDS under dashboard_cache_key().
+
+    Args:
+        db_session: Database session
+        principal: Current user
+
+    Returns:
+        (widgets keyed by name, whether they came from the cache)
+    """
+    key = dashboard_cache_key(principal)
+    cached = get_cached_dashboard(key)
+    if cached is not None:
+        return cached, True
+
+    readers = dashboard_widget_readers(principal)
+    results = fan_out(db_session, *readers.values())
+    widgets = dict(zip(readers.keys(), results))
+
+    store_dashboard(key, widgets)
+    return widgets, False
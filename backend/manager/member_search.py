@@ -0,0 +1,213 @@
+"""
+Member Search Manager
+Ranked prefix search over member names, surname, village and mobile numbers
+
+Every user_data row carries a precomputed search_text: the lower-cased words
+of the member's names and village plus the digits of both mobile numbers
+(with and without a country code). On PostgreSQL the search is a full-text
+prefix query served by the GIN index created in migrations.py; other databases
+match the same column with LIKE. Whole-word hits rank above prefix hits.
+"""
+
+import re
+from typing import Optional, List, Tuple, Iterable
+
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import or_, desc, func, case, literal, literal_column, update
+from fastapi import HTTPException, status
+
+from models.user_data import User_data
+from models.village_area import Village
+from manager.user_data import apply_user_data_filters
+
+
+_WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+_NON_DIGIT_PATTERN = re.compile(r"\D")
+# A query made only of digits and phone punctuation is one phone number
+_PHONE_QUERY_PATTERN = re.compile(r"^[\d\s+\-().]+$")
+
+# Local mobile numbers are ten digits; longer values carry a country/trunk prefix
+LOCAL_PHONE_DIGITS = 10
+
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def phone_tokens(value: Optional[str]) -> List[str]:
+    """Digits of a phone number, plus its local part when it has a prefix"""
+    digits = _NON_DIGIT_PATTERN.sub("", value or "")
+    if not digits:
+        return []
+    tokens = [digits]
+    if len(digits) > LOCAL_PHONE_DIGITS:
+        tokens.append(digits[-LOCAL_PHONE_DIGITS:])
+    return tokens
+
+
+def build_member_search_text(
+    name: Optional[str] = None,
+    surname: Optional[str] = None,
+    father_or_husband_name: Optional[str] = None,
+    mother_name: Optional[str] = None,
+    village: Optional[str] = None,
+    mobile_no1: Optional[str] = None,
+    mobile_no2: Optional[str] = None
+) -> str:
+    """
+    Normalize the searchable fields of a member into one space separated string
+
+    Returns:
+        Distinct lower-cased words and phone digit strings, in field order
+    """
+    tokens = []
+    for value in (name, surname, father_or_husband_name, mother_name, village):
+        tokens.extend(_WORD_PATTERN.findall((value or "").lower()))
+    for value in (mobile_no1, mobile_no2):
+        tokens.extend(phone_tokens(value))
+    return " ".join(dict.fromkeys(tokens))
+
+
+def refresh_member_search_text(db_session: Session, user_data: User_data):
+    """Recompute search_text and village_name on a pending or loaded member before it is flushed"""
+    village = None
+    if user_data.fk_village_id:
+        village = db_session.query(Village.village).filter(
+            Village.village_id == user_data.fk_village_id
+        ).scalar()
+
+    user_data.village_name = village
+    user_data.search_text = build_member_search_text(
+        user_data.name, user_data.surname, user_data.father_or_husband_name,
+        user_data.mother_name, village, user_data.mobile_no1, user_data.mobile_no2
+    )
+
+
+def backfill_member_search_text(db_session: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Fill search_text for members that do not have it yet
+
+    Args:
+        db_session: Database session
+        batch_size: Rows updated per statement and commit
+
+    Returns:
+        Number of members updated
+    """
+    updated = 0
+    while True:
+        rows = db_session.query(
+            User_data.user_id, User_data.name, User_data.surname,
+            User_data.father_or_husband_name, User_data.mother_name,
+            Village.village, User_data.mobile_no1, User_data.mobile_no2
+        ).outerjoin(Village, User_data.fk_village_id == Village.village_id)\
+         .filter(User_data.search_text.is_(None))\
+         .order_by(User_data.user_id)\
+         .limit(batch_size).all()
+
+        if not rows:
+            return updated
+
+        db_session.execute(update(User_data), [
+            {"user_id": user_id, "search_text": build_member_search_text(*fields)}
+            for user_id, *fields in rows
+        ])
+        db_session.commit()
+        updated += len(rows)
+
+
+def query_tokens(term: str) -> List[str]:
+    """Split a search term into normalized tokens (a phone number stays whole)"""
+    if _PHONE_QUERY_PATTERN.match(term):
+        return phone_tokens(term)[-1:]
+    return list(dict.fromkeys(_WORD_PATTERN.findall(term.lower())))
+
+
+def token_score(tokens: Iterable[str], search_text: str) -> float:
+    """Rank a search_text: whole-word hits count twice as much as prefix hits"""
+    words = (search_text or "").split()
+    score = 0.0
+    for token in tokens:
+        if token in words:
+            score += 1.0
+        elif any(word.startswith(token) for word in words):
+            score += 0.5
+    return score
+
+
+def search_members(
+    db_session: Session,
+    term: str,
+    limit: int = 20,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None
+) -> List[Tuple[User_data, float]]:
+    """
+    Search live members whose words or mobile numbers start with every token of term
+
+    Args:
+        db_session: Database session
+        term: Search text (names, village, or the leading digits of a mobile)
+        limit: Maximum number of hits
+        type_filter: Optional member type filter
+        area_ids: Optional area filter
+        village_ids: Optional village filter
+
+    Returns:
+        List of (User_data, score) pairs, best match first
+    """
+    tokens = query_tokens(term.strip())
+    if not tokens:
+        return []
+
+    try:
+        base_query = apply_user_data_filters(
+            db_session.query(User_data), None, type_filter, area_ids, village_ids
+        ).filter(User_data.delete_flag == False)
+
+        if db_session.get_bind().dialect.name == "postgresql":
+            # Tokens only hold word characters, so they are safe tsquery operands
+            document = func.to_tsvector(SEARCH_CONFIG, User_data.search_text)
+            prefix_query = func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{token}:*" for token in tokens))
+            # Same weights as token_score(); strpos is far cheaper per row than
+            # ts_rank(), which would rebuild the tsvector of every match
+            padded_text = literal(" ") + User_data.search_text + literal(" ")
+            score = sum(
+                case((func.strpos(padded_text, f" {token} ") > 0, 1.0), else_=0.5)
+                for token in tokens
+            ).label("score")
+
+            rows = base_query.add_columns(score)\
+                .options(joinedload(User_data.area), joinedload(User_data.village))\
+                .filter(document.op("@@")(prefix_query))\
+                .order_by(desc("score"), User_data.name, User_data.user_id)\
+                .limit(limit).all()
+            return [(member, float(row_score)) for member, row_score in rows]
+
+        conditions = [
+            or_(User_data.search_text.like(f"{token}%"), User_data.search_text.like(f"% {token}%"))
+            for token in tokens
+        ]
+        candidates = base_query.with_entities(User_data.user_id, User_data.name, User_data.search_text)\
+            .filter(*conditions).all()
+        if not candidates:
+            return []
+
+        scores = {user_id: token_score(tokens, search_text) for user_id, _, search_text in candidates}
+        candidates.sort(key=lambda row: (-scores[row.user_id], row.name or "", row.user_id))
+        best_ids = [row.user_id for row in candidates[:limit]]
+
+        members = db_session.query(User_data)\
+            .options(joinedload(User_data.area), joinedload(User_data.village))\
+            .filter(User_data.user_id.in_(best_ids)).all()
+        members.sort(key=lambda member: (-scores[member.user_id], member.name or "", member.user_id))
+        return [(member, scores[member.user_id]) for member in members]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search members: {str(e)}"
+        )
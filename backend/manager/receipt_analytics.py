@@ -0,0 +1,156 @@
+"""
+Receipt Analytics Manager
+Receipt counts and amounts bucketed over time for charts
+
+On PostgreSQL the bucketing and aggregation run in SQL with date_trunc().
+Other databases (SQLite in development) fetch only the date, amount and
+status columns and bucket them with NumPy. Both return the same columnar
+arrays: one entry per non-empty bucket, oldest first.
+"""
+
+from decimal import Decimal
+from typing import Optional, List, Dict, Any
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, literal_column, Integer
+from fastapi import HTTPException, status
+
+from models.receipts import Receipt
+from api_request_response.receipts import ReceiptFilter
+from manager.receipts import apply_receipt_filters
+from login.principal import Principal
+
+
+# day, week (ISO, starting Monday), month, or Indian financial year (April-March)
+TIMESERIES_BUCKETS = ("day", "week", "month", "fy")
+
+# Months between January and the start of the Indian financial year
+FY_START_OFFSET_MONTHS = 3
+
+
+def _bucket_expression(bucket: str):
+    """SQL expression for the start of the bucket containing receipt_date (PostgreSQL)"""
+    if bucket == "fy":
+        offset = literal_column(f"interval '{FY_START_OFFSET_MONTHS} months'")
+        return func.date_trunc("year", Receipt.receipt_date - offset) + offset
+    return func.date_trunc(bucket, Receipt.receipt_date)
+
+
+def _numpy_bucket_starts(dates: np.ndarray, bucket: str) -> np.ndarray:
+    """Start day of the bucket containing each datetime64[D] value"""
+    if bucket == "day":
+        return dates
+    if bucket == "week":
+        # 1970-01-01 was a Thursday; shift so Monday is day 0 of the week
+        weekday = (dates.astype(np.int64) + 3) % 7
+        return dates - weekday.astype("timedelta64[D]")
+    months = dates.astype("datetime64[M]")
+    if bucket == "month":
+        return months.astype("datetime64[D]")
+    offset = np.timedelta64(FY_START_OFFSET_MONTHS, "M")
+    fy_start = (months - offset).astype("datetime64[Y]").astype("datetime64[M]") + offset
+    return fy_start.astype("datetime64[D]")
+
+
+def _sql_timeseries(query, bucket: str) -> Dict[str, List]:
+    """Aggregate with date_trunc in the database"""
+    completed = Receipt.status == 'completed'
+    bucket_start = _bucket_expression(bucket).label("bucket_start")
+
+    rows = query.with_entities(
+        bucket_start,
+        func.count(),
+        func.coalesce(func.sum(Receipt.total_amount), 0),
+        func.count().filter(completed),
+        func.coalesce(func.sum(Receipt.total_amount).filter(completed), 0),
+    ).group_by(bucket_start).order_by(bucket_start).all()
+
+    columns = list(zip(*rows)) if rows else [(), (), (), (), ()]
+    return {
+        "bucket_start": [value.date().isoformat() for value in columns[0]],
+        "receipt_count": list(columns[1]),
+        "total_amount": list(columns[2]),
+        "completed_count": list(columns[3]),
+        "completed_amount": list(columns[4]),
+    }
+
+
+def _numpy_timeseries(query, bucket: str) -> Dict[str, List]:
+    """Aggregate date, amount and status columns with NumPy"""
+    rows = query.with_entities(
+        Receipt.receipt_date,
+        # Whole paise keep the sums exact as int64
+        cast(func.round(Receipt.total_amount * 100), Integer),
+        Receipt.status,
+    ).all()
+
+    if not rows:
+        return {name: [] for name in
+                ("bucket_start", "receipt_count", "total_amount", "completed_count", "completed_amount")}
+
+    receipt_dates, paise, statuses = zip(*rows)
+    dates = np.array(receipt_dates, dtype="datetime64[D]")
+    paise = np.array(paise, dtype=np.int64)
+    completed = np.array(statuses, dtype=object) == 'completed'
+
+    starts, bucket_index = np.unique(_numpy_bucket_starts(dates, bucket), return_inverse=True)
+    size = len(starts)
+
+    def paise_sum(weights: np.ndarray) -> List[Decimal]:
+        sums = np.zeros(size, dtype=np.int64)
+        np.add.at(sums, bucket_index, weights)
+        return [Decimal(int(value)).scaleb(-2) for value in sums]
+
+    return {
+        "bucket_start": [str(value) for value in starts],
+        "receipt_count": np.bincount(bucket_index, minlength=size).tolist(),
+        "total_amount": paise_sum(paise),
+        "completed_count": np.bincount(bucket_index, weights=completed, minlength=size).astype(np.int64).tolist(),
+        "completed_amount": paise_sum(np.where(completed, paise, 0)),
+    }
+
+
+def get_receipt_timeseries(
+    db_session: Session,
+    bucket: str = "month",
+    filters: Optional[ReceiptFilter] = None,
+    principal: Optional[Principal] = None
+) -> Dict[str, Any]:
+    """
+    Get receipt counts and amounts per time bucket
+
+    Args:
+        db_session: Database session
+        bucket: One of TIMESERIES_BUCKETS
+        filters: Optional listing filters
+        principal: Current user (for permission filtering)
+
+    Returns:
+        Dictionary with the bucket size and columnar arrays keyed by
+        bucket_start (ISO date), receipt_count, total_amount,
+        completed_count and completed_amount
+    """
+    if bucket not in TIMESERIES_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"bucket must be one of: {', '.join(TIMESERIES_BUCKETS)}"
+        )
+
+    try:
+        query = apply_receipt_filters(db_session.query(Receipt), filters, principal)
+
+        if db_session.get_bind().dialect.name == "postgresql":
+            series = _sql_timeseries(query, bucket)
+        else:
+            series = _numpy_timeseries(query, bucket)
+
+        return {"bucket": bucket, **series}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch receipt timeseries: {str(e)}"
+        )
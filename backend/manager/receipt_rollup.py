@@ -0,0 +1,169 @@
+"""
+Receipt Rollup Manager
+Maintains receipt_daily_rollup: receipt counts and amounts per day, creator,
+payment mode and purpose
+
+Receipt writes record their change in the rollup inside the same transaction,
+so reports can aggregate a few hundred rollup rows instead of every receipt.
+rebuild_receipt_daily_rollup recomputes the table from receipts for backfill.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import Optional, Dict, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, insert, update, delete, select, Date
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.receipts import Receipt, ReceiptDailyRollup
+
+
+ROLLUP_KEY_COLUMNS = ("rollup_date", "created_by", "payment_mode", "purpose")
+ROLLUP_MEASURES = (
+    "receipt_count", "total_amount",
+    "completed_count", "completed_amount",
+    "cancelled_count", "cancelled_amount",
+)
+
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+RollupEntry = Tuple[tuple, Dict[str, object]]
+
+
+def receipt_rollup_entry(receipt: Receipt) -> RollupEntry:
+    """Rollup key and measures one receipt contributes"""
+    receipt_date = receipt.receipt_date
+    key = (
+        receipt_date.date() if hasattr(receipt_date, "date") else receipt_date,
+        int(receipt.created_by),
+        receipt.payment_mode,
+        receipt.donation1_purpose or "",
+    )
+    amount = Decimal(str(receipt.total_amount or 0))
+    completed = receipt.status == "completed"
+    cancelled = receipt.status == "cancelled"
+    measures = {
+        "receipt_count": 1,
+        "total_amount": amount,
+        "completed_count": int(completed),
+        "completed_amount": amount if completed else Decimal("0"),
+        "cancelled_count": int(cancelled),
+        "cancelled_amount": amount if cancelled else Decimal("0"),
+    }
+    return key, measures
+
+
+def _apply_rollup_delta(db_session: Session, key: tuple, delta: Dict[str, object]):
+    """Add delta to the rollup row for key, creating the row if needed"""
+    table = ReceiptDailyRollup.__table__
+    dialect_insert = _UPSERT_INSERTS.get(db_session.get_bind().dialect.name)
+
+    if dialect_insert is not None:
+        statement = dialect_insert(table).values(**dict(zip(ROLLUP_KEY_COLUMNS, key)), **delta)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[column] for column in ROLLUP_KEY_COLUMNS],
+            set_={measure: table.c[measure] + statement.excluded[measure] for measure in delta}
+        )
+        db_session.execute(statement)
+        return
+
+    result = db_session.execute(
+        update(table)
+        .where(*[table.c[column] == value for column, value in zip(ROLLUP_KEY_COLUMNS, key)])
+        .values({measure: table.c[measure] + value for measure, value in delta.items()})
+    )
+    if result.rowcount == 0:
+        db_session.execute(insert(table).values(**dict(zip(ROLLUP_KEY_COLUMNS, key)), **delta))
+
+
+def record_receipt_rollup(
+    db_session: Session,
+    before: Optional[RollupEntry],
+    after: Optional[RollupEntry]
+):
+    """
+    Move a receipt's contribution in the rollup from before to after
+
+    Runs in the caller's transaction; the caller commits or rolls back both
+    the receipt change and the rollup change together.
+
+    Args:
+        db_session: Database session
+        before: receipt_rollup_entry() of the receipt before the change (None on create)
+        after: receipt_rollup_entry() of the receipt after the change
+    """
+    deltas: Dict[tuple, Dict[str, object]] = defaultdict(lambda: {measure: 0 for measure in ROLLUP_MEASURES})
+    for entry, sign in ((before, -1), (after, 1)):
+        if entry is None:
+            continue
+        key, measures = entry
+        for measure, value in measures.items():
+            deltas[key][measure] += sign * value
+
+    for key, delta in deltas.items():
+        if any(delta.values()):
+            _apply_rollup_delta(db_session, key, delta)
+
+
+def rollup_date_expression(db_session: Session):
+    """SQL expression for the calendar day of receipt_date"""
+    if db_session.get_bind().dialect.name == "sqlite":
+        # CAST(... AS DATE) has numeric affinity in SQLite
+        return func.date(Receipt.receipt_date, type_=Date)
+    return cast(Receipt.receipt_date, Date)
+
+
+def rebuild_receipt_daily_rollup(db_session: Session) -> int:
+    """
+    Recompute receipt_daily_rollup from the receipts table
+
+    Args:
+        db_session: Database session
+
+    Returns:
+        Number of rollup rows written
+    """
+    completed = Receipt.status == "completed"
+    cancelled = Receipt.status == "cancelled"
+    rollup_date = rollup_date_expression(db_session)
+    purpose = func.coalesce(Receipt.donation1_purpose, "")
+
+    aggregate = select(
+        rollup_date, Receipt.created_by, Receipt.payment_mode, purpose,
+        func.count(),
+        func.sum(Receipt.total_amount),
+        func.count().filter(completed),
+        func.coalesce(func.sum(Receipt.total_amount).filter(completed), 0),
+        func.count().filter(cancelled),
+        func.coalesce(func.sum(Receipt.total_amount).filter(cancelled), 0),
+    ).group_by(rollup_date, Receipt.created_by, Receipt.payment_mode, purpose)
+
+    try:
+        db_session.execute(delete(ReceiptDailyRollup))
+        db_session.execute(
+            insert(ReceiptDailyRollup).from_select(
+                [*ROLLUP_KEY_COLUMNS, *ROLLUP_MEASURES], aggregate
+            )
+        )
+        rows = db_session.query(func.count()).select_from(ReceiptDailyRollup).scalar()
+        db_session.commit()
+        return rows
+    except Exception:
+        db_session.rollback()
+        raise
+
+
+def ensure_receipt_daily_rollup(db_session: Session) -> int:
+    """
+    Build the rollup if it is empty while receipts exist (first start after upgrade)
+
+    Returns:
+        Number of rollup rows written (0 when nothing had to be done)
+    """
+    has_rollup = db_session.query(ReceiptDailyRollup.rollup_date).first() is not None
+    has_receipts = db_session.query(Receipt.id).first() is not None
+    if has_rollup or not has_receipts:
+        return 0
+    return rebuild_receipt_daily_rollup(db_session)
@@ -0,0 +1,183 @@
+"""
+Receipt Search Manager
+Ranked substring search over donor name, receipt number, village and residence
+
+On PostgreSQL with pg_trgm the search runs in SQL: ILIKE '%term%' is served by
+the trigram GIN indexes created in migrations.py, and hits are ranked by
+similarity(). Without pg_trgm (e.g. SQLite in development) an in-process
+trigram index over the same columns gives the same results.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Tuple, Set
+
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, desc, func, text
+from fastapi import HTTPException, status
+
+from models.receipts import Receipt
+from api_request_response.receipts import ReceiptFilter
+from manager.receipts import apply_receipt_filters
+from login.principal import Principal
+
+
+SEARCH_COLUMNS = (Receipt.donor_name, Receipt.receipt_no, Receipt.village, Receipt.residence)
+
+_WORD_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+_trigram_support: Dict[str, bool] = {}
+
+
+def word_trigrams(value: str) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm (two spaces before, one after)"""
+    grams = set()
+    for word in _WORD_PATTERN.findall((value or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def substring_trigrams(term: str) -> Set[str]:
+    """Unpadded trigrams every field containing term must also contain"""
+    grams = set()
+    for word in _WORD_PATTERN.findall(term.lower()):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def trigram_similarity(left: Set[str], right: Set[str]) -> float:
+    """Share of trigrams in common, as pg_trgm similarity()"""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class ReceiptNgramIndex:
+    """In-process trigram index over the receipt search columns"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.documents: Dict[int, Tuple[str, ...]] = {}
+        self.signature: Optional[tuple] = None
+        self.lock = threading.Lock()
+
+    def rebuild(self, rows, signature: tuple):
+        """Replace the index contents with (id, *search column values) rows"""
+        postings: Dict[str, Set[int]] = defaultdict(set)
+        documents: Dict[int, Tuple[str, ...]] = {}
+        for receipt_id, *values in rows:
+            fields = tuple((value or "").lower() for value in values)
+            documents[receipt_id] = fields
+            for field in fields:
+                for gram in word_trigrams(field):
+                    postings[gram].add(receipt_id)
+        self.postings, self.documents, self.signature = postings, documents, signature
+
+    def search(self, term: str) -> Dict[int, float]:
+        """Return {receipt_id: score} for receipts with a field containing term"""
+        needle = term.lower()
+        grams = substring_trigrams(needle)
+
+        if grams:
+            candidates = set.intersection(*(self.postings.get(gram, set()) for gram in grams))
+        else:
+            # Terms shorter than three characters have no trigram to look up
+            candidates = self.documents.keys()
+
+        term_grams = word_trigrams(needle)
+        hits = {}
+        for receipt_id in candidates:
+            fields = self.documents[receipt_id]
+            if any(needle in field for field in fields):
+                hits[receipt_id] = max(trigram_similarity(term_grams, word_trigrams(field)) for field in fields)
+        return hits
+
+
+_ngram_index = ReceiptNgramIndex()
+
+
+def has_trigram_support(db_session: Session) -> bool:
+    """Check once per database URL whether pg_trgm is installed"""
+    bind = db_session.get_bind()
+    key = str(bind.url)
+    if key not in _trigram_support:
+        supported = False
+        if bind.dialect.name == "postgresql":
+            supported = db_session.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first() is not None
+        _trigram_support[key] = supported
+    return _trigram_support[key]
+
+
+def get_ngram_index(db_session: Session) -> ReceiptNgramIndex:
+    """Return the in-process index, rebuilt if receipts changed since it was built"""
+    signature = tuple(db_session.query(
+        func.count(Receipt.id), func.max(Receipt.id), func.max(Receipt.updated_at)
+    ).one())
+
+    with _ngram_index.lock:
+        if _ngram_index.signature != signature:
+            rows = db_session.query(Receipt.id, *SEARCH_COLUMNS).yield_per(1000)
+            _ngram_index.rebuild(rows, signature)
+    return _ngram_index
+
+
+def search_receipts(
+    db_session: Session,
+    term: str,
+    limit: int = 20,
+    filters: Optional[ReceiptFilter] = None,
+    principal: Optional[Principal] = None
+) -> List[Tuple[Receipt, float]]:
+    """
+    Search receipts whose donor name, receipt number, village or residence contains term
+
+    Args:
+        db_session: Database session
+        term: Search text
+        limit: Maximum number of hits
+        filters: Optional listing filters applied on top of the search
+        principal: Current user (for permission filtering)
+
+    Returns:
+        List of (Receipt, score) pairs, best match first
+    """
+    term = term.strip()
+    if not term:
+        return []
+
+    try:
+        if has_trigram_support(db_session):
+            pattern = f"%{term}%"
+            score = func.greatest(*[
+                func.similarity(func.coalesce(column, ""), term) for column in SEARCH_COLUMNS
+            ]).label("score")
+
+            query = apply_receipt_filters(db_session.query(Receipt, score), filters, principal)
+            query = query.filter(or_(
+                *[column.ilike(pattern) for column in SEARCH_COLUMNS],
+                # Typo-tolerant donor match, served by the same trigram index
+                Receipt.donor_name.op("%")(term)
+            ))
+            rows = query.order_by(desc("score"), desc(Receipt.receipt_date)).limit(limit).all()
+            return [(receipt, float(row_score)) for receipt, row_score in rows]
+
+        hits = get_ngram_index(db_session).search(term)
+        if not hits:
+            return []
+
+        query = apply_receipt_filters(db_session.query(Receipt), filters, principal)
+        receipts = query.filter(Receipt.id.in_(list(hits))).all()
+        receipts.sort(key=lambda receipt: (hits[receipt.id], receipt.receipt_date), reverse=True)
+        return [(receipt, hits[receipt.id]) for receipt in receipts[:limit]]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search receipts: {str(e)}"
+        )
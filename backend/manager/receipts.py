@@ -3,29 +3,59 @@ Receipts Manager
 Handles database operations for receipts
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from sqlalchemy.orm import Session, Query
-from sqlalchemy import and_, or_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, func, cast, literal, select, insert, tuple_, true, String, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
 from datetime import datetime
-import time
-from io import BytesIO, StringIO
+import re
+from io import BytesIO
 
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-import pandas as pd
 
-from models.receipts import Receipt
+from database import SessionLocal
+from models.receipts import Receipt, ReceiptSequence, ReceiptDailyRollup
 from api_request_response.receipts import ReceiptCreate, ReceiptUpdate, ReceiptFilter
+from utils.helpers import iter_csv_chunks, encode_cursor, decode_cursor
+from utils.pagination import fetch_page_with_total, fetch_page_with_total_async
+from login.permissions import Permission
+from login.principal import Principal
+from manager.receipt_rollup import receipt_rollup_entry, record_receipt_rollup, ROLLUP_MEASURES
+
+# Rows fetched per round trip while streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+# Receipt columns returned by the API (ReceiptResponse); listings select these
+# as plain rows instead of loading Receipt objects
+RECEIPT_RESPONSE_COLUMNS = (
+    Receipt.id, Receipt.receipt_no, Receipt.receipt_date, Receipt.donor_name,
+    Receipt.village, Receipt.residence, Receipt.mobile, Receipt.relation_address,
+    Receipt.payment_mode, Receipt.payment_details, Receipt.donation1_purpose,
+    Receipt.donation1_amount, Receipt.donation2_amount, Receipt.total_amount,
+    Receipt.total_amount_words, Receipt.status, Receipt.created_by,
+    Receipt.created_at, Receipt.updated_at,
+)
+
+
+# Creator codes only change when a user's roles change, so they are cached
+# per worker and invalidated from manager.auth on role/user updates
+_creator_code_cache: Dict[int, str] = {}
+
+# Receipt counters are upserted with the dialect's INSERT ... ON CONFLICT
+_COUNTER_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
 
 
 def get_receipt_creator_code(db_session: Session, user_id: int) -> str:
     """
-    Get receipt creator code from user info
+    Get receipt creator code from user info (cached per user)
     
     Args:
         db_session: Database session
@@ -34,33 +64,187 @@ def get_receipt_creator_code(db_session: Session, user_id: int) -> str:
     Returns:
         Creator code (e.g., 'RCA', 'RC1', 'RC2')
     """
+    cached_code = _creator_code_cache.get(user_id)
+    if cached_code:
+        return cached_code
+    
     from models.auth import User
     from manager.auth import get_user_roles
     
     # Get user info
     user = db_session.query(User).filter(User.id == user_id).first()
     if not user:
-        return f"RC{user_id}"  # fallback
+        return f"RC{user_id}"  # fallback, not cached
     
     username = user.username
     user_roles = get_user_roles(db_session, user_id)
     
     # For admin/superadmin users
     if "admin" in user_roles or user.is_superuser:
-        return "RCA"
-    
+        creator_code = "RCA"
     # For receipt creators - extract number from username  
-    if username.startswith("receipt_creator"):
+    elif username.startswith("receipt_creator"):
         creator_num = username.replace("receipt_creator", "")
-        return f"RC{creator_num}"
+        creator_code = f"RC{creator_num}"
+    else:
+        # Fallback for any other user (shouldn't happen in normal flow)
+        numbers = re.findall(r'\d+', username)
+        if numbers:
+            creator_code = f"RC{numbers[-1]}"
+        else:
+            creator_code = f"RC{user_id}"
     
-    # Fallback for any other user (shouldn't happen in normal flow)
-    import re
-    numbers = re.findall(r'\d+', username)
-    if numbers:
-        return f"RC{numbers[-1]}"
+    _creator_code_cache[user_id] = creator_code
+    return creator_code
+
+
+def invalidate_receipt_creator_code(user_id: Optional[int] = None):
+    """
+    Drop cached creator codes
+    
+    Args:
+        user_id: User whose code changed, or None to clear every entry
+    """
+    if user_id is None:
+        _creator_code_cache.clear()
     else:
-        return f"RC{user_id}"
+        _creator_code_cache.pop(user_id, None)
+
+
+def receipt_no_parts(dialect_name: str) -> tuple:
+    """
+    SQL expressions splitting receipt_no ('RC1/2025/0001') into its parts
+    
+    Returns:
+        (creator code, year, sequence, whether receipt_no has that form)
+    """
+    receipt_no = Receipt.receipt_no
+    if dialect_name == "postgresql":
+        return (
+            func.split_part(receipt_no, "/", 1),
+            cast(func.split_part(receipt_no, "/", 2), Integer),
+            cast(func.split_part(receipt_no, "/", 3), Integer),
+            receipt_no.regexp_match(r"^[^/]+/[0-9]{4}/[0-9]+$"),
+        )
+    
+    # SQLite has neither split_part nor regular expressions
+    slash = func.instr(receipt_no, "/")
+    rest = func.substr(receipt_no, slash + 1)
+    sequence = func.substr(rest, 6)
+    return (
+        func.substr(receipt_no, 1, slash - 1),
+        cast(func.substr(rest, 1, 4), Integer),
+        cast(sequence, Integer),
+        and_(
+            slash > 1,
+            rest.op("GLOB")("[0-9][0-9][0-9][0-9]/[0-9]*"),
+            sequence.op("NOT GLOB")("*[^0-9]*"),
+        ),
+    )
+
+
+def sync_receipt_sequences(db_session: Session) -> int:
+    """
+    Make sure every receipt counter is at least the highest number already issued
+    
+    One statement: the highest number per creator code and year is grouped in
+    SQL and upserted into receipt_sequences, so workers starting together
+    cannot collide on a new counter. Counters are only ever moved forward.
+    Run on startup so numbers issued before the counters existed are never
+    handed out again.
+    
+    Args:
+        db_session: Database session
+        
+    Returns:
+        Number of counters created or moved forward
+    """
+    dialect_name = db_session.get_bind().dialect.name
+    creator_code, year, sequence, well_formed = receipt_no_parts(dialect_name)
+    
+    parts = select(
+        creator_code.label("creator_code"), year.label("year"), sequence.label("last_value")
+    ).where(well_formed).subquery()
+    highest = select(
+        parts.c.creator_code, parts.c.year, func.max(parts.c.last_value)
+    ).where(true()).group_by(parts.c.creator_code, parts.c.year)  # WHERE: SQLite upsert parsing
+    
+    statement = _COUNTER_INSERTS[dialect_name](ReceiptSequence).from_select(
+        ["creator_code", "year", "last_value"], highest
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[ReceiptSequence.creator_code, ReceiptSequence.year],
+        set_={"last_value": statement.excluded.last_value},
+        where=ReceiptSequence.last_value < statement.excluded.last_value
+    )
+    changed = db_session.execute(statement).rowcount
+    
+    db_session.commit()
+    return changed
+
+
+def next_receipt_sequence(dialect_name: str, creator_code: str, year: int):
+    """Counter upsert taking the next number for creator_code and year, returning it"""
+    return (
+        _COUNTER_INSERTS[dialect_name](ReceiptSequence)
+        .values(creator_code=creator_code, year=year, last_value=1)
+        .on_conflict_do_update(
+            index_elements=[ReceiptSequence.creator_code, ReceiptSequence.year],
+            set_={"last_value": ReceiptSequence.last_value + 1}
+        )
+        .returning(ReceiptSequence.last_value)
+    )
+
+
+def insert_receipt_with_number(db_session: Session, values: Dict[str, Any], creator_code: str, year: int) -> Receipt:
+    """
+    Allocate the next receipt number and insert the receipt
+    
+    On PostgreSQL this is a single statement: the counter upsert runs in a CTE
+    and the receipt INSERT selects the formatted number from it, returning the
+    full row. The upsert row lock serialises concurrent creators sharing a code,
+    and a failed insert rolls the counter back with it, so numbers have no gaps
+    or duplicates. SQLite runs the same upsert, then the INSERT, in the same
+    transaction.
+    
+    Args:
+        db_session: Database session
+        values: Receipt column values (without receipt_no)
+        creator_code: Creator code prefix (e.g. 'RC1')
+        year: Receipt number year
+        
+    Returns:
+        Inserted Receipt object (not yet committed)
+    """
+    prefix = f"{creator_code}/{year}/"
+    dialect_name = db_session.get_bind().dialect.name
+    
+    if dialect_name == "postgresql":
+        next_value = next_receipt_sequence(dialect_name, creator_code, year).cte("next_value")
+        sequence_text = cast(next_value.c.last_value, String)
+        receipt_no = literal(prefix) + func.lpad(
+            sequence_text, func.greatest(4, func.length(sequence_text)), "0"
+        )
+        columns = Receipt.__table__.c
+        statement = (
+            insert(Receipt)
+            .from_select(
+                ["receipt_no", *values.keys()],
+                select(
+                    receipt_no,
+                    *[literal(value, type_=columns[key].type) for key, value in values.items()]
+                ).select_from(next_value)
+            )
+            .returning(Receipt)
+        )
+        return db_session.scalars(statement).one()
+    
+    sequence = db_session.execute(next_receipt_sequence(dialect_name, creator_code, year)).scalar_one()
+    
+    new_receipt = Receipt(receipt_no=f"{prefix}{sequence:04d}", **values)
+    db_session.add(new_receipt)
+    db_session.flush()
+    return new_receipt
 
 
 def create_receipt(db_session: Session, receipt_data: ReceiptCreate, user_id: int) -> Receipt:
@@ -76,45 +260,36 @@ def create_receipt(db_session: Session, receipt_data: ReceiptCreate, user_id: in
         Created Receipt object
     """
     try:
-        # Step 1: Create receipt with temporary receipt_no
-        new_receipt = Receipt(
-            receipt_no=f"TEMP_{int(time.time())}_{user_id}",  # Unique temporary value
-            receipt_date=receipt_data.receipt_date,
-            donor_name=receipt_data.donor_name,
-            village=receipt_data.village,
-            residence=receipt_data.residence,
-            mobile=receipt_data.mobile,
-            relation_address=receipt_data.relation_address,
-            payment_mode=receipt_data.payment_mode,
-            payment_details=receipt_data.payment_details,
-            donation1_purpose=receipt_data.donation1_purpose,
-            donation1_amount=receipt_data.donation1_amount or 0.00,
-            donation2_amount=receipt_data.donation2_amount or 0.00,
-            total_amount=receipt_data.total_amount,
-            total_amount_words=receipt_data.total_amount_words,
-            created_by=user_id
-        )
-        
-        # Step 2: Insert and get the auto-generated ID
-        db_session.add(new_receipt)
-        db_session.flush()  # This gets the ID without committing
-        
-        # Step 3: Generate final receipt number with creator code
-        year = datetime.now().year
         creator_code = get_receipt_creator_code(db_session, user_id)
-        # Subtract 630 from ID for receipt number (e.g., ID 1407 -> 777)
-        receipt_sequence = new_receipt.id - 630
-        # Ensure sequence is positive (fallback to ID if result would be negative)
-        if receipt_sequence <= 0:
-            receipt_sequence = new_receipt.id
-        final_receipt_no = f"{creator_code}/{year}/{receipt_sequence:04d}"
+        year = datetime.now().year
         
-        # Step 4: Update the receipt number
-        new_receipt.receipt_no = final_receipt_no
+        new_receipt = insert_receipt_with_number(
+            db_session,
+            {
+                "receipt_date": receipt_data.receipt_date,
+                "donor_name": receipt_data.donor_name,
+                "village": receipt_data.village,
+                "residence": receipt_data.residence,
+                "mobile": receipt_data.mobile,
+                "relation_address": receipt_data.relation_address,
+                "payment_mode": receipt_data.payment_mode,
+                "payment_details": receipt_data.payment_details,
+                "donation1_purpose": receipt_data.donation1_purpose,
+                "donation1_amount": receipt_data.donation1_amount or 0.00,
+                "donation2_amount": receipt_data.donation2_amount or 0.00,
+                "total_amount": receipt_data.total_amount,
+                "total_amount_words": receipt_data.total_amount_words,
+                "status": "completed",
+                "created_by": user_id
+            },
+            creator_code,
+            year
+        )
+        record_receipt_rollup(db_session, None, receipt_rollup_entry(new_receipt))
         
-        # Step 5: Commit transaction
+        # All columns came back with the INSERT; detach so commit doesn't expire them
+        db_session.expunge(new_receipt)
         db_session.commit()
-        db_session.refresh(new_receipt)
         
         return new_receipt
         
@@ -140,13 +315,93 @@ def get_receipt_by_id(db_session: Session, receipt_id: int) -> Optional[Receipt]
     return db_session.query(Receipt).filter(Receipt.id == receipt_id).first()
 
 
+def sees_own_receipts_only(principal: Optional[Principal]) -> bool:
+    """
+    Whether principal may only see the receipts it created
+    
+    Reading every receipt takes READ_RECEIPTS (admins, report viewers and
+    superusers); receipt creators without it are limited to their own.
+    No principal means an internal caller, which is not limited.
+    """
+    return principal is not None and not principal.can(Permission.READ_RECEIPTS)
+
+
+def can_filter_by_creator(principal: Optional[Principal]) -> bool:
+    """Whether principal may filter receipts by any creator"""
+    return principal is not None and principal.can(Permission.READ_RECEIPTS)
+
+
+def apply_receipt_filters(
+    query: Query,
+    filters: Optional[ReceiptFilter] = None,
+    principal: Optional[Principal] = None
+) -> Query:
+    """
+    Apply role-based and optional filters used by the receipt listing
+    
+    Args:
+        query: Query or select() statement selecting from receipts
+        filters: Optional filters to apply
+        principal: Current user (for permission filtering)
+        
+    Returns:
+        Filtered query
+    """
+    # Apply permission-based filtering
+    if sees_own_receipts_only(principal):
+        # receipt_creator can only see their own receipts
+        query = query.filter(Receipt.created_by == principal.id)
+    # admin and receipt_report_viewer can see all receipts (no additional filter)
+    
+    # Apply optional filters
+    if filters:
+        if filters.donor_name:
+            # Combined search for donor name OR receipt number
+            search_term = filters.donor_name
+            query = query.filter(
+                or_(
+                    Receipt.donor_name.ilike(f"%{search_term}%"),
+                    Receipt.receipt_no.ilike(f"%{search_term}%")
+                )
+            )
+        if filters.village:
+            # Combined search for village OR residence
+            search_term = filters.village
+            query = query.filter(
+                or_(
+                    Receipt.village.ilike(f"%{search_term}%"),
+                    Receipt.residence.ilike(f"%{search_term}%")
+                )
+            )
+        if filters.payment_mode:
+            query = query.filter(Receipt.payment_mode == filters.payment_mode)
+        if filters.donation1_purpose:
+            query = query.filter(Receipt.donation1_purpose.ilike(f"%{filters.donation1_purpose}%"))
+        if filters.status:
+            query = query.filter(Receipt.status == filters.status)
+        if filters.date_from:
+            # Convert date to datetime (start of day)
+            from datetime import time
+            start_datetime = datetime.combine(filters.date_from, time.min)
+            query = query.filter(Receipt.receipt_date >= start_datetime)
+        if filters.date_to:
+            # Convert date to datetime (end of day)
+            from datetime import time
+            end_datetime = datetime.combine(filters.date_to, time.max)
+            query = query.filter(Receipt.receipt_date <= end_datetime)
+        if filters.created_by and can_filter_by_creator(principal):
+            # Admin and receipt_report_viewer can filter by creator
+            query = query.filter(Receipt.created_by == filters.created_by)
+    
+    return query
+
+
 def get_receipts_paginated(
     db_session: Session,
     filters: Optional[ReceiptFilter] = None,
     page_num: int = 1,
     page_size: int = 10,
-    user_id: Optional[int] = None,
-    user_roles: Optional[List[str]] = None
+    principal: Optional[Principal] = None
 ) -> Dict[str, Any]:
     """
     Get receipts with pagination and filtering
@@ -156,75 +411,20 @@ def get_receipts_paginated(
         filters: Optional filters to apply
         page_num: Page number (starting from 1)
         page_size: Number of items per page
-        user_id: Current user ID (for permission filtering)
-        user_roles: Current user roles (for permission filtering)
+        principal: Current user (for permission filtering)
         
     Returns:
-        Dictionary with pagination info and receipts data
+        Dictionary with pagination info and receipts data (rows of RECEIPT_RESPONSE_COLUMNS)
     """
     try:
-        from models.auth import User
-        
         # Base query for counting and filtering
-        query = db_session.query(Receipt)
-        
-        # Apply role-based filtering
-        if user_roles and "receipt_creator" in user_roles:
-            # receipt_creator can only see their own receipts
-            query = query.filter(Receipt.created_by == user_id)
-        # admin and receipt_report_viewer can see all receipts (no additional filter)
+        query = apply_receipt_filters(db_session.query(*RECEIPT_RESPONSE_COLUMNS), filters, principal)
         
-        # Apply optional filters
-        if filters:
-            if filters.donor_name:
-                # Combined search for donor name OR receipt number
-                search_term = filters.donor_name
-                query = query.filter(
-                    or_(
-                        Receipt.donor_name.ilike(f"%{search_term}%"),
-                        Receipt.receipt_no.ilike(f"%{search_term}%")
-                    )
-                )
-            if filters.village:
-                # Combined search for village OR residence
-                search_term = filters.village
-                query = query.filter(
-                    or_(
-                        Receipt.village.ilike(f"%{search_term}%"),
-                        Receipt.residence.ilike(f"%{search_term}%")
-                    )
-                )
-            if filters.payment_mode:
-                query = query.filter(Receipt.payment_mode == filters.payment_mode)
-            if filters.donation1_purpose:
-                query = query.filter(Receipt.donation1_purpose.ilike(f"%{filters.donation1_purpose}%"))
-            if filters.status:
-                query = query.filter(Receipt.status == filters.status)
-            if filters.date_from:
-                # Convert date to datetime (start of day)
-                from datetime import datetime, time
-                start_datetime = datetime.combine(filters.date_from, time.min)
-                query = query.filter(Receipt.receipt_date >= start_datetime)
-            if filters.date_to:
-                # Convert date to datetime (end of day)
-                from datetime import datetime, time
-                end_datetime = datetime.combine(filters.date_to, time.max)
-                query = query.filter(Receipt.receipt_date <= end_datetime)
-            if filters.created_by and user_roles:
-                # Admin and receipt_report_viewer can filter by creator
-                from login.permissions import user_has_permission, Permission as Perm
-                has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
-                is_admin = "admin" in user_roles
-                
-                if has_read_receipts or is_admin:
-                    query = query.filter(Receipt.created_by == filters.created_by)
-        
-        # Get total count before applying pagination
-        total_count = query.count()
-        
-        # Apply pagination and ordering
+        # Page and total count in one statement
         offset = (page_num - 1) * page_size
-        receipts = query.order_by(desc(Receipt.receipt_date)).offset(offset).limit(page_size).all()
+        receipts, total_count = fetch_page_with_total(
+            query.order_by(desc(Receipt.receipt_date)), offset, page_size
+        )
         
         return {
             "total_count": total_count,
@@ -240,7 +440,78 @@ def get_receipts_paginated(
         )
 
 
-def update_receipt(db_session: Session, receipt_id: int, updated_data: ReceiptUpdate, user_id: int, user_roles: List[str]) -> Receipt:
+def decode_receipt_cursor(cursor: str) -> tuple:
+    """Decode a receipt listing cursor into (receipt_date, id), or raise 400"""
+    try:
+        last_date, last_id = decode_cursor(cursor)
+        if not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise ValueError("Invalid cursor")
+        return datetime.fromisoformat(last_date), last_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def receipt_keyset_statement(statement, cursor_key: Optional[tuple], page_size: int):
+    """Seek past cursor_key and fetch one extra row to know whether another page exists"""
+    if cursor_key:
+        statement = statement.filter(tuple_(Receipt.receipt_date, Receipt.id) < tuple_(*cursor_key))
+    return statement.order_by(desc(Receipt.receipt_date), desc(Receipt.id)).limit(page_size + 1)
+
+
+def receipt_keyset_page(receipts: list, page_size: int) -> Dict[str, Any]:
+    """Trim the extra row of a keyset fetch and build the next cursor"""
+    next_cursor = None
+    if len(receipts) > page_size:
+        receipts = receipts[:page_size]
+        last = receipts[-1]
+        next_cursor = encode_cursor([last.receipt_date.isoformat(), last.id])
+    
+    return {
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "data": receipts
+    }
+
+
+def get_receipts_keyset(
+    db_session: Session,
+    filters: Optional[ReceiptFilter] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 10,
+    principal: Optional[Principal] = None
+) -> Dict[str, Any]:
+    """
+    Get receipts page by page using a (receipt_date, id) keyset cursor
+    
+    Seeks past the last row of the previous page with a row-value comparison
+    instead of an OFFSET, so every page costs the same however deep it is.
+    
+    Args:
+        db_session: Database session
+        filters: Optional filters to apply
+        cursor: next_cursor from the previous page, or None for the first page
+        page_size: Number of items per page
+        principal: Current user (for permission filtering)
+        
+    Returns:
+        Dictionary with receipts data (rows of RECEIPT_RESPONSE_COLUMNS) and
+        next_cursor (None on the last page)
+    """
+    cursor_key = decode_receipt_cursor(cursor) if cursor else None
+    
+    try:
+        query = apply_receipt_filters(db_session.query(*RECEIPT_RESPONSE_COLUMNS), filters, principal)
+        receipts = receipt_keyset_statement(query, cursor_key, page_size).all()
+        return receipt_keyset_page(receipts, page_size)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch receipts: {str(e)}"
+        )
+
+
+def update_receipt(db_session: Session, receipt_id: int, updated_data: ReceiptUpdate, principal: Principal) -> Receipt:
     """
     Update receipt in database
     
@@ -248,15 +519,15 @@ def update_receipt(db_session: Session, receipt_id: int, updated_data: ReceiptUp
         db_session: Database session
         receipt_id: Receipt ID to update
         updated_data: Updated receipt data
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Updated Receipt object
     """
     try:
-        # Get existing receipt
-        receipt = db_session.query(Receipt).filter(Receipt.id == receipt_id).first()
+        # Lock the receipt so concurrent edits apply their rollup deltas one after the other
+        receipt = db_session.query(Receipt).filter(Receipt.id == receipt_id) \
+            .populate_existing().with_for_update().first()
         
         if not receipt:
             raise HTTPException(
@@ -265,23 +536,21 @@ def update_receipt(db_session: Session, receipt_id: int, updated_data: ReceiptUp
             )
         
         # Check permissions
-        # Ensure both values are integers for proper comparison
-        current_user_id = int(user_id)
-        receipt_creator_id = int(receipt.created_by)
-        
-        if "receipt_creator" in user_roles and receipt_creator_id != current_user_id:
+        if sees_own_receipts_only(principal) and int(receipt.created_by) != int(principal.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only update your own receipts"
             )
         
         # Update fields (only if provided)
+        rollup_before = receipt_rollup_entry(receipt)
         update_data = updated_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(receipt, field, value)
         
         # Update timestamp
         receipt.updated_at = datetime.now()
+        record_receipt_rollup(db_session, rollup_before, receipt_rollup_entry(receipt))
         
         db_session.commit()
         db_session.refresh(receipt)
@@ -298,22 +567,22 @@ def update_receipt(db_session: Session, receipt_id: int, updated_data: ReceiptUp
         )
 
 
-def delete_receipt(db_session: Session, receipt_id: int, user_id: int, user_roles: List[str]) -> bool:
+def delete_receipt(db_session: Session, receipt_id: int, principal: Principal) -> bool:
     """
     Delete receipt by ID (actually sets status to 'cancelled')
     
     Args:
         db_session: Database session
         receipt_id: Receipt ID to delete
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         True if successful
     """
     try:
-        # Get existing receipt
-        receipt = db_session.query(Receipt).filter(Receipt.id == receipt_id).first()
+        # Lock the receipt so concurrent edits apply their rollup deltas one after the other
+        receipt = db_session.query(Receipt).filter(Receipt.id == receipt_id) \
+            .populate_existing().with_for_update().first()
         
         if not receipt:
             raise HTTPException(
@@ -322,19 +591,22 @@ def delete_receipt(db_session: Session, receipt_id: int, user_id: int, user_role
             )
         
         # Check permissions
-        # Ensure both values are integers for proper comparison
-        current_user_id = int(user_id)
-        receipt_creator_id = int(receipt.created_by)
-        
-        if "receipt_creator" in user_roles and receipt_creator_id != current_user_id:
+        if sees_own_receipts_only(principal) and int(receipt.created_by) != int(principal.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You can only delete your own receipts"
             )
         
+        # Already cancelled (e.g. a repeated request): nothing changes in the rollup
+        if receipt.status == 'cancelled':
+            db_session.commit()
+            return True
+        
         # Set status to cancelled instead of actual deletion
+        rollup_before = receipt_rollup_entry(receipt)
         receipt.status = 'cancelled'
         receipt.updated_at = datetime.now()
+        record_receipt_rollup(db_session, rollup_before, receipt_rollup_entry(receipt))
         
         db_session.commit()
         
@@ -350,40 +622,121 @@ def delete_receipt(db_session: Session, receipt_id: int, user_id: int, user_role
         )
 
 
-def get_receipt_stats(db_session: Session, user_id: Optional[int] = None, user_roles: Optional[List[str]] = None) -> Dict[str, Any]:
+# Dimensions broken down by get_receipt_stats, keyed by response name
+STATS_DIMENSIONS = {
+    "payment_mode": ReceiptDailyRollup.payment_mode,
+    "purpose": ReceiptDailyRollup.purpose,
+    "creator": ReceiptDailyRollup.created_by,
+}
+
+
+def receipt_stats_measures() -> List:
+    """Counts and exact Numeric amounts per status, summed over rollup rows"""
+    return [
+        func.coalesce(func.sum(getattr(ReceiptDailyRollup, measure)), 0).label(measure)
+        for measure in ROLLUP_MEASURES
+    ]
+
+
+def _receipt_stats_rows(db_session: Session, query: Query) -> List[tuple]:
+    """
+    Aggregate the filtered rollup rows overall and per stats dimension
+
+    PostgreSQL computes every grouping in one scan with GROUPING SETS; other
+    databases get the same rows from a UNION ALL of one aggregate per grouping.
+
+    Returns:
+        (dimension, key, *measures) rows; dimension is None for the overall row
+    """
+    measures = receipt_stats_measures()
+    dimensions = list(STATS_DIMENSIONS.items())
+
+    if db_session.get_bind().dialect.name == "postgresql":
+        columns = [column for _, column in dimensions]
+        rows = query.with_entities(
+            func.grouping(*columns).label("grouping_id"), *columns, *measures
+        ).group_by(func.grouping_sets(tuple_(), *columns)).all()
+
+        # grouping() sets one bit per column left out of the row's grouping
+        all_bits = (1 << len(columns)) - 1
+        grouped_by = {all_bits ^ (1 << (len(columns) - 1 - position)): position
+                      for position in range(len(columns))}
+        result = []
+        for grouping_id, *values in rows:
+            keys, row_measures = values[:len(columns)], values[len(columns):]
+            if grouping_id == all_bits:
+                result.append((None, None, *row_measures))
+            else:
+                position = grouped_by[grouping_id]
+                result.append((dimensions[position][0], keys[position], *row_measures))
+        return result
+
+    selects = [query.with_entities(literal(None, String).label("dimension"),
+                                   literal(None, String).label("key"), *measures)]
+    for name, column in dimensions:
+        selects.append(query.with_entities(literal(name, String).label("dimension"),
+                                           cast(column, String).label("key"), *measures)
+                       .group_by(column))
+    return [tuple(row) for row in selects[0].union_all(*selects[1:]).all()]
+
+
+def get_receipt_stats(db_session: Session, principal: Optional[Principal] = None) -> Dict[str, Any]:
     """
     Get receipt statistics
     
+    Totals, per-status counts and amounts, and breakdowns by payment mode,
+    donation purpose and creator come from a single aggregate statement over
+    receipt_daily_rollup. Amounts are summed in SQL and returned as Decimal.
+    
     Args:
         db_session: Database session  
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         Dictionary with statistics
     """
     try:
+        from models.auth import User
+
         # Base query
-        query = db_session.query(Receipt)
-        
-        # Apply role-based filtering
-        if user_roles and "receipt_creator" in user_roles:
-            query = query.filter(Receipt.created_by == user_id)
-        
-        # Get basic stats
-        total_receipts = query.count()
-        total_amount = query.with_entities(db_session.query(Receipt.total_amount).subquery().c.total_amount).all()
-        total_donation_amount = sum([float(amount[0]) for amount in total_amount if amount[0]])
-        
-        completed_receipts = query.filter(Receipt.status == 'completed').count()
-        cancelled_receipts = query.filter(Receipt.status == 'cancelled').count()
+        query = db_session.query(ReceiptDailyRollup)
+        
+        # Apply permission-based filtering
+        if sees_own_receipts_only(principal):
+            query = query.filter(ReceiptDailyRollup.created_by == principal.id)
+        
+        overall = None
+        breakdowns = {name: [] for name in STATS_DIMENSIONS}
+        for dimension, key, *values in _receipt_stats_rows(db_session, query):
+            measures = dict(zip(ROLLUP_MEASURES, values))
+            if dimension is None:
+                overall = measures
+            elif measures["receipt_count"]:
+                # Rollup rows emptied by updates are kept at zero; skip their groups
+                breakdowns[dimension].append({dimension: key or None, **measures})
+
+        for name, rows in breakdowns.items():
+            rows.sort(key=lambda row: row["total_amount"], reverse=True)
+
+        creator_ids = [int(row["creator"]) for row in breakdowns["creator"]]
+        usernames = dict(
+            db_session.query(User.id, User.username).filter(User.id.in_(creator_ids)).all()
+        ) if creator_ids else {}
+        for row in breakdowns["creator"]:
+            row["creator"] = int(row["creator"])
+            row["username"] = usernames.get(row["creator"])
         
         return {
-            "total_receipts": total_receipts,
-            "total_donation_amount": total_donation_amount,
-            "completed_receipts": completed_receipts,
-            "cancelled_receipts": cancelled_receipts,
-            "current_year": datetime.now().year
+            "total_receipts": overall["receipt_count"],
+            "total_donation_amount": overall["total_amount"],
+            "completed_receipts": overall["completed_count"],
+            "completed_amount": overall["completed_amount"],
+            "cancelled_receipts": overall["cancelled_count"],
+            "cancelled_amount": overall["cancelled_amount"],
+            "current_year": datetime.now().year,
+            "by_payment_mode": breakdowns["payment_mode"],
+            "by_purpose": breakdowns["purpose"],
+            "by_creator": breakdowns["creator"]
         }
         
     except Exception as e:
@@ -393,14 +746,13 @@ def get_receipt_stats(db_session: Session, user_id: Optional[int] = None, user_r
         )
 
 
-def get_receipt_creators(db_session: Session, user_id: int, user_roles: List[str]) -> List:
+def get_receipt_creators(db_session: Session, principal: Principal) -> List:
     """
     Get list of users who have created receipts
     
     Args:
         db_session: Database session
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         
     Returns:
         List of User objects who have created receipts
@@ -408,16 +760,15 @@ def get_receipt_creators(db_session: Session, user_id: int, user_roles: List[str
     try:
         from models.auth import User
         
-        print(f"DEBUG: get_receipt_creators - user_id={user_id}, user_roles={user_roles}")
+        print(f"DEBUG: get_receipt_creators - user_id={principal.id}, user_roles={sorted(principal.roles)}")
         
-        # Role-based filtering first
-        allowed_roles = ["admin", "receipt_report_viewer", "receipt_creator"]
-        has_allowed_role = any(role in allowed_roles for role in user_roles) if user_roles else False
+        # Permission check first (report viewers and creators; admin has both permissions)
+        has_allowed_role = principal.can(Permission.READ_RECEIPTS) or principal.can(Permission.CREATE_RECEIPTS)
         
-        print(f"DEBUG: allowed_roles={allowed_roles}, has_allowed_role={has_allowed_role}")
+        print(f"DEBUG: has_allowed_role={has_allowed_role}")
         
-        if not user_roles or not has_allowed_role:
-            print(f"DEBUG: No access - user_roles={user_roles}")
+        if not has_allowed_role:
+            print(f"DEBUG: No access - user_roles={sorted(principal.roles)}")
             return []
         
         # First check if there are any receipts at all
@@ -476,13 +827,87 @@ def get_creators_usernames(db_session: Session, creator_ids: List[int]) -> Dict[
         return {}
 
 
+# --- Async variants (AsyncSession over asyncpg, see database.get_async_db) ---
+
+async def get_receipt_by_id_async(db_session: AsyncSession, receipt_id: int) -> Optional[Receipt]:
+    """Get single receipt by ID (async)"""
+    return await db_session.scalar(select(Receipt).where(Receipt.id == receipt_id))
+
+
+async def get_receipts_paginated_async(
+    db_session: AsyncSession,
+    filters: Optional[ReceiptFilter] = None,
+    page_num: int = 1,
+    page_size: int = 10,
+    principal: Optional[Principal] = None
+) -> Dict[str, Any]:
+    """Get receipts with pagination and filtering (async, see get_receipts_paginated)"""
+    try:
+        statement = apply_receipt_filters(select(*RECEIPT_RESPONSE_COLUMNS), filters, principal)
+        
+        offset = (page_num - 1) * page_size
+        receipts, total_count = await fetch_page_with_total_async(
+            db_session, statement.order_by(desc(Receipt.receipt_date)), offset, page_size
+        )
+        
+        return {
+            "total_count": total_count,
+            "page_num": page_num,
+            "page_size": page_size,
+            "data": receipts
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch receipts: {str(e)}"
+        )
+
+
+async def get_receipts_keyset_async(
+    db_session: AsyncSession,
+    filters: Optional[ReceiptFilter] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 10,
+    principal: Optional[Principal] = None
+) -> Dict[str, Any]:
+    """Get receipts page by page using a keyset cursor (async, see get_receipts_keyset)"""
+    cursor_key = decode_receipt_cursor(cursor) if cursor else None
+    
+    try:
+        statement = apply_receipt_filters(select(*RECEIPT_RESPONSE_COLUMNS), filters, principal)
+        receipts = (await db_session.execute(receipt_keyset_statement(statement, cursor_key, page_size))).all()
+        return receipt_keyset_page(receipts, page_size)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch receipts: {str(e)}"
+        )
+
+
+async def get_creators_usernames_async(db_session: AsyncSession, creator_ids: List[int]) -> Dict[int, str]:
+    """Get usernames for a list of creator IDs (async, see get_creators_usernames)"""
+    try:
+        from models.auth import User
+        
+        if not creator_ids:
+            return {}
+        
+        result = await db_session.execute(select(User.id, User.username).where(User.id.in_(creator_ids)))
+        return {creator_id: username for creator_id, username in result}
+        
+    except Exception:
+        return {}
+
+
 def get_users_by_role_ids(db_session: Session, role_ids: List[int]) -> List[Dict[str, Any]]:
     """
     Get users with specific role IDs for receipt reports dropdown
     
     Args:
         db_session: Database session
-        role_ids: List of role IDs to filter by (e.g., [1, 5])
+        role_ids: List of role IDs to filter by (see manager.role_catalog)
         
     Returns:
         List of dictionaries with user id and username
@@ -521,8 +946,7 @@ def get_users_by_role_ids(db_session: Session, role_ids: List[int]) -> List[Dict
 def get_receipts_for_export(
     db_session: Session,
     filters: Optional[ReceiptFilter] = None,
-    user_id: Optional[int] = None,
-    user_roles: Optional[List[str]] = None,
+    principal: Optional[Principal] = None,
     pdf: bool = False,
     csv: bool = False
 ):
@@ -532,8 +956,7 @@ def get_receipts_for_export(
     Args:
         db_session: Database session
         filters: Optional filters to apply
-        user_id: Current user ID
-        user_roles: Current user roles
+        principal: Current user
         pdf: Export as PDF
         csv: Export as CSV
         
@@ -544,20 +967,10 @@ def get_receipts_for_export(
         # Build base query
         query = db_session.query(Receipt)
         
-        # Apply role-based filtering (same logic as get_receipts_paginated)
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        if user_roles:
-            has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
-            is_admin = "admin" in user_roles
-            
+        # Apply permission-based filtering (same logic as get_receipts_paginated)
+        if sees_own_receipts_only(principal):
             # receipt_creator can only see their own receipts
-            if not (has_read_receipts or is_admin):
-                if user_id:
-                    query = query.filter(Receipt.created_by == user_id)
-                else:
-                    # No user_id provided and no read permissions - return empty
-                    query = query.filter(Receipt.id == -1)  # No results
+            query = query.filter(Receipt.created_by == principal.id)
         
         # Apply filters (same logic as get_receipts_paginated)
         if filters:
@@ -588,21 +1001,17 @@ def get_receipts_for_export(
                 end_datetime = datetime.combine(filters.date_to, time.max)
                 query = query.filter(Receipt.receipt_date <= end_datetime)
             
-            if filters.created_by and user_roles:
+            if filters.created_by and can_filter_by_creator(principal):
                 # Admin and receipt_report_viewer can filter by creator
-                has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
-                is_admin = "admin" in user_roles
-                
-                if has_read_receipts or is_admin:
-                    query = query.filter(Receipt.created_by == filters.created_by)
+                query = query.filter(Receipt.created_by == filters.created_by)
         
-        # Get all data for export (ordered by receipt_date descending)
-        receipts = query.order_by(desc(Receipt.receipt_date)).all()
+        # Ordered by receipt_date descending
+        query = query.order_by(desc(Receipt.receipt_date))
         
         if pdf:
-            return generate_receipts_pdf_export(db_session, receipts)
+            return generate_receipts_pdf_export(db_session, query.all())
         elif csv:
-            return generate_receipts_csv_export(db_session, receipts)
+            return generate_receipts_csv_export(query)
             
     except Exception as e:
         print(f"ERROR in get_receipts_for_export: {str(e)}")
@@ -693,50 +1102,96 @@ def generate_receipts_pdf_export(db_session: Session, receipts: List[Receipt]):
     )
 
 
-def generate_receipts_csv_export(db_session: Session, receipts: List[Receipt]):
-    """Generate CSV export of receipts"""
-    # Get creator usernames
-    creator_ids = list(set([receipt.created_by for receipt in receipts]))
-    creators_map = get_creators_usernames(db_session, creator_ids)
+RECEIPT_CSV_HEADER = [
+    "Receipt No", "Receipt Date", "Donor Name", "Village", "Residence", "Mobile",
+    "Relation Address", "Payment Mode", "Payment Details", "Donation Purpose",
+    "Donation Amount", "Additional Amount", "Total Amount", "Total Amount Words",
+    "Status", "Created By", "Created At", "Updated At"
+]
+
+
+def iter_receipt_csv_rows(statement) -> Iterator[List[Any]]:
+    """
+    Stream CSV rows for a receipt export statement
+
+    Runs on its own session because the request session is closed before
+    the response body is sent. Rows are pulled through a server-side cursor
+    in batches of EXPORT_BATCH_SIZE, so memory does not grow with the result.
+
+    Args:
+        statement: Column projection built by generate_receipts_csv_export
+        
+    Returns:
+        Iterator of CSV row lists
+    """
+    db_session = SessionLocal()
+    try:
+        result = db_session.execute(
+            statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+        for row in result:
+            yield [
+                row.receipt_no or "",
+                row.receipt_date.strftime('%Y-%m-%d') if row.receipt_date else "",
+                row.donor_name or "",
+                row.village or "",
+                row.residence or "",
+                row.mobile or "",
+                row.relation_address or "",
+                row.payment_mode or "",
+                row.payment_details or "",
+                row.donation1_purpose or "",
+                float(row.donation1_amount) if row.donation1_amount else 0.0,
+                float(row.donation2_amount) if row.donation2_amount else 0.0,
+                float(row.total_amount) if row.total_amount else 0.0,
+                row.total_amount_words or "",
+                row.status or "",
+                row.creator_username or f"User{row.created_by}",
+                row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else "",
+                row.updated_at.strftime('%Y-%m-%d %H:%M:%S') if row.updated_at else ""
+            ]
+    finally:
+        db_session.close()
+
+
+def generate_receipts_csv_export(query: Query):
+    """
+    Generate streaming CSV export of receipts
     
-    # Prepare data for CSV export
-    csv_data = []
-    for receipt in receipts:
-        csv_data.append({
-            "Receipt No": receipt.receipt_no or "",
-            "Receipt Date": receipt.receipt_date.strftime('%Y-%m-%d') if receipt.receipt_date else "",
-            "Donor Name": receipt.donor_name or "",
-            "Village": receipt.village or "",
-            "Residence": receipt.residence or "",
-            "Mobile": receipt.mobile or "",
-            "Relation Address": receipt.relation_address or "",
-            "Payment Mode": receipt.payment_mode or "",
-            "Payment Details": receipt.payment_details or "",
-            "Donation Purpose": receipt.donation1_purpose or "",
-            "Donation Amount": float(receipt.donation1_amount) if receipt.donation1_amount else 0.0,
-            "Additional Amount": float(receipt.donation2_amount) if receipt.donation2_amount else 0.0,
-            "Total Amount": float(receipt.total_amount) if receipt.total_amount else 0.0,
-            "Total Amount Words": receipt.total_amount_words or "",
-            "Status": receipt.status or "",
-            "Created By": creators_map.get(receipt.created_by, f"User{receipt.created_by}"),
-            "Created At": receipt.created_at.strftime('%Y-%m-%d %H:%M:%S') if receipt.created_at else "",
-            "Updated At": receipt.updated_at.strftime('%Y-%m-%d %H:%M:%S') if receipt.updated_at else ""
-        })
-
-    # Create DataFrame and convert to CSV
-    df = pd.DataFrame(csv_data)
-    
-    # Create CSV string buffer
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False, encoding='utf-8')
-    csv_buffer.seek(0)
-    
-    # Convert to bytes for streaming response
-    csv_bytes = BytesIO(csv_buffer.getvalue().encode('utf-8'))
-    csv_bytes.seek(0)
+    Args:
+        query: Filtered and ordered Receipt query
+        
+    Returns:
+        StreamingResponse yielding CSV chunks as rows arrive
+    """
+    from models.auth import User
+    
+    # Column-only projection with the creator username joined in,
+    # so no ORM objects are built and no second lookup is needed
+    statement = query.with_entities(
+        Receipt.receipt_no,
+        Receipt.receipt_date,
+        Receipt.donor_name,
+        Receipt.village,
+        Receipt.residence,
+        Receipt.mobile,
+        Receipt.relation_address,
+        Receipt.payment_mode,
+        Receipt.payment_details,
+        Receipt.donation1_purpose,
+        Receipt.donation1_amount,
+        Receipt.donation2_amount,
+        Receipt.total_amount,
+        Receipt.total_amount_words,
+        Receipt.status,
+        Receipt.created_by,
+        User.username.label("creator_username"),
+        Receipt.created_at,
+        Receipt.updated_at
+    ).outerjoin(User, User.id == Receipt.created_by).statement
     
     return StreamingResponse(
-        csv_bytes, 
+        iter_csv_chunks(RECEIPT_CSV_HEADER, iter_receipt_csv_rows(statement)),
         media_type="text/csv", 
         headers={"Content-Disposition": "attachment; filename=receipt_report.csv"}
-    )
\ No newline at end of file
+    )
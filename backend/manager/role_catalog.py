@@ -0,0 +1,106 @@
+"""
+Role Catalog
+The roles table, cached per worker with id <-> name maps
+
+There are a handful of roles and they only change through create_role, so
+they are read once per worker and role names are resolved to ids (and ids
+back to names) without a round trip. create_role drops the catalog of the
+worker that ran it. Another worker picks up a new role the first time it is
+asked for a name it does not know, at most once per
+ROLE_CATALOG_MISS_RELOAD_SECONDS.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.auth import Role
+
+
+# Minimum time between reloads caused by unknown role names
+ROLE_CATALOG_MISS_RELOAD_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class RoleCatalog:
+    """Every role, by name and by id"""
+    ids_by_name: Dict[str, int]
+    names_by_id: Dict[int, str]
+    loaded_at: float
+
+    def ids_for(self, role_names: Iterable[str]) -> Dict[str, int]:
+        """Role IDs by name for the known names among role_names"""
+        return {name: self.ids_by_name[name] for name in role_names if name in self.ids_by_name}
+
+
+_catalog: Optional[RoleCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def load_role_catalog(db_session: Session) -> RoleCatalog:
+    """Read every role into a new catalog and make it the current one"""
+    global _catalog
+    rows = db_session.query(Role.id, Role.name).all()
+    catalog = RoleCatalog(
+        ids_by_name={name: role_id for role_id, name in rows},
+        names_by_id={role_id: name for role_id, name in rows},
+        loaded_at=time.monotonic(),
+    )
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
+
+
+def get_role_catalog(db_session: Session) -> RoleCatalog:
+    """Return this worker's role catalog, loading it on first use"""
+    catalog = _catalog
+    if catalog is None:
+        catalog = load_role_catalog(db_session)
+    return catalog
+
+
+def resolve_role_names(db_session: Session, role_names: Iterable[str]) -> Dict[str, int]:
+    """
+    Role IDs by name for role_names (unknown names are left out)
+
+    Reloads the catalog once if a name is missing, in case the role was
+    created by another worker since it was loaded.
+    """
+    role_names = list(role_names)
+    catalog = get_role_catalog(db_session)
+    role_ids = catalog.ids_for(role_names)
+    if len(role_ids) < len(set(role_names)) and \
+            time.monotonic() - catalog.loaded_at > ROLE_CATALOG_MISS_RELOAD_SECONDS:
+        role_ids = load_role_catalog(db_session).ids_for(role_names)
+    return role_ids
+
+
+def role_names_by_id(db_session: Session, role_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Role name of each of role_ids, keyed by id
+
+    The ids come from user_roles, so every one exists; an unknown id means
+    the role was created by another worker and the catalog is reloaded.
+    """
+    role_ids = list(role_ids)
+    catalog = get_role_catalog(db_session)
+    if any(role_id not in catalog.names_by_id for role_id in role_ids):
+        catalog = load_role_catalog(db_session)
+    return {role_id: catalog.names_by_id[role_id] for role_id in role_ids if role_id in catalog.names_by_id}
+
+
+def role_names_for(db_session: Session, role_ids: Iterable[int]) -> List[str]:
+    """Role names of role_ids, in the same order (see role_names_by_id)"""
+    role_ids = list(role_ids)
+    names_by_id = role_names_by_id(db_session, role_ids)
+    return [names_by_id[role_id] for role_id in role_ids if role_id in names_by_id]
+
+
+def invalidate_role_catalog():
+    """Forget the catalog; the next lookup reads the roles table again"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -3,25 +3,31 @@ User Data Manager
 Handles database operations for user data
 """
 
-from typing import Optional, List
-from sqlalchemy.orm import Session, joinedload
+from typing import Optional, List, Iterator, Any
+from sqlalchemy.orm import Session, Query, joinedload, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, tuple_, select, literal, literal_column, update
 from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
 
 from collections import defaultdict
-from io import BytesIO, StringIO
+from io import BytesIO
 
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, PageBreak, KeepTogether
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
-import pandas as pd
 
+from database import SessionLocal
 from models.user_data import User_data
 from models.village_area import Village, Area
 from api_request_response.user_data import User_dataCreate, User_dataUpdate
+from utils.helpers import iter_csv_chunks, encode_cursor, decode_cursor
+from utils.pagination import fetch_page_with_total, fetch_page_with_total_async
+
+# Rows fetched per round trip while streaming exports
+EXPORT_BATCH_SIZE = 1000
 
 
 def check_area_exists(db_session: Session, area_id: int) -> bool:
@@ -36,8 +42,11 @@ def check_village_exists(db_session: Session, village_id: int) -> bool:
 
 def create_user_data(db_session: Session, user_data: User_dataCreate) -> User_data:
     """Create new user data in database"""
+    from manager.member_search import refresh_member_search_text
+
     try:
         db_user_data = User_data(**user_data.dict())
+        refresh_member_search_text(db_session, db_user_data)
         db_session.add(db_user_data)
         db_session.commit()
         db_session.refresh(db_user_data)
@@ -57,6 +66,41 @@ def get_user_data_by_id(db_session: Session, user_id: int, for_update: bool = Fa
     return query.first()
 
 
+def apply_user_data_filters(
+    query: Query,
+    name: Optional[str] = None,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None,
+    user_ids: Optional[List[int]] = None
+) -> Query:
+    """Apply the user data listing filters to a Query or select() statement"""
+    if name:
+        search = f"%{name}%"
+        query = query.filter(
+            or_(
+                User_data.name.ilike(search),
+                User_data.father_or_husband_name.ilike(search),
+                User_data.mobile_no1.ilike(search),
+                User_data.mobile_no2.ilike(search)
+            )
+        )
+
+    if type_filter:
+        query = query.filter(User_data.type.in_([t.upper() for t in type_filter]))
+
+    if area_ids:
+        query = query.filter(User_data.fk_area_id.in_(area_ids))
+
+    if village_ids:
+        query = query.filter(User_data.fk_village_id.in_(village_ids))
+
+    if user_ids:
+        query = query.filter(User_data.user_id.in_(user_ids))
+
+    return query
+
+
 def get_user_data_paginated(
     db_session: Session,
     page_num: int = 1,
@@ -76,38 +120,154 @@ def get_user_data_paginated(
         ).filter(User_data.delete_flag == False)
 
         # Apply filters
-        if name:
-            search = f"%{name}%"
-            query = query.filter(
-                or_(
-                    User_data.name.ilike(search),
-                    User_data.father_or_husband_name.ilike(search),
-                    User_data.mobile_no1.ilike(search),
-                    User_data.mobile_no2.ilike(search)
-                )
-            )
+        query = apply_user_data_filters(query, name, type_filter, area_ids, village_ids, user_ids)
 
-        if type_filter:
-            query = query.filter(User_data.type.in_([t.upper() for t in type_filter]))
+        # Apply pagination (page and total count in one statement)
+        offset_value = (page_num - 1) * page_size
+        data, total_count = fetch_page_with_total(
+            query.order_by(*user_data_sort_keys()),
+            offset_value, page_size
+        )
 
-        if area_ids:
-            query = query.filter(User_data.fk_area_id.in_(area_ids))
+        return {
+            "message": "User data records fetched successfully.",
+            "total_count": total_count,
+            "data": data
+        }
 
-        if village_ids:
-            query = query.filter(User_data.fk_village_id.in_(village_ids))
+    except Exception as e:
+        db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching user data")
 
-        if user_ids:
-            query = query.filter(User_data.user_id.in_(user_ids))
 
-        # Calculate total count before pagination
-        total_count = query.count()
+def user_data_sort_keys() -> list:
+    """
+    Sort key for the user data listing as NULL-free expressions
+
+    Matches ORDER BY type, village, name (NULLs last, as on PostgreSQL) with
+    user_id as tiebreaker. Each nullable column becomes (IS NULL, COALESCE)
+    so keyset row comparisons never meet a NULL. The village is the copied
+    user_data.village_name, so these are exactly the expressions of
+    ix_user_data_listing_keys: pages are read in index order with no sort.
+    """
+    return [
+        # Inline fallbacks (not bind parameters) so the expressions match the
+        # index; PostgreSQL types 'ALL' as the enum from the column
+        User_data.type.is_(None), func.coalesce(User_data.type, literal_column("'ALL'")),
+        User_data.village_name.is_(None), func.coalesce(User_data.village_name, literal_column("''")),
+        User_data.name.is_(None), func.coalesce(User_data.name, literal_column("''")),
+        User_data.user_id,
+    ]
+
+
+def decode_user_data_cursor(cursor: str) -> list:
+    """Decode a user data listing cursor into a user_data_sort_keys() value, or raise 400"""
+    try:
+        last_type, last_village, last_name, last_user_id = decode_cursor(cursor)
+        return [
+            last_type is None, last_type or "ALL",
+            last_village is None, last_village or "",
+            last_name is None, last_name or "",
+            int(last_user_id),
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def user_data_keyset_statement(statement, last_key: Optional[list], page_size: int):
+    """Seek past last_key and fetch one extra row to know whether another page exists"""
+    sort_keys = user_data_sort_keys()
+    if last_key:
+        # Each cursor value takes its key's type (the enum for type), as with the COALESCE fallback
+        last_values = [literal(value, key.type) for key, value in zip(sort_keys, last_key)]
+        statement = statement.filter(tuple_(*sort_keys) > tuple_(*last_values))
+    return statement.order_by(*sort_keys).limit(page_size + 1)
+
+
+def user_data_keyset_page(data: List[User_data], page_size: int) -> dict:
+    """Trim the extra row of a keyset fetch and build the next cursor"""
+    next_cursor = None
+    if len(data) > page_size:
+        data = data[:page_size]
+        last = data[-1]
+        next_cursor = encode_cursor([
+            last.type,
+            last.village_name,
+            last.name,
+            last.user_id,
+        ])
+
+    return {
+        "message": "User data records fetched successfully.",
+        "next_cursor": next_cursor,
+        "data": data
+    }
+
+
+def get_user_data_keyset(
+    db_session: Session,
+    cursor: Optional[str] = None,
+    page_size: int = 10,
+    name: Optional[str] = None,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None,
+    user_ids: Optional[List[int]] = None
+):
+    """Get user data page by page using a (type, village, name, user_id) keyset cursor"""
+    last_key = decode_user_data_cursor(cursor) if cursor else None
+
+    try:
+        # One join to village serves both the sort and the relationship
+        query = db_session.query(User_data)\
+                          .outerjoin(Village, User_data.fk_village_id == Village.village_id)\
+                          .options(contains_eager(User_data.village), joinedload(User_data.area))\
+                          .filter(User_data.delete_flag == False)
+
+        query = apply_user_data_filters(query, name, type_filter, area_ids, village_ids, user_ids)
+
+        data = user_data_keyset_statement(query, last_key, page_size).all()
+        return user_data_keyset_page(data, page_size)
+
+    except Exception as e:
+        db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching user data")
+
+
+# --- Async variants (AsyncSession over asyncpg, see database.get_async_db) ---
+
+async def get_user_data_by_id_async(db_session: AsyncSession, user_id: int) -> Optional[User_data]:
+    """Get live user data by ID (async)"""
+    return await db_session.scalar(
+        select(User_data).where(User_data.user_id == user_id, User_data.delete_flag == False)
+    )
+
+
+async def get_user_data_paginated_async(
+    db_session: AsyncSession,
+    page_num: int = 1,
+    page_size: int = 10,
+    name: Optional[str] = None,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None,
+    user_ids: Optional[List[int]] = None
+):
+    """Get paginated user data with filtering (async, see get_user_data_paginated)"""
+    try:
+        statement = select(User_data)\
+            .outerjoin(Village, User_data.fk_village_id == Village.village_id)\
+            .outerjoin(Area, User_data.fk_area_id == Area.area_id)\
+            .options(contains_eager(User_data.village), contains_eager(User_data.area))\
+            .filter(User_data.delete_flag == False)
+
+        statement = apply_user_data_filters(statement, name, type_filter, area_ids, village_ids, user_ids)
 
-        # Apply pagination
         offset_value = (page_num - 1) * page_size
-        data = query.join(Village, User_data.fk_village_id == Village.village_id, isouter=True)\
-                   .join(Area, User_data.fk_area_id == Area.area_id, isouter=True)\
-                   .order_by(User_data.type, Village.village, User_data.name)\
-                   .offset(offset_value).limit(page_size).all()
+        data, total_count = await fetch_page_with_total_async(
+            db_session, statement.order_by(*user_data_sort_keys()),
+            offset_value, page_size
+        )
 
         return {
             "message": "User data records fetched successfully.",
@@ -116,12 +276,63 @@ def get_user_data_paginated(
         }
 
     except Exception as e:
-        db_session.rollback()
+        await db_session.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching user data")
+
+
+async def get_user_data_keyset_async(
+    db_session: AsyncSession,
+    cursor: Optional[str] = None,
+    page_size: int = 10,
+    name: Optional[str] = None,
+    type_filter: Optional[List[str]] = None,
+    area_ids: Optional[List[int]] = None,
+    village_ids: Optional[List[int]] = None,
+    user_ids: Optional[List[int]] = None
+):
+    """Get user data page by page using a keyset cursor (async, see get_user_data_keyset)"""
+    last_key = decode_user_data_cursor(cursor) if cursor else None
+
+    try:
+        statement = select(User_data)\
+            .outerjoin(Village, User_data.fk_village_id == Village.village_id)\
+            .options(contains_eager(User_data.village), joinedload(User_data.area))\
+            .filter(User_data.delete_flag == False)
+
+        statement = apply_user_data_filters(statement, name, type_filter, area_ids, village_ids, user_ids)
+
+        data = list(await db_session.scalars(user_data_keyset_statement(statement, last_key, page_size)))
+        return user_data_keyset_page(data, page_size)
+
+    except Exception as e:
+        await db_session.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching user data")
 
 
+def backfill_user_data_village_names(db_session: Session) -> int:
+    """
+    Copy the village name onto members that do not have it yet (one UPDATE)
+
+    Returns:
+        Number of members updated
+    """
+    village_name = select(Village.village).where(
+        Village.village_id == User_data.fk_village_id
+    ).scalar_subquery()
+    updated = db_session.execute(
+        update(User_data)
+        .where(User_data.village_name.is_(None), User_data.fk_village_id.isnot(None))
+        .values(village_name=village_name)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db_session.commit()
+    return updated
+
+
 def update_user_data(db_session: Session, user_id: int, updated_data: User_dataUpdate) -> User_data:
     """Update user data"""
+    from manager.member_search import refresh_member_search_text
+
     try:
         user_data = db_session.query(User_data).filter(
             User_data.user_id == user_id, 
@@ -134,6 +345,7 @@ def update_user_data(db_session: Session, user_id: int, updated_data: User_dataU
         # Update fields
         for key, value in updated_data.dict(exclude_unset=True).items():
             setattr(user_data, key, value)
+        refresh_member_search_text(db_session, user_data)
         
         db_session.commit()
         db_session.refresh(user_data)
@@ -199,6 +411,16 @@ def get_user_data_for_export(
 ):
     """Get user data for PDF/CSV export"""
     try:
+        if csv:
+            # Single joined column projection, streamed row by row
+            query = db_session.query(*USER_DATA_CSV_COLUMNS)\
+                              .outerjoin(Village, User_data.fk_village_id == Village.village_id)\
+                              .outerjoin(Area, User_data.fk_area_id == Area.area_id)\
+                              .filter(User_data.delete_flag == False)
+            query = apply_user_data_filters(query, name, type_filter, area_ids, village_ids, user_ids)
+            query = query.order_by(User_data.type, Village.village, User_data.name)
+            return generate_csv_export(query.statement)
+
         # Build query with filters
         query = db_session.query(User_data).options(
             joinedload(User_data.area), 
@@ -206,28 +428,7 @@ def get_user_data_for_export(
         ).filter(User_data.delete_flag == False)
 
         # Apply same filters as pagination
-        if name:
-            search = f"%{name}%"
-            query = query.filter(
-                or_(
-                    User_data.name.ilike(search),
-                    User_data.father_or_husband_name.ilike(search),
-                    User_data.mobile_no1.ilike(search),
-                    User_data.mobile_no2.ilike(search)
-                )
-            )
-
-        if type_filter:
-            query = query.filter(User_data.type.in_([t.upper() for t in type_filter]))
-
-        if area_ids:
-            query = query.filter(User_data.fk_area_id.in_(area_ids))
-
-        if village_ids:
-            query = query.filter(User_data.fk_village_id.in_(village_ids))
-
-        if user_ids:
-            query = query.filter(User_data.user_id.in_(user_ids))
+        query = apply_user_data_filters(query, name, type_filter, area_ids, village_ids, user_ids)
 
         # Get all data for export
         user_data = query.join(Village, User_data.fk_village_id == Village.village_id, isouter=True)\
@@ -236,8 +437,6 @@ def get_user_data_for_export(
 
         if pdf:
             return generate_pdf_export(user_data)
-        elif csv:
-            return generate_csv_export(user_data)
 
     except Exception as e:
         db_session.rollback()
@@ -358,52 +557,82 @@ def generate_pdf_export(user_data):
 
 
 
-def generate_csv_export(user_data):
-    """Generate CSV export of user data"""
-    # Prepare data for CSV export
-    csv_data = []
-    for u in user_data:
-        # Generate user code
-        village_name = u.village.village if u.village else 'UNKNOWN'
-        user_code = f"SMHLGN-{u.type or 'UNKNOWN'}-{village_name}-{u.user_id}"
-        
-        csv_data.append({
-            "User ID": u.user_id,
-            "Name": u.name or "",
-            "Father/Husband Name": u.father_or_husband_name or "",
-            "Surname": u.surname or "",
-            "Village": u.village.village if u.village else "",
-            "Area": u.area.area if u.area else "",
-            "Status": u.status or "",
-            "Type": u.type or "",
-            "Address": u.address or "",
-            "Pincode": u.pincode or "",
-            "State": u.state or "",
-            "User Code": user_code,
-            "Mother Name": getattr(u, 'mother_name', '') or "",
-            "Gender": getattr(u, 'gender', '') or "",
-            "Birth Date": str(getattr(u, 'birth_date', '')) if getattr(u, 'birth_date', '') else "",
-            "Mobile No 1": u.mobile_no1 or "",
-            "Mobile No 2": u.mobile_no2 or "",
-            "Email ID": u.email_id or "",
-            "Occupation": getattr(u, 'occupation', '') or "",
-            "Country": getattr(u, 'country', '') or ""
-        })
-
-    # Create DataFrame and convert to CSV
-    df = pd.DataFrame(csv_data)
-    
-    # Create CSV string buffer
-    csv_buffer = StringIO()
-    df.to_csv(csv_buffer, index=False, encoding='utf-8')
-    csv_buffer.seek(0)
-    
-    # Convert to bytes for streaming response
-    csv_bytes = BytesIO(csv_buffer.getvalue().encode('utf-8'))
-    csv_bytes.seek(0)
-    
+USER_DATA_CSV_COLUMNS = (
+    User_data.user_id,
+    User_data.name,
+    User_data.father_or_husband_name,
+    User_data.surname,
+    Village.village.label("village_name"),
+    Area.area.label("area_name"),
+    User_data.status,
+    User_data.type,
+    User_data.address,
+    User_data.pincode,
+    User_data.state,
+    User_data.mother_name,
+    User_data.gender,
+    User_data.birth_date,
+    User_data.mobile_no1,
+    User_data.mobile_no2,
+    User_data.email_id,
+    User_data.occupation,
+    User_data.country,
+)
+
+USER_DATA_CSV_HEADER = [
+    "User ID", "Name", "Father/Husband Name", "Surname", "Village", "Area",
+    "Status", "Type", "Address", "Pincode", "State", "User Code", "Mother Name",
+    "Gender", "Birth Date", "Mobile No 1", "Mobile No 2", "Email ID",
+    "Occupation", "Country"
+]
+
+
+def iter_user_data_csv_rows(statement) -> Iterator[List[Any]]:
+    """
+    Stream CSV rows for a user data export statement
+
+    Uses its own session (the request session is closed before the body is
+    sent) and a server-side cursor fetching EXPORT_BATCH_SIZE rows at a time.
+    """
+    db_session = SessionLocal()
+    try:
+        result = db_session.execute(
+            statement.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+        )
+        for u in result:
+            # Generate user code
+            user_code = f"SMHLGN-{u.type or 'UNKNOWN'}-{u.village_name or 'UNKNOWN'}-{u.user_id}"
+            
+            yield [
+                u.user_id,
+                u.name or "",
+                u.father_or_husband_name or "",
+                u.surname or "",
+                u.village_name or "",
+                u.area_name or "",
+                u.status or "",
+                u.type or "",
+                u.address or "",
+                u.pincode or "",
+                u.state or "",
+                user_code,
+                u.mother_name or "",
+                u.gender or "",
+                str(u.birth_date) if u.birth_date else "",
+                u.mobile_no1 or "",
+                u.mobile_no2 or "",
+                u.email_id or "",
+                u.occupation or "",
+                u.country or ""
+            ]
+    finally:
+        db_session.close()
+
+
+def generate_csv_export(statement):
+    """Generate streaming CSV export of user data"""
     return StreamingResponse(
-        csv_bytes, 
+        iter_csv_chunks(USER_DATA_CSV_HEADER, iter_user_data_csv_rows(statement)),
         media_type="text/csv", 
         headers={"Content-Disposition": "attachment; filename=user_data_report.csv"}
-    )
\ No newline at end of file
+    )
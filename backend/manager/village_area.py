@@ -8,11 +8,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy import func
 from fastapi import HTTPException, status
-import time
 
 from models.village_area import Village, Area
 from models.user_data import User_data
 from api_request_response.village_area import VillageBase, AreaBase
+from utils.pagination import fetch_page_with_total
 
 
 def create_village(db_session: Session, village_data: VillageBase) -> Village:
@@ -60,27 +60,8 @@ def get_villages_with_user_count(
         if village_filter:
             query = query.filter(Village.village.ilike(f"%{village_filter}%"))
 
-        result = query.order_by(Village.village).offset(offset).limit(page_size).all()
-
-        # Get total count with retry logic
-        max_retries = 3
-        total_count = 0
-
-        for attempt in range(max_retries):
-            try:
-                if village_filter:
-                    total_count = db_session.query(Village).filter(
-                        Village.village.ilike(f"%{village_filter}%")
-                    ).count()
-                else:
-                    total_count = db_session.query(Village).count()
-                break
-            except OperationalError as e:
-                if attempt < max_retries - 1:
-                    time.sleep(0.1 * (attempt + 1))
-                    continue
-                else:
-                    total_count = len(result) if len(result) < page_size else (page_num * page_size)
+        # Page and total count (number of matching villages) in one statement
+        result, total_count = fetch_page_with_total(query.order_by(Village.village), offset, page_size)
 
         return {
             "message": "Villages fetched successfully.",
@@ -161,8 +142,8 @@ def get_areas_with_user_count(
         if area_filter:
             query = query.filter(Area.area.ilike(f"%{area_filter}%"))
 
-        total_count = db_session.query(Area).count()
-        result = query.order_by(Area.area).offset(offset).limit(page_size).all()
+        # Page and total count (number of matching areas) in one statement
+        result, total_count = fetch_page_with_total(query.order_by(Area.area), offset, page_size)
 
         return {
             "message": "Areas fetched successfully.",
@@ -0,0 +1,160 @@
+"""
+Schema Migrations
+Idempotent schema changes applied on startup after create_all
+
+create_all only creates missing tables, so columns, indexes and other objects
+added to models that already have a table in production are created here.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+
+# Trigram GIN indexes serving ILIKE '%term%' and similarity() on PostgreSQL
+TRIGRAM_INDEXES = {
+    "ix_receipts_donor_name_trgm": ("receipts", "donor_name"),
+    "ix_receipts_receipt_no_trgm": ("receipts", "receipt_no"),
+    "ix_receipts_village_trgm": ("receipts", "village"),
+    "ix_receipts_residence_trgm": ("receipts", "residence"),
+}
+
+# Full-text index over user_data.search_text; the expression must match the
+# one used by manager.member_search for the planner to pick it
+MEMBER_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_user_data_search_text_fts "
+    "ON user_data USING gin (to_tsvector('simple'::regconfig, search_text))"
+)
+
+
+# Indexes replaced by others declared on the models
+OBSOLETE_INDEXES = ("ix_user_data_listing",)
+
+
+def add_missing_columns(engine: Engine):
+    """Add nullable columns declared on models that are missing from existing tables"""
+    inspector = inspect(engine)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                ))
+
+
+def create_missing_indexes(engine: Engine):
+    """Create indexes declared on models that are missing from existing tables"""
+    inspector = inspect(engine)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                # IF NOT EXISTS: SQLite's inspector leaves out expression indexes
+                with engine.begin() as connection:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def drop_obsolete_indexes(engine: Engine):
+    """Drop indexes no longer declared on the models"""
+    with engine.begin() as connection:
+        for index_name in OBSOLETE_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+def create_trigram_indexes(engine: Engine):
+    """Install pg_trgm and the trigram indexes (PostgreSQL only)"""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        # Search falls back to the in-process index without the extension
+        logger.warning("pg_trgm unavailable, trigram indexes not created: %s", e)
+        return
+    
+    for index_name, (table_name, column_name) in TRIGRAM_INDEXES.items():
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {index_name} "
+                f"ON {table_name} USING gin ({column_name} gin_trgm_ops)"
+            ))
+
+
+def create_member_search_index(engine: Engine):
+    """Create the member full-text search index (PostgreSQL only)"""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    with engine.begin() as connection:
+        connection.execute(text(MEMBER_SEARCH_INDEX))
+
+
+def hash_stored_refresh_tokens(engine: Engine):
+    """
+    Replace plaintext refresh_tokens.token with token_hash
+    
+    Expired and revoked tokens are dropped, the rest are hashed into the
+    token_hash column (added by add_missing_columns) so sessions survive,
+    and the plaintext column is dropped. SQLite cannot drop a unique column,
+    so there the table is recreated empty and users log in again.
+    """
+    from datetime import datetime
+    from models.auth import RefreshToken
+    from login.security import hash_refresh_token
+    
+    inspector = inspect(engine)
+    if not inspector.has_table("refresh_tokens"):
+        return
+    if "token" not in {column["name"] for column in inspector.get_columns("refresh_tokens")}:
+        return
+    
+    with engine.begin() as connection:
+        if engine.dialect.name == "sqlite":
+            connection.execute(text("DROP TABLE refresh_tokens"))
+            RefreshToken.__table__.create(bind=connection)
+            return
+        
+        connection.execute(
+            text("DELETE FROM refresh_tokens WHERE is_revoked OR expires_at <= :now"),
+            {"now": datetime.utcnow()}
+        )
+        rows = connection.execute(text("SELECT id, token FROM refresh_tokens")).all()
+        if rows:
+            connection.execute(
+                text("UPDATE refresh_tokens SET token_hash = :token_hash WHERE id = :id"),
+                [{"id": row_id, "token_hash": hash_refresh_token(token)} for row_id, token in rows]
+            )
+        connection.execute(text("ALTER TABLE refresh_tokens DROP COLUMN token"))
+        connection.execute(text("ALTER TABLE refresh_tokens ALTER COLUMN token_hash SET NOT NULL"))
+    
+    logger.info("Hashed %d stored refresh tokens", len(rows))
+
+
+def run_migrations(engine: Engine):
+    """Apply all pending schema changes"""
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    drop_obsolete_indexes(engine)
+    hash_stored_refresh_tokens(engine)
+    create_trigram_indexes(engine)
+    create_member_search_index(engine)
@@ -3,7 +3,7 @@ Authentication Models
 Database models for user authentication and authorization
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, CHAR
 from sqlalchemy.orm import relationship
 from sqlalchemy import func
 from database import Base
@@ -18,6 +18,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Bumped whenever the account or its roles change; access tokens carrying an older value are not trusted
+    token_version = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -53,13 +55,19 @@ class UserRole(Base):
     user = relationship("User", back_populates="user_roles")
     role = relationship("Role", back_populates="user_roles")
 
+    __table_args__ = (
+        # Role names of a page of users, and users holding a role
+        Index('ix_user_roles_user_id_role_id', 'user_id', 'role_id'),
+        Index('ix_user_roles_role_id', 'role_id'),
+    )
+
 
 class RefreshToken(Base):
-    """Refresh tokens for JWT"""
+    """Refresh tokens for JWT (only a SHA-256 of each token is stored)"""
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    token = Column(String(255), unique=True, nullable=False)
+    token_hash = Column(CHAR(64), nullable=False)  # login.security.hash_refresh_token
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_revoked = Column(Boolean, default=False)
@@ -67,3 +75,13 @@ class RefreshToken(Base):
     
     # Relationships
     user = relationship("User", back_populates="refresh_tokens")
+
+    __table_args__ = (
+        # Verification reads the token's user and validity from the index alone
+        Index(
+            'ix_refresh_tokens_token_hash', 'token_hash', unique=True,
+            postgresql_include=['user_id', 'expires_at', 'is_revoked']
+        ),
+        # Purge of expired tokens
+        Index('ix_refresh_tokens_expires_at', 'expires_at'),
+    )
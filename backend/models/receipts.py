@@ -3,7 +3,7 @@ Receipt models for the donation management system
 Matches the PostgreSQL receipts table schema
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, CheckConstraint, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, Text, CheckConstraint, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -52,6 +52,8 @@ class Receipt(Base):
     __table_args__ = (
         CheckConstraint("payment_mode IN ('Cash', 'Check', 'Online')", name='check_payment_mode'),
         CheckConstraint("status IN ('completed', 'cancelled')", name='check_status'),
+        # Keyset pagination order: (receipt_date DESC, id DESC)
+        Index('ix_receipts_receipt_date_id', 'receipt_date', 'id'),
     )
     
     def __repr__(self):
@@ -80,3 +82,37 @@ class Receipt(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
+
+
+class ReceiptSequence(Base):
+    """Receipt number counter per creator code and year (e.g. RC1/2025)"""
+    __tablename__ = "receipt_sequences"
+    
+    creator_code = Column(String(20), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ReceiptSequence(creator_code='{self.creator_code}', year={self.year}, last_value={self.last_value})>"
+
+
+
+class ReceiptDailyRollup(Base):
+    """Receipt counts and amounts per day, creator, payment mode and purpose"""
+    __tablename__ = "receipt_daily_rollup"
+    
+    rollup_date = Column(Date, primary_key=True)
+    created_by = Column(Integer, primary_key=True)
+    payment_mode = Column(String(10), primary_key=True)
+    # Receipts without a purpose are rolled up under ''
+    purpose = Column(String(500), primary_key=True, default='')
+    
+    receipt_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(15, 2), nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    completed_amount = Column(Numeric(15, 2), nullable=False, default=0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    cancelled_amount = Column(Numeric(15, 2), nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ReceiptDailyRollup(date={self.rollup_date}, created_by={self.created_by}, payment_mode='{self.payment_mode}', total={self.total_amount})>"
@@ -1,6 +1,6 @@
 from sqlalchemy import (
-    Column, Integer, String, Date, Boolean, DECIMAL,
-    ForeignKey, DateTime, func, Enum as ENUM
+    Column, Integer, String, Text, Date, Boolean, DECIMAL,
+    ForeignKey, DateTime, Index, func, literal_column, Enum as ENUM
 )
 from sqlalchemy.orm import relationship
 from database import Base
@@ -61,5 +61,24 @@ class User_data(Base):
     status = Column(user_status_enum, default="Active", nullable=True)
     type = Column(user_type_enum, default="ALL", nullable=True)
 
+    # Normalized names, village and mobile digits, maintained by
+    # manager.member_search and indexed for full-text prefix search
+    search_text = Column(Text)
+    # The village's name, copied with search_text so the listing sorts without a join
+    village_name = Column(String(50))
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     modified_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Listing sort keys over live rows; the expressions must match
+        # manager.user_data.user_data_sort_keys for the planner to use it
+        Index(
+            "ix_user_data_listing_keys",
+            type.is_(None), func.coalesce(type, literal_column("'ALL'")),
+            village_name.is_(None), func.coalesce(village_name, literal_column("''")),
+            name.is_(None), func.coalesce(name, literal_column("''")),
+            user_id,
+            postgresql_where=(delete_flag == False)
+        ),
+    )
@@ -0,0 +1,32 @@
+"""
+Receipt Rollup Rebuild Script
+Recomputes receipt_daily_rollup from the receipts table
+
+Run after importing receipts directly into the database, or to backfill:
+    python rebuild_receipt_rollup.py
+"""
+
+from database import engine, SessionLocal
+from models import auth, receipts
+from manager.receipt_rollup import rebuild_receipt_daily_rollup
+
+
+def main():
+    """Create the rollup table if needed and rebuild its contents"""
+    receipts.Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    
+    try:
+        print("🔧 Rebuilding receipt_daily_rollup...")
+        rows = rebuild_receipt_daily_rollup(db)
+        print(f"✅ Rollup rebuilt: {rows} rows")
+    except Exception as e:
+        print(f"\n❌ Error during rollup rebuild: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,16 @@ Authentication Router
 HTTP endpoints for authentication operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from models.auth import User
+from login.principal import Principal
 from sqlalchemy.orm import Session
-from typing import Annotated
+from typing import Annotated, Optional
 
 from database import get_db
-from api_request_response.auth import UserLogin, UserCreate, UserRegister, TokenRefresh, Token, UserUpdate
+from api_request_response.auth import UserLogin, UserCreate, UserRegister, TokenRefresh, Token, UserUpdate, RoleAssignUsers
 from login.dependencies import get_current_user, require_admin
+from login.rate_limit import login_rate_limiter
 from controller import auth as auth_controller
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -19,11 +20,26 @@ db_dependency = Annotated[Session, Depends(get_db)]
 
 
 @router.post("/login", response_model=Token, status_code=status.HTTP_200_OK)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     OAuth2 compatible token login endpoint.
     Login with username and password to get access token.
-    """
+    
+    Sync handler: runs in the threadpool, and bcrypt runs in the bounded password
+    pool, so logins never block the event loop. Attempts are rate limited per
+    username and client IP, per username, and per client IP (429 with Retry-After
+    when exceeded).
+    """
+    # The real client address: uvicorn runs with --proxy-headers behind the proxy
+    client_ip = request.client.host if request.client else None
+    retry_after = login_rate_limiter.acquire(form_data.username, client_ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+    
     try:
         # Convert form data to our UserLogin model
         user_creds = UserLogin(username=form_data.username, password=form_data.password)
@@ -55,7 +71,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister, db: db_dependency):
+def register(user_data: UserRegister, db: db_dependency):
     """
     User registration endpoint
     Creates new user with default user_data_viewer role
@@ -68,10 +84,10 @@ async def register(user_data: UserRegister, db: db_dependency):
 
 
 @router.post("/create-user", status_code=status.HTTP_201_CREATED)
-async def create_user(
+def create_user(
     user_data: UserCreate, 
     db: db_dependency,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Admin user creation endpoint
@@ -85,9 +101,11 @@ async def create_user(
 
 
 @router.post("/refresh", status_code=status.HTTP_200_OK)
-async def refresh_token(token_data: TokenRefresh, db: db_dependency):
+def refresh_token(token_data: TokenRefresh, db: db_dependency):
     """
     Refresh access token using refresh token
+    Refresh tokens are single use: the response carries a new refresh_token
+    and the one presented is revoked.
     """
     try:
         response = auth_controller.refresh_token_controller(token_data.refresh_token, db)
@@ -97,7 +115,7 @@ async def refresh_token(token_data: TokenRefresh, db: db_dependency):
 
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
-async def logout(token_data: TokenRefresh, db: db_dependency):
+def logout(token_data: TokenRefresh, db: db_dependency):
     """
     User logout endpoint
     Revokes the refresh token
@@ -110,9 +128,9 @@ async def logout(token_data: TokenRefresh, db: db_dependency):
 
 
 @router.get("/me", status_code=status.HTTP_200_OK)
-async def get_current_user_info(
+def get_current_user_info(
     db: db_dependency,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get current authenticated user details
@@ -126,27 +144,32 @@ async def get_current_user_info(
 
 
 @router.get("/users", status_code=status.HTTP_200_OK)
-async def get_all_users(
+def get_all_users(
     db: db_dependency,
-    current_user: User = Depends(require_admin)
+    page_num: Optional[int] = Query(1, ge=1, description="Page number"),
+    page_size: Optional[int] = Query(50, ge=1, le=1000, description="Users per page"),
+    username: Optional[str] = Query(None, description="Search by username"),
+    role: Optional[str] = Query(None, description="Only users holding this role"),
+    current_user: Principal = Depends(require_admin)
 ):
     """
-    Get all users (admin only)
+    Get users with their roles, paginated (admin only)
+    Two queries per page: the users with their total count, and their roles.
     Requires: admin role
     """
     try:
-        response = auth_controller.get_all_users_controller(db)
+        response = auth_controller.get_all_users_controller(db, page_num, page_size, username, role)
         return response
     except Exception as e:
         raise
 
 
 @router.put("/users/{user_id}", status_code=status.HTTP_200_OK)
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: db_dependency,
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Update user details (admin only)
@@ -162,3 +185,25 @@ async def update_user(
         return response
     except Exception as e:
         raise
+
+
+@router.post("/roles/{role_name}/users", status_code=status.HTTP_200_OK)
+def assign_role_to_users(
+    role_name: str,
+    assign_data: RoleAssignUsers,
+    db: db_dependency,
+    current_user: Principal = Depends(require_admin)
+):
+    """
+    Assign one role to many users at once (admin only)
+    For onboarding batches, e.g. a group of new receipt creators.
+    Users already holding the role are left unchanged; unknown user IDs
+    are reported in not_found.
+    
+    Requires: admin role
+    """
+    try:
+        response = auth_controller.assign_role_to_users_controller(role_name, assign_data, db)
+        return response
+    except Exception as e:
+        raise
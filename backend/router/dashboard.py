@@ -0,0 +1,43 @@
+"""
+Dashboard Router
+Single endpoint with everything the home view needs on first paint
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Annotated
+
+from database import get_db
+from login.dependencies import get_current_user
+from login.principal import Principal
+from controller import dashboard as dashboard_controller
+
+router = APIRouter(tags=["dashboard"])
+db_dependency = Annotated[Session, Depends(get_db)]
+
+
+@router.get("/dashboard", status_code=status.HTTP_200_OK)
+def get_dashboard(
+    db: db_dependency,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get the current user and the home view widgets in one request
+
+    Replaces separate calls to /auth/me, /user_data/stats,
+    /receipts/stats/summary and /receipts/creators. Widgets are included
+    according to the caller's permissions:
+    - **user_data_stats**: users who can read user data
+    - **receipt_stats**: users who can read or create receipts (receipt
+      creators see their own receipts only)
+    - **receipt_creators**: users who can read all receipts
+
+    Widget values may be up to 30 seconds old (cached per role).
+    """
+    try:
+        response = dashboard_controller.get_dashboard_controller(db, current_user)
+        return response
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
@@ -4,10 +4,12 @@ FastAPI HTTP endpoints for receipt operations
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List, Annotated
 
-from database import get_db
+from database import get_db, get_async_db, async_db_variant, with_sync_db
 from api_request_response.receipts import (
     ReceiptCreate, ReceiptUpdate, ReceiptResponse, ReceiptFilter,
     ReceiptCreateResponse, ReceiptUpdateResponse, ReceiptListResponse, ReceiptDeleteResponse
@@ -15,15 +17,16 @@ from api_request_response.receipts import (
 from login.dependencies import get_current_user, require_permission
 from login.permissions import Permission
 from controller import receipts as receipts_controller
-from models.auth import User
+from login.principal import Principal
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 db_dependency = Annotated[Session, Depends(get_db)]
-user_dependency = Annotated[User, Depends(get_current_user)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+user_dependency = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_receipt(
+def create_receipt(
     receipt_data: ReceiptCreate,
     db: db_dependency,
     current_user: user_dependency,
@@ -36,11 +39,8 @@ async def create_receipt(
     """
     try:
         # Get user roles and check permissions gracefully
-        from manager.auth import get_user_roles
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        user_roles = get_user_roles(db, current_user.id)
-        has_create_receipts = user_has_permission(user_roles, Perm.CREATE_RECEIPTS)
+        user_roles = current_user.roles
+        has_create_receipts = current_user.can(Permission.CREATE_RECEIPTS)
         
         if not has_create_receipts:
             return {
@@ -48,7 +48,7 @@ async def create_receipt(
                 "message": "You don't have permission to create receipts.",
                 "error_code": "PERMISSION_DENIED",
                 "available_roles": ["receipt_creator", "admin"],
-                "user_roles": user_roles
+                "user_roles": sorted(user_roles)
             }
         
         response = receipts_controller.create_receipt_controller(
@@ -62,7 +62,7 @@ async def create_receipt(
 
 
 @router.get("/creators", status_code=status.HTTP_200_OK)
-async def get_receipt_creators(
+def get_receipt_creators(
     db: db_dependency,
     current_user: user_dependency,
 ):
@@ -76,18 +76,14 @@ async def get_receipt_creators(
     """
     try:
         # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
+        user_roles = current_user.roles
         
         print(f"DEBUG: /receipts/creators called by {current_user.username} with roles {user_roles}")
         
         # Check permissions - only admin and receipt_report_viewer should access this
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
-        is_receipt_creator = "receipt_creator" in user_roles
+        has_read_receipts = current_user.can(Permission.READ_RECEIPTS)
         
-        print(f"DEBUG: has_read_receipts={has_read_receipts}, is_receipt_creator={is_receipt_creator}")
+        print(f"DEBUG: has_read_receipts={has_read_receipts}")
         
         # Receipt creators should NOT have access to this filter
         # They can only see their own receipts, so creator filtering doesn't make sense
@@ -130,39 +126,52 @@ async def get_receipt_creators(
         }
 
 
-@router.get("/{receipt_id}", status_code=status.HTTP_200_OK)
-async def get_receipt(
-    receipt_id: int,
+@router.get("/search", status_code=status.HTTP_200_OK)
+def search_receipts(
     db: db_dependency,
     current_user: user_dependency,
+    q: str = Query(..., min_length=1, description="Donor name, receipt number, village or residence"),
+    limit: Optional[int] = Query(20, ge=1, le=100, description="Maximum number of results"),
+    payment_mode: Optional[str] = Query(None, description="Filter by payment mode"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
+    created_by: Optional[int] = Query(None, description="Filter by creator"),
 ):
     """
-    Get single receipt by ID
+    Search receipts ranked by similarity to the search text
     
-    **Permissions**:
-    - **admin**: Can view all receipts
-    - **receipt_report_viewer**: Can view all receipts
-    - **receipt_creator**: Can only view their own receipts
+    **Permissions**: same as listing receipts
+    - **admin/receipt_report_viewer**: Search all receipts
+    - **receipt_creator**: Search only their own receipts
     """
     try:
         # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
+        user_roles = current_user.roles
         
-        # Check basic permission (admin/receipt_report_viewer get READ_RECEIPTS, receipt_creator handles own receipts)
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        if not (user_has_permission(user_roles, Perm.READ_RECEIPTS) or "receipt_creator" in user_roles):
+        if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
             return {
                 "status": "error",
-                "message": "You don't have permission to view this receipt.",
+                "message": "You don't have permission to view receipts.",
                 "error_code": "PERMISSION_DENIED",
                 "available_roles": ["receipt_creator", "receipt_report_viewer", "admin"],
-                "user_roles": user_roles
+                "user_roles": sorted(user_roles),
+                "data": []
             }
         
-        response = receipts_controller.get_receipt_controller(
-            receipt_id, db, current_user.id, user_roles
+        filters = None
+        if any([payment_mode, status, date_from, date_to, created_by]):
+            from datetime import datetime
+            filters = ReceiptFilter(
+                payment_mode=payment_mode,
+                status=status,
+                date_from=datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None,
+                date_to=datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None,
+                created_by=created_by
+            )
+        
+        response = receipts_controller.search_receipts_controller(
+            db, q, limit, filters, current_user
         )
         
         return response
@@ -173,12 +182,11 @@ async def get_receipt(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def list_receipts(
+@router.get("/analytics/timeseries", status_code=status.HTTP_200_OK)
+def get_receipt_timeseries(
     db: db_dependency,
     current_user: user_dependency,
-    page_num: Optional[int] = Query(1, ge=1, description="Page number"),
-    page_size: Optional[int] = Query(10, ge=1, le=10000, description="Items per page"),
+    bucket: str = Query("month", pattern="^(day|week|month|fy)$", description="day, week, month or fy (April-March)"),
     donor_name: Optional[str] = Query(None, description="Filter by donor name"),
     village: Optional[str] = Query(None, description="Filter by village"),
     payment_mode: Optional[str] = Query(None, description="Filter by payment mode"),
@@ -187,44 +195,31 @@ async def list_receipts(
     date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
     date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     created_by: Optional[int] = Query(None, description="Filter by creator"),
-    pdf: Optional[bool] = Query(False, description="Export as PDF"),
-    csv: Optional[bool] = Query(False, description="Export as CSV"),
 ):
     """
-    Get paginated list of receipts with optional filters, or export as PDF/CSV
+    Get receipt counts and amounts per time bucket as columnar arrays
     
-    **Permissions**:
-    - **admin**: Can see all receipts and use all filters
-    - **receipt_report_viewer**: Can see all receipts, limited filters
-    - **receipt_creator**: Can only see their own receipts, limited filters
+    **Permissions**: same as listing receipts
+    - **admin/receipt_report_viewer**: All receipts
+    - **receipt_creator**: Only their own receipts
     
-    **Export**: Set pdf=true or csv=true to download all filtered data
+    **Response data**: bucket_start, receipt_count, total_amount, completed_count and
+    completed_amount are parallel arrays with one entry per bucket that has receipts.
     """
     try:
         # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
-        
-        # Check basic permission (admin/receipt_report_viewer get READ_RECEIPTS, receipt_creator handles own receipts)
-        from login.permissions import user_has_permission, Permission as Perm
+        user_roles = current_user.roles
         
-        if not (user_has_permission(user_roles, Perm.READ_RECEIPTS) or "receipt_creator" in user_roles):
+        if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
             return {
                 "status": "error",
                 "message": "You don't have permission to view receipts.",
                 "error_code": "PERMISSION_DENIED",
                 "available_roles": ["receipt_creator", "receipt_report_viewer", "admin"],
-                "user_roles": user_roles,
-                "data": {
-                    "receipts": [],
-                    "total_count": 0,
-                    "page_num": page_num,
-                    "page_size": page_size,
-                    "total_pages": 0
-                }
+                "user_roles": sorted(user_roles),
+                "data": None
             }
         
-        # Create filters object
         filters = None
         if any([donor_name, village, payment_mode, donation1_purpose, status, date_from, date_to, created_by]):
             from datetime import datetime
@@ -239,8 +234,212 @@ async def list_receipts(
                 created_by=created_by
             )
         
+        response = receipts_controller.get_receipt_timeseries_controller(
+            db, bucket, filters, current_user
+        )
+        
+        return response
+        
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def get_receipt_async(
+    receipt_id: int,
+    async_db: async_db_dependency,
+    current_user: user_dependency,
+):
+    """
+    Get single receipt by ID
+    
+    **Permissions**:
+    - **admin**: Can view all receipts
+    - **receipt_report_viewer**: Can view all receipts
+    - **receipt_creator**: Can only view their own receipts
+    """
+    if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
+        return receipt_permission_denied("You don't have permission to view this receipt.", current_user)
+    
+    try:
+        return await receipts_controller.get_receipt_controller_async(
+            receipt_id, async_db, current_user
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{receipt_id}", status_code=status.HTTP_200_OK)
+@async_db_variant("get_receipt", get_receipt_async)
+def get_receipt(
+    receipt_id: int,
+    db: db_dependency,
+    current_user: user_dependency,
+):
+    """
+    Get single receipt by ID
+    
+    **Permissions**:
+    - **admin**: Can view all receipts
+    - **receipt_report_viewer**: Can view all receipts
+    - **receipt_creator**: Can only view their own receipts
+    """
+    try:
+        # Check basic permission (admin/receipt_report_viewer get READ_RECEIPTS, receipt_creator handles own receipts)
+        if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
+            return receipt_permission_denied("You don't have permission to view this receipt.", current_user)
+        
+        response = receipts_controller.get_receipt_controller(
+            receipt_id, db, current_user
+        )
+        
+        return response
+        
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def receipt_list_filters(
+    donor_name: Optional[str] = Query(None, description="Filter by donor name"),
+    village: Optional[str] = Query(None, description="Filter by village"),
+    payment_mode: Optional[str] = Query(None, description="Filter by payment mode"),
+    donation1_purpose: Optional[str] = Query(None, description="Filter by donation purpose"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    date_from: Optional[str] = Query(None, description="Filter from date (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Filter to date (YYYY-MM-DD)"),
+    created_by: Optional[int] = Query(None, description="Filter by creator"),
+) -> Optional[ReceiptFilter]:
+    """Receipt listing filters from the query string (None when no filter is set)"""
+    if not any([donor_name, village, payment_mode, donation1_purpose, status, date_from, date_to, created_by]):
+        return None
+    
+    from datetime import datetime
+    try:
+        return ReceiptFilter(
+            donor_name=donor_name,
+            village=village,
+            payment_mode=payment_mode,
+            donation1_purpose=donation1_purpose,
+            status=status,
+            date_from=datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None,
+            date_to=datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None,
+            created_by=created_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def receipt_permission_denied(message: str, current_user: Principal, **extra) -> dict:
+    """Error payload returned when a user may not read receipts"""
+    return {
+        "status": "error",
+        "message": message,
+        "error_code": "PERMISSION_DENIED",
+        "available_roles": ["receipt_creator", "receipt_report_viewer", "admin"],
+        "user_roles": sorted(current_user.roles),
+        **extra
+    }
+
+
+def empty_receipt_listing(page_num: int, page_size: int) -> dict:
+    """Listing data returned alongside a permission error"""
+    return {
+        "receipts": [],
+        "total_count": 0,
+        "page_num": page_num,
+        "page_size": page_size,
+        "total_pages": 0
+    }
+
+
+async def list_receipts_async(
+    async_db: async_db_dependency,
+    current_user: user_dependency,
+    filters: Annotated[Optional[ReceiptFilter], Depends(receipt_list_filters)],
+    page_num: Optional[int] = Query(1, ge=1, description="Page number"),
+    page_size: Optional[int] = Query(10, ge=1, le=10000, description="Items per page"),
+    pdf: Optional[bool] = Query(False, description="Export as PDF"),
+    csv: Optional[bool] = Query(False, description="Export as CSV"),
+    keyset: Optional[bool] = Query(False, description="Use cursor pagination instead of page_num"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """
+    Get paginated list of receipts with optional filters, or export as PDF/CSV
+    
+    **Permissions**:
+    - **admin**: Can see all receipts and use all filters
+    - **receipt_report_viewer**: Can see all receipts, limited filters
+    - **receipt_creator**: Can only see their own receipts, limited filters
+    
+    **Export**: Set pdf=true or csv=true to download all filtered data
+    
+    **Cursor pagination**: Set keyset=true for the first page, then pass the returned
+    next_cursor as cursor to get the following page. next_cursor is null on the last page.
+    """
+    if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
+        return receipt_permission_denied(
+            "You don't have permission to view receipts.", current_user,
+            data=empty_receipt_listing(page_num, page_size)
+        )
+    
+    try:
+        # Exports stream from the sync engine in the threadpool
+        if pdf or csv:
+            return await run_in_threadpool(
+                with_sync_db, receipts_controller.get_receipts_controller,
+                filters, page_num, page_size, current_user, pdf, csv
+            )
+        
+        return await receipts_controller.get_receipts_controller_async(
+            async_db, filters, page_num, page_size, current_user, keyset, cursor
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+@async_db_variant("list_receipts", list_receipts_async)
+def list_receipts(
+    db: db_dependency,
+    current_user: user_dependency,
+    filters: Annotated[Optional[ReceiptFilter], Depends(receipt_list_filters)],
+    page_num: Optional[int] = Query(1, ge=1, description="Page number"),
+    page_size: Optional[int] = Query(10, ge=1, le=10000, description="Items per page"),
+    pdf: Optional[bool] = Query(False, description="Export as PDF"),
+    csv: Optional[bool] = Query(False, description="Export as CSV"),
+    keyset: Optional[bool] = Query(False, description="Use cursor pagination instead of page_num"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    """
+    Get paginated list of receipts with optional filters, or export as PDF/CSV
+    
+    **Permissions**:
+    - **admin**: Can see all receipts and use all filters
+    - **receipt_report_viewer**: Can see all receipts, limited filters
+    - **receipt_creator**: Can only see their own receipts, limited filters
+    
+    **Export**: Set pdf=true or csv=true to download all filtered data
+    
+    **Cursor pagination**: Set keyset=true for the first page, then pass the returned
+    next_cursor as cursor to get the following page. next_cursor is null on the last page.
+    """
+    try:
+        # Check basic permission (admin/receipt_report_viewer get READ_RECEIPTS, receipt_creator handles own receipts)
+        if not (current_user.can(Permission.READ_RECEIPTS) or current_user.can(Permission.CREATE_RECEIPTS)):
+            return receipt_permission_denied(
+                "You don't have permission to view receipts.", current_user,
+                data=empty_receipt_listing(page_num, page_size)
+            )
+        
         response = receipts_controller.get_receipts_controller(
-            db, filters, page_num, page_size, current_user.id, user_roles, pdf, csv
+            db, filters, page_num, page_size, current_user, pdf, csv, keyset, cursor
         )
         
         return response
@@ -252,7 +451,7 @@ async def list_receipts(
 
 
 @router.put("/{receipt_id}", status_code=status.HTTP_200_OK)
-async def update_receipt(
+def update_receipt(
     receipt_id: int,
     updated_data: ReceiptUpdate,
     db: db_dependency,
@@ -266,11 +465,8 @@ async def update_receipt(
     """
     try:
         # Get user roles and check permissions gracefully
-        from manager.auth import get_user_roles
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        user_roles = get_user_roles(db, current_user.id)
-        has_update_receipts = user_has_permission(user_roles, Perm.UPDATE_RECEIPTS)
+        user_roles = current_user.roles
+        has_update_receipts = current_user.can(Permission.UPDATE_RECEIPTS)
         
         if not has_update_receipts:
             return {
@@ -278,11 +474,11 @@ async def update_receipt(
                 "message": "You don't have permission to update receipts.",
                 "error_code": "PERMISSION_DENIED",
                 "available_roles": ["receipt_creator", "admin"],
-                "user_roles": user_roles
+                "user_roles": sorted(user_roles)
             }
         
         response = receipts_controller.update_receipt_controller(
-            receipt_id, updated_data, db, current_user.id, user_roles
+            receipt_id, updated_data, db, current_user
         )
         
         return response
@@ -294,7 +490,7 @@ async def update_receipt(
 
 
 @router.delete("/{receipt_id}", status_code=status.HTTP_200_OK)
-async def delete_receipt(
+def delete_receipt(
     receipt_id: int,
     db: db_dependency,
     current_user: user_dependency,
@@ -307,11 +503,8 @@ async def delete_receipt(
     """
     try:
         # Get user roles and check permissions gracefully
-        from manager.auth import get_user_roles
-        from login.permissions import user_has_permission, Permission as Perm
-        
-        user_roles = get_user_roles(db, current_user.id)
-        has_delete_receipts = user_has_permission(user_roles, Perm.DELETE_RECEIPTS)
+        user_roles = current_user.roles
+        has_delete_receipts = current_user.can(Permission.DELETE_RECEIPTS)
         
         if not has_delete_receipts:
             return {
@@ -319,11 +512,11 @@ async def delete_receipt(
                 "message": "You don't have permission to delete receipts.",
                 "error_code": "PERMISSION_DENIED",
                 "available_roles": ["receipt_creator", "admin"],
-                "user_roles": user_roles
+                "user_roles": sorted(user_roles)
             }
         
         response = receipts_controller.delete_receipt_controller(
-            receipt_id, db, current_user.id, user_roles
+            receipt_id, db, current_user
         )
         
         return response
@@ -335,7 +528,7 @@ async def delete_receipt(
 
 
 @router.get("/stats/summary", status_code=status.HTTP_200_OK)
-async def get_receipt_statistics(
+def get_receipt_statistics(
     db: db_dependency,
     current_user: user_dependency,
 ):
@@ -347,12 +540,8 @@ async def get_receipt_statistics(
     - **receipt_creator**: See only their own receipts stats
     """
     try:
-        # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
-        
         response = receipts_controller.get_receipt_stats_controller(
-            db, current_user.id, user_roles
+            db, current_user
         )
         
         return response
@@ -364,7 +553,7 @@ async def get_receipt_statistics(
 
 
 @router.get("/debug/database", status_code=status.HTTP_200_OK)
-async def debug_database(
+def debug_database(
     db: db_dependency,
     current_user: user_dependency,
 ):
@@ -398,12 +587,12 @@ async def debug_database(
 
 
 @router.get("/reports/dropdown", status_code=status.HTTP_200_OK)
-async def get_receipt_reports_dropdown(
+def get_receipt_reports_dropdown(
     db: db_dependency,
     current_user: user_dependency,
 ):
     """
-    Get users with role IDs 1 and 5 for receipt reports dropdown
+    Get admins and receipt creators for the receipt reports dropdown
     
     **Permissions**:
     - **admin**: Can access dropdown for filtering reports
@@ -411,12 +600,8 @@ async def get_receipt_reports_dropdown(
     - **receipt_creator**: No access (they only see own receipts)
     """
     try:
-        # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
-        
         response = receipts_controller.get_receipt_reports_dropdown_controller(
-            db, current_user.id, user_roles
+            db, current_user
         )
         
         return response
@@ -430,19 +615,17 @@ async def get_receipt_reports_dropdown(
 
 
 @router.get("/debug/user-permissions", status_code=status.HTTP_200_OK)
-async def debug_user_permissions(
+def debug_user_permissions(
     db: db_dependency,
     current_user: user_dependency,
 ):
     """Debug endpoint to check user permissions and data"""
     try:
-        from manager.auth import get_user_roles
-        from login.permissions import user_has_permission, Permission as Perm
         from models.receipts import Receipt
         from models.auth import User
         
-        user_roles = get_user_roles(db, current_user.id)
-        has_read_receipts = user_has_permission(user_roles, Perm.READ_RECEIPTS)
+        user_roles = current_user.roles
+        has_read_receipts = current_user.can(Permission.READ_RECEIPTS)
         
         # Check receipts and creators
         total_receipts = db.query(Receipt).count()
@@ -454,9 +637,9 @@ async def debug_user_permissions(
             "data": {
                 "user_id": current_user.id,
                 "username": current_user.username,
-                "user_roles": user_roles,
+                "user_roles": sorted(user_roles),
                 "has_read_receipts": has_read_receipts,
-                "is_receipt_creator": "receipt_creator" in user_roles,
+                "sees_own_receipts_only": not has_read_receipts,
                 "total_receipts": total_receipts,
                 "available_creators": [{"id": c.id, "username": c.username} for c in creators],
                 "creators_count": len(creators)
@@ -4,24 +4,29 @@ Handles HTTP requests for user data operations
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Annotated, Optional, List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from database import get_db, get_async_db, async_db_variant, with_sync_db
 from api_request_response.user_data import User_dataCreate, User_dataUpdate
 from controller import user_data as user_data_controller
 from login.dependencies import require_user_data_viewer, require_user_data_editor, get_current_user
-from models.auth import User
+from login.principal import Principal
+from login.permissions import Permission
+from utils.json_response import json_response
 
 router = APIRouter()
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 @router.post("/user_data/", status_code=status.HTTP_201_CREATED)
 def create_user_data(
     user_data: User_dataCreate, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to create a new user data record.
@@ -34,7 +39,41 @@ def create_user_data(
         raise
 
 
+async def read_user_data_async(
+    async_db: async_db_dependency,
+    page_num: Optional[int] = 1,
+    page_size: Optional[int] = 10,
+    name: Optional[str] = Query(None),
+    type_filter: Optional[List[str]] = Query(None),
+    area_ids: Optional[List[int]] = Query(None),
+    village_ids: Optional[List[int]] = Query(None),
+    user_ids: Optional[List[int]] = Query(None),
+    pdf: Optional[bool] = False,
+    csv: Optional[bool] = False,
+    keyset: Optional[bool] = False,
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(require_user_data_viewer)
+):
+    """
+    API to get user data records with filtering and pagination.
+    Pass keyset=true for cursor pagination, then the returned next_cursor as cursor.
+    Requires: user_data_viewer, user_data_editor, or admin role
+    """
+    # Exports stream from the sync engine in the threadpool
+    if pdf or csv:
+        return await run_in_threadpool(
+            with_sync_db, user_data_controller.get_user_data_controller,
+            page_num, page_size, name, type_filter, area_ids, village_ids, user_ids, pdf, csv
+        )
+
+    response = await user_data_controller.get_user_data_controller_async(
+        async_db, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids, keyset, cursor
+    )
+    return json_response(response)
+
+
 @router.get("/user_data/", status_code=status.HTTP_200_OK)
+@async_db_variant("read_user_data", read_user_data_async)
 def read_user_data(
     db: db_dependency,
     page_num: Optional[int] = 1,
@@ -46,15 +85,43 @@ def read_user_data(
     user_ids: Optional[List[int]] = Query(None),
     pdf: Optional[bool] = False,
     csv: Optional[bool] = False,
-    current_user: User = Depends(require_user_data_viewer)
+    keyset: Optional[bool] = False,
+    cursor: Optional[str] = Query(None),
+    current_user: Principal = Depends(require_user_data_viewer)
 ):
     """
     API to get user data records with filtering and pagination.
+    Pass keyset=true for cursor pagination, then the returned next_cursor as cursor.
     Requires: user_data_viewer, user_data_editor, or admin role
     """
     try:
         response = user_data_controller.get_user_data_controller(
-            db, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids, pdf, csv
+            db, page_num, page_size, name, type_filter, area_ids, village_ids, user_ids, pdf, csv,
+            keyset, cursor
+        )
+        return json_response(response)
+    except Exception as e:
+        raise
+
+
+@router.get("/user_data/search", status_code=status.HTTP_200_OK)
+def search_user_data(
+    db: db_dependency,
+    q: str = Query(..., min_length=1),
+    limit: Optional[int] = Query(20, ge=1, le=100),
+    type_filter: Optional[List[str]] = Query(None),
+    area_ids: Optional[List[int]] = Query(None),
+    village_ids: Optional[List[int]] = Query(None),
+    current_user: Principal = Depends(require_user_data_viewer)
+):
+    """
+    API to search members by the start of their names, surname, village or mobile number.
+    Hits are ranked by relevance, whole-word matches first.
+    Requires: user_data_viewer, user_data_editor, or admin role
+    """
+    try:
+        response = user_data_controller.search_user_data_controller(
+            db, q, limit, type_filter, area_ids, village_ids
         )
         return response
     except Exception as e:
@@ -66,7 +133,7 @@ def update_user_data(
     user_id: int, 
     updated_user_data: User_dataUpdate, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to update a user data record.
@@ -83,7 +150,7 @@ def update_user_data(
 def delete_user_data(
     user_id: int, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to soft delete a user data record.
@@ -99,7 +166,7 @@ def delete_user_data(
 @router.get("/user_data/stats", status_code=status.HTTP_200_OK)
 def get_user_data_stats(
     db: db_dependency,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     API to get user data statistics.
@@ -110,12 +177,10 @@ def get_user_data_stats(
     """
     try:
         # Get user roles
-        from manager.auth import get_user_roles
-        user_roles = get_user_roles(db, current_user.id)
+        user_roles = sorted(current_user.roles)
         
         # Check if user has permission for user data statistics
-        allowed_roles = ["admin", "user_data_editor", "user_data_viewer"]
-        has_user_data_access = any(role in allowed_roles for role in user_roles)
+        has_user_data_access = current_user.can(Permission.READ_USER_DATA)
         
         if has_user_data_access:
             # User has permission - return real statistics
@@ -11,7 +11,8 @@ from database import get_db
 from api_request_response.village_area import VillageBase, AreaBase
 from controller import village_area as village_area_controller
 from login.dependencies import require_user_data_viewer, require_user_data_editor
-from models.auth import User
+from login.principal import Principal
+from utils.json_response import json_response
 
 router = APIRouter()
 db_dependency = Annotated[Session, Depends(get_db)]
@@ -19,10 +20,10 @@ db_dependency = Annotated[Session, Depends(get_db)]
 
 # --- Village Routes ---
 @router.post("/village/", status_code=status.HTTP_201_CREATED)
-async def create_village(
+def create_village(
     village: VillageBase, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to create a new village record.
@@ -36,11 +37,11 @@ async def create_village(
 
 
 @router.get("/village/", status_code=status.HTTP_200_OK)
-async def read_village(
+def read_village(
     db: db_dependency,
     village: Optional[str] = None,
     page_num: Optional[int] = 1,
-    current_user: User = Depends(require_user_data_viewer)
+    current_user: Principal = Depends(require_user_data_viewer)
 ):
     """
     API to get village records with user count and pagination.
@@ -48,16 +49,16 @@ async def read_village(
     """
     try:
         response = village_area_controller.get_villages_controller(db, village, page_num)
-        return response
+        return json_response(response)
     except Exception as e:
         raise
 
 
 @router.delete("/village/{village_id}", status_code=status.HTTP_200_OK)
-async def delete_village(
+def delete_village(
     village_id: int, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to delete a village record.
@@ -72,10 +73,10 @@ async def delete_village(
 
 # --- Area Routes ---
 @router.post("/area/", status_code=status.HTTP_201_CREATED)
-async def create_area(
+def create_area(
     area: AreaBase, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to create a new area record.
@@ -89,11 +90,11 @@ async def create_area(
 
 
 @router.get("/area/", status_code=status.HTTP_200_OK)
-async def read_area(
+def read_area(
     db: db_dependency,
     area: Optional[str] = None,
     page_num: Optional[int] = 1,
-    current_user: User = Depends(require_user_data_viewer)
+    current_user: Principal = Depends(require_user_data_viewer)
 ):
     """
     API to get area records with user count and pagination.
@@ -101,16 +102,16 @@ async def read_area(
     """
     try:
         response = village_area_controller.get_areas_controller(db, area, page_num)
-        return response
+        return json_response(response)
     except Exception as e:
         raise
 
 
 @router.delete("/area/{area_id}", status_code=status.HTTP_200_OK)
-async def delete_area(
+def delete_area(
     area_id: int, 
     db: db_dependency,
-    current_user: User = Depends(require_user_data_editor)
+    current_user: Principal = Depends(require_user_data_editor)
 ):
     """
     API to delete an area record.
@@ -0,0 +1,69 @@
+"""
+Query Fan-out
+Run independent reads of one request concurrently
+
+Each read is a function of a session. fan_out runs the first read on the
+request's own session and the others on short-lived sessions from the same
+engine in a small thread pool, so a request that needs N independent round
+trips to the database waits for the slowest one instead of their sum.
+The dashboard is the caller: its widgets are independent reads. The list
+endpoints are not, as they need one statement for the page and total and a
+creator lookup that depends on the page.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+import database
+
+
+FANOUT_WORKERS = 8
+
+_fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="query-fanout")
+
+
+def _pool_has_room(bind, extra_connections: int) -> bool:
+    """
+    Whether extra connections can be taken without eating into the overflow
+
+    Fan-out threads wait for connections while the request thread waits for
+    them; under load that could starve the pool, so reads run sequentially
+    once the steady pool is in use.
+    """
+    pool = bind.pool
+    if not isinstance(pool, QueuePool):
+        return True
+    return pool.checkedout() + extra_connections <= pool.size()
+
+
+def fan_out(db_session: Session, *reads: Callable[[Session], Any]) -> List[Any]:
+    """
+    Run independent read-only functions concurrently
+
+    Falls back to running them one after another on db_session for SQLite
+    (one writer, nothing to gain) and when the connection pool is busy.
+
+    Args:
+        db_session: The request's session; runs the first read
+        reads: Functions taking a session and returning a result. They must
+            not write, and ORM objects they return should have everything
+            the caller needs already loaded (their session is closed).
+
+    Returns:
+        Results in the order of reads
+    """
+    bind = db_session.get_bind()
+    if len(reads) < 2 or bind.dialect.name == "sqlite" or not _pool_has_room(bind, len(reads) - 1):
+        return [read(db_session) for read in reads]
+
+    def run(read):
+        with database.SessionLocal(bind=bind) as branch_session:
+            return read(branch_session)
+
+    futures = [_fanout_executor.submit(run, read) for read in reads[1:]]
+    first = reads[0](db_session)
+    return [first] + [future.result() for future in futures]
+
@@ -1,2 +1,86 @@
-# General helper functions - Keep empty for now
-# TODO: Add common utility functions used across the application
+"""
+General Helpers
+Common utility functions used across the application
+"""
+
+import base64
+import csv
+import json
+from io import StringIO
+from typing import Iterable, Iterator, Sequence, List, Any
+
+
+# Number of CSV rows buffered before a chunk is handed to the response
+CSV_CHUNK_ROWS = 500
+
+
+def iter_csv_chunks(
+    header: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_rows: int = CSV_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """
+    Encode rows as CSV and yield UTF-8 chunks for a StreamingResponse
+
+    The header is yielded on its own first so the download starts before
+    the first row is fetched. Only one chunk is held in memory at a time.
+
+    Args:
+        header: Column titles
+        rows: Iterable of row sequences (consumed lazily)
+        chunk_rows: Number of rows written per yielded chunk
+
+    Returns:
+        Iterator of encoded CSV chunks
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    writer.writerow(header)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode keyset pagination values as an opaque URL-safe cursor
+
+    Args:
+        values: JSON-serialisable sort key values of the last row on a page
+
+    Returns:
+        Cursor string
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
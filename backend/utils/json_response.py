@@ -0,0 +1,86 @@
+"""
+JSON Responses
+Default response class of the app: orjson when it is installed, stdlib json otherwise
+
+FastJSONResponse encodes datetime, date, Decimal, sets, enums and pydantic
+models itself, the way jsonable_encoder would. Handlers returning large
+listings of such values can wrap them in json_response() to skip FastAPI's
+jsonable_encoder pass altogether.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional; json_dumps falls back to the stdlib
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """Encode a value json/orjson cannot, matching jsonable_encoder's output"""
+    if isinstance(value, Decimal):
+        exponent = value.as_tuple().exponent
+        return int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_json_dumps(content: Any) -> bytes:
+    """Encode content with the json module (same output as Starlette's JSONResponse)"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=json_default,
+    ).encode("utf-8")
+
+
+def orjson_dumps(content: Any) -> bytes:
+    """Encode content with orjson (datetime and date natively, the rest via json_default)"""
+    return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+json_dumps = orjson_dumps if orjson is not None else stdlib_json_dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by json_dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200) -> Response:
+    """
+    Wrap a handler's result in a FastJSONResponse
+
+    FastAPI only runs jsonable_encoder over results that are not already a
+    Response, so this saves a full walk of large payloads. Responses (CSV
+    and PDF exports) are returned unchanged.
+
+    Args:
+        content: Handler result
+        status_code: HTTP status of the response
+
+    Returns:
+        Response to return from the handler
+    """
+    if isinstance(content, Response):
+        return content
+    return FastJSONResponse(content, status_code=status_code)
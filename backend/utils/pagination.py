@@ -0,0 +1,158 @@
+"""
+Pagination Helpers
+Fetch a page of rows and the total match count in a single statement
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, literal, select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+
+# Totals at or above this size are served from the cache while it is fresh,
+# so very large result sets are not counted again for every page
+LARGE_TOTAL_THRESHOLD = 10000
+TOTAL_CACHE_TTL_SECONDS = 60
+TOTAL_CACHE_MAX_ENTRIES = 512
+
+_total_cache: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+_total_cache_lock = threading.Lock()
+
+
+def _count_cache_key(query) -> str:
+    """Cache key for a filtered Query or select(): its SQL plus bound parameter values"""
+    compiled = getattr(query, "statement", query).compile()
+    return f"{compiled}|{sorted(compiled.params.items())!r}"
+
+
+def get_cached_total(query) -> Optional[int]:
+    """Return the cached total for a query if it is still fresh"""
+    key = _count_cache_key(query)
+    with _total_cache_lock:
+        cached = _total_cache.get(key)
+        if cached is None:
+            return None
+        total, stored_at = cached
+        if time.monotonic() - stored_at > TOTAL_CACHE_TTL_SECONDS:
+            del _total_cache[key]
+            return None
+        return total
+
+
+def store_total(query, total: int):
+    """Remember the total for a query (bounded, least recently stored evicted first)"""
+    key = _count_cache_key(query)
+    with _total_cache_lock:
+        _total_cache[key] = (total, time.monotonic())
+        _total_cache.move_to_end(key)
+        while len(_total_cache) > TOTAL_CACHE_MAX_ENTRIES:
+            _total_cache.popitem(last=False)
+
+
+def fetch_page_with_total(query: Query, offset: int, limit: int) -> Tuple[List[Any], int]:
+    """
+    Fetch one page of an ordered query together with the total number of matches
+
+    The total comes from COUNT(*) OVER () on the page query itself, so the
+    filtered set is scanned once and there is a single round trip instead of
+    a separate count(). When the last known total for the same filters was
+    at least LARGE_TOTAL_THRESHOLD and is younger than TOTAL_CACHE_TTL_SECONDS,
+    the window count is skipped and the cached total is returned (such totals
+    may lag writes by up to the TTL; smaller ones are always exact).
+
+    Args:
+        query: Filtered and ordered query (without offset/limit)
+        offset: Number of rows to skip
+        limit: Page size
+
+    Returns:
+        (rows, total_count). Single-entity queries yield entities; multi-column
+        queries yield their rows (with an extra total_count column).
+    """
+    count_query = query.order_by(None)
+    cached_total = get_cached_total(count_query)
+    single_entity = len(query.column_descriptions) == 1
+
+    if cached_total is not None and cached_total >= LARGE_TOTAL_THRESHOLD:
+        # Same row shape as the counted branch, with the cached total as a constant
+        rows = query.add_columns(literal(cached_total).label("total_count"))\
+                    .offset(offset).limit(limit).all()
+        if single_entity:
+            rows = [row[0] for row in rows]
+        return rows, cached_total
+
+    rows = query.add_columns(func.count().over().label("total_count"))\
+                .offset(offset).limit(limit).all()
+
+    if rows:
+        total = rows[0].total_count
+    elif offset == 0:
+        total = 0
+    else:
+        # Past the last page: the window has no row to report the total on
+        total = cached_total if cached_total is not None else count_query.count()
+
+    store_total(count_query, total)
+
+    if single_entity:
+        rows = [row[0] for row in rows]
+    return rows, total
+
+
+async def fetch_page_with_total_async(
+    db_session: AsyncSession,
+    statement: Select,
+    offset: int,
+    limit: int
+) -> Tuple[List[Any], int]:
+    """
+    fetch_page_with_total for select() statements on an AsyncSession
+
+    Shares the total cache with the sync version, so both paths skip the
+    window count for the same large filtered sets.
+
+    Args:
+        db_session: Async database session
+        statement: Filtered and ordered select() (without offset/limit)
+        offset: Number of rows to skip
+        limit: Page size
+
+    Returns:
+        (rows, total_count), as fetch_page_with_total
+    """
+    count_statement = statement.order_by(None)
+    cached_total = get_cached_total(count_statement)
+    single_entity = len(statement.column_descriptions) == 1
+
+    if cached_total is not None and cached_total >= LARGE_TOTAL_THRESHOLD:
+        result = await db_session.execute(
+            statement.add_columns(literal(cached_total).label("total_count")).offset(offset).limit(limit)
+        )
+        rows = result.all()
+        if single_entity:
+            rows = [row[0] for row in rows]
+        return rows, cached_total
+
+    result = await db_session.execute(
+        statement.add_columns(func.count().over().label("total_count")).offset(offset).limit(limit)
+    )
+    rows = result.all()
+
+    if rows:
+        total = rows[0].total_count
+    elif offset == 0:
+        total = 0
+    elif cached_total is not None:
+        total = cached_total
+    else:
+        total = await db_session.scalar(select(func.count()).select_from(count_statement.subquery()))
+
+    store_total(count_statement, total)
+
+    if single_entity:
+        rows = [row[0] for row in rows]
+    return rows, total
@@ -5,8 +5,14 @@ import { useAuth } from '../../../contexts/AuthContext';
 import StatusOverlay from '../../common/StatusOverlay';
 import './UserManagement.css';
 
+const USERS_PAGE_SIZE = 50;
+
 const UserManagement = () => {
   const [users, setUsers] = useState([]);
+  const [totalCount, setTotalCount] = useState(0);
+  const [pageNum, setPageNum] = useState(1);
+  const [searchTerm, setSearchTerm] = useState('');
+  const [roleFilter, setRoleFilter] = useState('');
   const [loading, setLoading] = useState(false);
   const [showCreateModal, setShowCreateModal] = useState(false);
   const [editingUser, setEditingUser] = useState(null);
@@ -40,14 +46,21 @@ const UserManagement = () => {
     'receipt_viewer'
   ];
 
-  // Fetch all users
+  // Fetch one page of users matching the search and role filter
   const fetchUsers = async () => {
     setLoading(true);
     try {
       const response = await axios.get(API_URLS.getAllUsers(), {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params: {
+          page_num: pageNum,
+          page_size: USERS_PAGE_SIZE,
+          username: searchTerm || undefined,
+          role: roleFilter || undefined
+        }
       });
       setUsers(response.data.data);
+      setTotalCount(response.data.total_count);
     } catch (error) {
       const status = error.response?.status;
       if (status === 401 || status === 403) {
@@ -72,7 +85,18 @@ const UserManagement = () => {
 
   useEffect(() => {
     fetchUsers();
-  }, []);
+  }, [pageNum, roleFilter]);
+
+  const totalPages = Math.max(1, Math.ceil(totalCount / USERS_PAGE_SIZE));
+
+  const handleSearch = (e) => {
+    e.preventDefault();
+    if (pageNum === 1) {
+      fetchUsers();
+    } else {
+      setPageNum(1);
+    }
+  };
 
   // Create user
   const handleCreateUser = async (e) => {
@@ -210,6 +234,25 @@ const UserManagement = () => {
         </button>
       </div>
 
+      <form className="um-filters" onSubmit={handleSearch}>
+        <input
+          type="text"
+          placeholder="Search username"
+          value={searchTerm}
+          onChange={(e) => setSearchTerm(e.target.value)}
+        />
+        <select
+          value={roleFilter}
+          onChange={(e) => { setRoleFilter(e.target.value); setPageNum(1); }}
+        >
+          <option value="">All roles</option>
+          {availableRoles.map(role => (
+            <option key={role} value={role}>{role}</option>
+          ))}
+        </select>
+        <button type="submit" className="um-btn um-btn-secondary">🔍 Search</button>
+      </form>
+
       <div className="um-table-container">
         <table className="um-table">
           <thead>
@@ -266,6 +309,24 @@ const UserManagement = () => {
         </table>
       </div>
 
+      <div className="um-pagination">
+        <button
+          className="um-btn um-btn-secondary"
+          disabled={pageNum <= 1}
+          onClick={() => setPageNum(pageNum - 1)}
+        >
+          ◀ Previous
+        </button>
+        <span>Page {pageNum} of {totalPages} ({totalCount} users)</span>
+        <button
+          className="um-btn um-btn-secondary"
+          disabled={pageNum >= totalPages}
+          onClick={() => setPageNum(pageNum + 1)}
+        >
+          Next ▶
+        </button>
+      </div>
+
       {/* Create User Modal */}
       {showCreateModal && (
         <div className="um-modal-overlay" onClick={() => setShowCreateModal(false)}>
@@ -32,13 +32,14 @@ const Home = () => {
   const fetchStats = async () => {
     try {
       await execute(
-        ({ signal }) => axios.get(API_URLS.getUser_dataStats(), { signal }),
+        ({ signal }) => axios.get(API_URLS.getDashboard(), { signal }),
         {
           loadingMessage: "Loading dashboard statistics...",
           onSuccess: (response) => {
-            console.log('✅ Home: Stats fetched successfully');
-            // Backend returns { status, message, data: {...actual stats...} }
-            setStats(response.data.data || response.data);
+            console.log('✅ Home: Dashboard fetched successfully');
+            // Backend returns { status, message, data: { me, user_data_stats, ... } };
+            // user_data_stats is left out for roles that cannot read user data
+            setStats(response.data.data?.user_data_stats || { total: 0, all: 0, nrs: 0, commitee: 0, siddhpur: 0 });
             setAuthError(null);
             setShowAuthErrorOverlay(false);
           },
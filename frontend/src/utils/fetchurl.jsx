@@ -197,8 +197,9 @@ export const API_URLS = {
   getAllUsers: () => `${getBaseUrl()}/auth/users`,  // Get all system users (admin only)
   createUser: () => `${getBaseUrl()}/auth/create-user`,  // Create user (admin only)
   updateUser: (id) => `${getBaseUrl()}/auth/users/${id}`,  // Update user (admin only)
+  assignRoleToUsers: (role) => `${getBaseUrl()}/auth/roles/${role}/users`,  // Give one role to many users (admin only)
   getReceiptCreators: () => `${getBaseUrl()}/receipts/creators`,  // Get users who have created receipts (for reports filtering)
-  getReceiptReportsDropdown: () => `${getBaseUrl()}/receipts/reports/dropdown`,  // Get users with role IDs 1 & 5 for reports dropdown
+  getReceiptReportsDropdown: () => `${getBaseUrl()}/receipts/reports/dropdown`,  // Get admins and receipt creators for reports dropdown
   
   // Receipts
   createReceipt: () => `${getBaseUrl()}/receipts/`,
@@ -206,5 +207,8 @@ export const API_URLS = {
   getAllReceipts: () => `${getBaseUrl()}/receipts/`,
   updateReceipt: (id) => `${getBaseUrl()}/receipts/${id}`,
   deleteReceipt: (id) => `${getBaseUrl()}/receipts/${id}`,
-  getReceiptStats: () => `${getBaseUrl()}/receipts/stats/summary`
+  getReceiptStats: () => `${getBaseUrl()}/receipts/stats/summary`,
+  
+  // Dashboard (current user and home view widgets in one request)
+  getDashboard: () => `${getBaseUrl()}/dashboard`
 };